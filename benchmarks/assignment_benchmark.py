@@ -0,0 +1,126 @@
+"""
+Compare the ship-to-planet assignment of the bot, greedy with a heap of ships per planet as it used to be and with the
+lazily sorted ships of tsmlstarterbot.assignment.greedy_ships, against the optimal and the fast modes, for the total
+distance flown by the ships and for the time taken.
+
+Run from the repository root:
+    python -m benchmarks.assignment_benchmark
+"""
+import time
+import heapq
+
+import numpy as np
+
+from tsmlstarterbot.common import PLANET_MAX_NUM
+from tsmlstarterbot import assignment
+from benchmarks.synthetic import synthetic_map
+
+SHIP_COUNTS = (20, 100, 300, 600)
+# Seconds the fast mode is given
+DEADLINE = 0.005
+REPEATS = 3
+SEED = 0
+
+
+def heap_assignment(game_map, undocked_ships, predictions):
+    """
+    The greedy heaps Bot.produce_ships_to_planets_assignment used before greedy_ships, without the scheduler.
+    """
+    number_of_ships_to_assign = len(undocked_ships)
+    planet_heap = []
+    ship_heaps = [[] for _ in range(PLANET_MAX_NUM)]
+    for planet in game_map.all_planets():
+        heapq.heappush(planet_heap, (-predictions[planet.id] * number_of_ships_to_assign, planet.id))
+        h = []
+        for ship in undocked_ships:
+            heapq.heappush(h, (ship.calculate_distance_between(planet), ship.id))
+        ship_heaps[planet.id] = h
+
+    result = []
+    already_assigned_ships = set()
+    while number_of_ships_to_assign > len(already_assigned_ships):
+        ships_to_send, best_planet_id = heapq.heappop(planet_heap)
+        heapq.heappush(planet_heap, (-(-ships_to_send - 1), best_planet_id))
+        _, best_ship_id = heapq.heappop(ship_heaps[best_planet_id])
+        while best_ship_id in already_assigned_ships:
+            _, best_ship_id = heapq.heappop(ship_heaps[best_planet_id])
+        result.append((game_map.get_me().get_ship(best_ship_id), game_map.get_planet(best_planet_id)))
+        already_assigned_ships.add(best_ship_id)
+    return result
+
+
+def greedy_assignment(game_map, undocked_ships, predictions):
+    """
+    The greedy mode of Bot.produce_ships_to_planets_assignment.
+    """
+    planets = game_map.all_planets()
+    picks = assignment.planet_quotas(predictions, [planet.id for planet in planets], len(undocked_ships))
+    distances = assignment.distance_matrix([ship.x for ship in undocked_ships], [ship.y for ship in undocked_ships],
+                                           [planet.x for planet in planets], [planet.y for planet in planets])
+    ships = assignment.greedy_ships(distances, picks, [ship.id for ship in undocked_ships])
+    return [(undocked_ships[ship], planets[planet]) for ship, planet in zip(ships.tolist(), picks)]
+
+
+def solved_assignment(game_map, undocked_ships, predictions, exact=True, deadline=None):
+    """
+    The optimal and fast modes of Bot.produce_ships_to_planets_assignment.
+    """
+    planets = game_map.all_planets()
+    picks = assignment.planet_quotas(predictions, [planet.id for planet in planets], len(undocked_ships))
+    distances = assignment.distance_matrix([ship.x for ship in undocked_ships], [ship.y for ship in undocked_ships],
+                                           [planet.x for planet in planets], [planet.y for planet in planets])
+    planet_of_ship = assignment.solve(distances, picks, exact=exact,
+                                      deadline=time.time() + deadline if deadline is not None else None)
+    return [(ship, planets[planet]) for ship, planet in zip(undocked_ships, planet_of_ship.tolist())]
+
+
+def total_distance(pairs):
+    return sum(ship.calculate_distance_between(planet) for ship, planet in pairs)
+
+
+def planet_counts(pairs):
+    return sorted((planet.id, sum(1 for _, other in pairs if other is planet)) for planet in {p for _, p in pairs})
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    modes = (("greedy heaps", heap_assignment),
+             ("greedy, lazy", greedy_assignment),
+             ("optimal", solved_assignment),
+             ("fast, {:g} ms".format(DEADLINE * 1000),
+              lambda *arguments: solved_assignment(*arguments, exact=False, deadline=DEADLINE)),
+             ("fast, no time", lambda *arguments: solved_assignment(*arguments, exact=False, deadline=0)),
+             ("fast, unlimited", lambda *arguments: solved_assignment(*arguments, exact=False)))
+
+    print("{:>6} {:>18} {:>12} {:>10}".format("ships", "mode", "distance", "time, ms"))
+    for num_ships in SHIP_COUNTS:
+        game_map = synthetic_map(2 * num_ships, num_players=2, seed=num_ships)
+        undocked_ships = [ship for ship in game_map.get_me().all_ships()
+                          if ship.docking_status == ship.DockingStatus.UNDOCKED]
+        predictions = rng.dirichlet(np.ones(PLANET_MAX_NUM))
+
+        results = {}
+        for name, mode in modes:
+            timings = []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                results[name] = mode(game_map, undocked_ships, predictions)
+                timings.append(time.perf_counter() - start)
+            print("{:>6} {:>18} {:>12.1f} {:>10.2f}".format(len(undocked_ships), name,
+                                                          total_distance(results[name]), min(timings) * 1000))
+
+        greedy, optimal = results["greedy heaps"], results["optimal"]
+        assert [(ship.id, planet.id) for ship, planet in results["greedy, lazy"]] == \
+               [(ship.id, planet.id) for ship, planet in greedy], \
+            "The lazy greedy assignment differs from the heaps for {} ships".format(num_ships)
+        for name, _ in modes[1:]:
+            assert planet_counts(results[name]) == planet_counts(greedy), \
+                "The planets don't get the same numbers of ships with {} for {} ships".format(name, num_ships)
+            assert total_distance(optimal) <= total_distance(results[name]) + 1e-6, \
+                "The optimal assignment is longer than {} for {} ships".format(name, num_ships)
+        assert abs(total_distance(results["fast, unlimited"]) - total_distance(optimal)) < 1e-6, \
+            "The fast mode without deadline isn't optimal for {} ships".format(num_ships)
+
+
+if __name__ == "__main__":
+    main()
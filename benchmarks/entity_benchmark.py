@@ -0,0 +1,119 @@
+"""
+Compare the memory and the speed of the slotted entities of hlt.entity against the same classes with a __dict__, as
+they were before, on a synthetic 1000-ship map: the memory taken by the ships, planets and positions, the time to create
+them, and the time of the per-ship geometry the bot and navigation run every turn (distances and closest points).
+
+Run from the repository root:
+    python -m benchmarks.entity_benchmark
+"""
+import math
+import timeit
+import tracemalloc
+import types
+
+from hlt import entity
+from benchmarks.synthetic import synthetic_map
+
+NUM_SHIPS = 1000
+REPEATS = 5
+
+
+def without_slots(cls, base=object):
+    """
+    A copy of an entity class with a __dict__ instead of __slots__, deriving from base.
+    """
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name not in ("__slots__", "__dict__", "__weakref__")
+                 and not isinstance(value, types.MemberDescriptorType)}
+    return type(cls.__name__, (base,), namespace)
+
+
+DictEntity = without_slots(entity.Entity)
+DictPlanet = without_slots(entity.Planet, DictEntity)
+DictShip = without_slots(entity.Ship, DictEntity)
+DictPosition = without_slots(entity.Position, DictEntity)
+
+
+def create(classes, ships, planets):
+    """
+    Create the ships, planets and one position per ship of a map with the given classes.
+
+    :param classes: the Ship, Planet and Position classes
+    :return: lists of the ships, planets and positions
+    """
+    ship_class, planet_class, position_class = classes
+    new_ships = [ship_class(ship.owner.id, ship.id, ship.x, ship.y, ship.health, 0.0, 0.0, ship.docking_status,
+                            ship.planet.id if ship.planet is not None else 0, ship._docking_progress,
+                            ship._weapon_cooldown) for ship in ships]
+    new_planets = [planet_class(planet.id, planet.x, planet.y, planet.health, planet.radius,
+                                planet.num_docking_spots, planet.current_production, planet.remaining_resources,
+                                planet.owner is not None, planet.owner.id if planet.owner is not None else 0,
+                                list(planet._docked_ship_ids)) for planet in planets]
+    positions = [position_class(ship.x, ship.y) for ship in ships]
+    return new_ships, new_planets, positions
+
+
+def allocated(function):
+    """
+    :return: the bytes allocated by function and still held by its result
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def geometry(ships, planets, position_class):
+    """
+    The distance of every ship to every planet, and the closest point of every planet to every ship.
+    """
+    distances = [ship.calculate_distance_between(planet) for ship in ships for planet in planets]
+    points = []
+    for ship in ships:
+        for planet in planets:
+            # Entity.closest_point_to, creating positions of the given class
+            angle = planet.calculate_angle_between(ship)
+            radius = planet.radius + 3
+            point = position_class(planet.x + radius * math.cos(math.radians(angle)),
+                                   planet.y + radius * math.sin(math.radians(angle)))
+            points.append((point.x, point.y))
+    return distances, points
+
+
+def main():
+    game_map = synthetic_map(NUM_SHIPS, num_players=2)
+    ships, planets = game_map._all_ships(), game_map.all_planets()
+    variants = (("dict", (DictShip, DictPlanet, DictPosition)),
+                ("slots", (entity.Ship, entity.Planet, entity.Position)))
+
+    results = {}
+    for name, classes in variants:
+        ship_class, planet_class, position_class = classes
+        new_ships, new_planets, _ = create(classes, ships, planets)
+        results[name] = {
+            "ship, bytes": allocated(lambda: create(classes, ships, [])[0]) / len(ships),
+            "planet, bytes": allocated(lambda: create(classes, [], planets)[1]) / len(planets),
+            "position, bytes": allocated(lambda: create(classes, ships, [])[2]) / len(ships),
+            "create map, ms": min(timeit.repeat(lambda: create(classes, ships, planets),
+                                                number=1, repeat=REPEATS)) * 1000,
+            "geometry, ms": min(timeit.repeat(lambda: geometry(new_ships, new_planets, position_class),
+                                              number=1, repeat=REPEATS)) * 1000,
+        }
+        results[name, "geometry"] = geometry(new_ships, new_planets, position_class)
+
+    assert results["dict", "geometry"] == results["slots", "geometry"], \
+        "The slotted entities give other distances or points"
+
+    print("{} ships, {} planets".format(len(ships), len(planets)))
+    print("{:>16} {:>10} {:>10} {:>8}".format("", "dict", "slots", "ratio"))
+    for measure in results["dict"]:
+        dict_value, slots_value = results["dict"][measure], results["slots"][measure]
+        print("{:>16} {:>10.1f} {:>10.1f} {:>7.2f}x".format(measure, dict_value, slots_value,
+                                                           dict_value / slots_value))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare the vectorized per-planet feature extraction against the per-ship loop it replaced.
+
+Run from the repository root:
+    python -m benchmarks.feature_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from tsmlstarterbot.common import *
+from tsmlstarterbot.features import produce_features_per_planet
+from benchmarks.synthetic import synthetic_map
+
+SHIP_COUNTS = (50, 200, 600)
+REPEATS = 20
+
+
+def loop_features_per_planet(game_map):
+    """
+    The original implementation of Bot.produce_features_per_planet, with gravity divided by the squared distance
+    rather than by the square of the distance, as the training data always had it.
+    """
+    feature_matrix = [[0 for _ in range(PER_PLANET_FEATURES)] for _ in range(PLANET_MAX_NUM)]
+
+    for planet in game_map.all_planets():
+
+        if planet.owner == game_map.get_me():
+            ownership = 1
+        elif planet.owner is None:
+            ownership = 0
+        else:
+            ownership = -1
+
+        my_best_distance = 10000
+        enemy_best_distance = 10000
+
+        gravity = 0
+
+        health_weighted_ship_distance = 0
+        sum_of_health = 0
+
+        for player in game_map.all_players():
+            for ship in player.all_ships():
+                d2 = distance2(planet.x, planet.y, ship.x, ship.y)
+                d = math.sqrt(d2)
+                if player == game_map.get_me():
+                    my_best_distance = min(my_best_distance, d)
+                    sum_of_health += ship.health
+                    health_weighted_ship_distance += d * ship.health
+                    gravity += ship.health / d2
+                else:
+                    enemy_best_distance = min(enemy_best_distance, d)
+                    gravity -= ship.health / d2
+
+        distance_from_center = distance(planet.x, planet.y, game_map.width / 2, game_map.height / 2)
+
+        health_weighted_ship_distance = health_weighted_ship_distance / sum_of_health
+
+        remaining_docking_spots = planet.num_docking_spots - len(planet.all_docked_ships())
+        signed_current_production = planet.current_production * ownership
+
+        is_active = remaining_docking_spots > 0 or ownership != 1
+
+        feature_matrix[planet.id] = [
+            planet.health,
+            remaining_docking_spots,
+            planet.remaining_resources,
+            signed_current_production,
+            gravity,
+            my_best_distance,
+            enemy_best_distance,
+            ownership,
+            distance_from_center,
+            health_weighted_ship_distance,
+            is_active
+        ]
+
+    return np.array(feature_matrix).reshape((1, PLANET_MAX_NUM, PER_PLANET_FEATURES))
+
+
+def main():
+    print("{:>6} {:>12} {:>12} {:>8}".format("ships", "loop, ms", "numpy, ms", "speedup"))
+    for num_ships in SHIP_COUNTS:
+        game_map = synthetic_map(num_ships, num_players=4, seed=num_ships)
+
+        expected = loop_features_per_planet(game_map)
+        actual = produce_features_per_planet(game_map)
+        assert np.array_equal(expected, actual), "Vectorized features differ from the loop for {} ships".format(
+            num_ships)
+
+        loop_time = min(timeit.repeat(lambda: loop_features_per_planet(game_map), number=1, repeat=REPEATS))
+        numpy_time = min(timeit.repeat(lambda: produce_features_per_planet(game_map), number=1, repeat=REPEATS))
+        print("{:>6} {:>12.3f} {:>12.3f} {:>7.1f}x".format(num_ships, loop_time * 1000, numpy_time * 1000,
+                                                          loop_time / numpy_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Compare the time Map._parse takes to parse a turn against the parser it replaced, which star-unpacked the tokens of
+every entity and so copied the remaining tokens each time, on synthetic maps of growing size. The columnar parse (and
+the objects then created from it) is shown for reference, and so is the incremental parse, on turns where every ship
+is still there but has moved.
+
+Run from the repository root:
+    python -m benchmarks.map_parse_benchmark
+"""
+import random
+import timeit
+
+from hlt import entity
+from hlt.game_map import Map, Player
+from benchmarks.synthetic import synthetic_map_string
+
+SHIP_COUNTS = (100, 1000, 3000, 5000)
+NUM_PLAYERS = 4
+REPEATS = 3
+
+
+def _legacy_ship(player_id, tokens):
+    (sid, x, y, hp, vel_x, vel_y,
+     docked, docked_planet, progress, cooldown, *remainder) = tokens
+    ship = entity.Ship(player_id, int(sid), float(x), float(y), int(hp), float(vel_x), float(vel_y),
+                       entity.Ship.DockingStatus(int(docked)), int(docked_planet), int(progress), int(cooldown))
+    return int(sid), ship, remainder
+
+
+def _legacy_planet(tokens):
+    (plid, x, y, hp, r, docking, current, remaining,
+     owned, owner, num_docked_ships, *remainder) = tokens
+    docked_ships = []
+    for _ in range(int(num_docked_ships)):
+        ship_id, *remainder = remainder
+        docked_ships.append(int(ship_id))
+    planet = entity.Planet(int(plid), float(x), float(y), int(hp), float(r), int(docking), int(current),
+                           int(remaining), bool(int(owned)), int(owner), docked_ships)
+    return int(plid), planet, remainder
+
+
+def legacy_parse(map_string):
+    """
+    The parser Map._parse used before, down to the star-unpacking of the Player, Ship and Planet parsers.
+
+    :return: the linked players and planets, keyed by id
+    :rtype: (dict, dict)
+    """
+    num_players, *remainder = map_string.split()
+    players = {}
+    for _ in range(int(num_players)):
+        player_id, num_ships, *remainder = remainder
+        ships = {}
+        for _ in range(int(num_ships)):
+            ship_id, ships[ship_id], remainder = _legacy_ship(int(player_id), remainder)
+        players[int(player_id)] = Player(int(player_id), ships)
+
+    num_planets, *remainder = remainder
+    planets = {}
+    for _ in range(int(num_planets)):
+        plid, planets[plid], remainder = _legacy_planet(remainder)
+    assert len(remainder) == 0
+
+    for celestial_object in list(planets.values()) + [ship for player in players.values()
+                                                      for ship in player.all_ships()]:
+        celestial_object._link(players, planets)
+    return players, planets
+
+
+def describe(players, planets):
+    """
+    Every attribute of every entity, with its type, and the linked entities replaced by their ids.
+    """
+    def fields(celestial_object):
+        names = [name for cls in type(celestial_object).__mro__ for name in getattr(cls, "__slots__", ())]
+        values = [(name, getattr(celestial_object, name)) for name in names if name != "_docked_ships"]
+        return sorted((name, type(value).__name__, value.id if isinstance(value, (entity.Entity, Player)) else value)
+                      for name, value in values)
+
+    return ([(player_id, [fields(ship) for ship in player.all_ships()]) for player_id, player in players.items()],
+            [(planet_id, fields(planet), sorted(planet._docked_ships)) for planet_id, planet in planets.items()])
+
+
+def moved_ships(map_string, seed=0):
+    """
+    The map string of a next turn, where every ship which isn't docked has moved a little.
+    """
+    rng = random.Random(seed)
+    tokens = map_string.split()
+    index = 1
+    for _ in range(int(tokens[0])):
+        num_ships = int(tokens[index + 1])
+        index += 2
+        for _ in range(num_ships):
+            if tokens[index + 6] == "0":
+                tokens[index + 1] = repr(float(tokens[index + 1]) + rng.uniform(-1, 1))
+                tokens[index + 2] = repr(float(tokens[index + 2]) + rng.uniform(-1, 1))
+            index += 10
+    return " ".join(tokens)
+
+
+def main():
+    print("{:>6} {:>12} {:>12} {:>15} {:>15} {:>16} {:>8}".format(
+        "ships", "legacy, ms", "parse, ms", "columnar, ms", "+ objects, ms", "incremental, ms", "speedup"))
+    for num_ships in SHIP_COUNTS:
+        map_string = synthetic_map_string(num_ships, num_players=NUM_PLAYERS, seed=num_ships)
+        game_map = Map(0, 240, 160)
+        columnar_map = Map(0, 240, 160, columnar=True)
+        incremental_map = Map(0, 240, 160, incremental=True)
+        turns = [map_string, moved_ships(map_string)]
+
+        game_map._parse(map_string)
+        assert describe(game_map._players, game_map._planets) == describe(*legacy_parse(map_string)), \
+            "The parsed map differs from the legacy parser for {} ships".format(num_ships)
+
+        for turn in turns + turns:
+            incremental_map._parse(turn)
+            game_map._parse(turn)
+            assert describe(incremental_map._players, incremental_map._planets) == \
+                describe(game_map._players, game_map._planets), \
+                "The incremental map differs from the parsed one for {} ships".format(num_ships)
+        assert not incremental_map.added_ships and not incremental_map.removed_ships
+
+        def incremental():
+            for turn in turns:
+                incremental_map._parse(turn)
+
+        def columnar_objects():
+            columnar_map._parse(map_string)
+            columnar_map._materialize()
+
+        legacy_time = min(timeit.repeat(lambda: legacy_parse(map_string), number=1, repeat=REPEATS))
+        parse_time = min(timeit.repeat(lambda: game_map._parse(map_string), number=1, repeat=REPEATS))
+        columnar_time = min(timeit.repeat(lambda: columnar_map._parse(map_string), number=1, repeat=REPEATS))
+        objects_time = min(timeit.repeat(columnar_objects, number=1, repeat=REPEATS))
+        incremental_time = min(timeit.repeat(incremental, number=1, repeat=REPEATS)) / len(turns)
+        print("{:>6} {:>12.2f} {:>12.2f} {:>15.2f} {:>15.2f} {:>16.2f} {:>7.1f}x".format(
+            num_ships, legacy_time * 1000, parse_time * 1000, columnar_time * 1000, objects_time * 1000,
+            incremental_time * 1000, legacy_time / parse_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare the batched angular search of Ship.navigate against the recursive search it replaced, on crowded maps.
+
+Run from the repository root:
+    python -m benchmarks.navigation_benchmark
+"""
+import math
+import time
+
+from hlt.entity import Position
+from benchmarks.synthetic import synthetic_map
+
+# (ships, map width, map height)
+CROWDED_MAPS = ((200, 120, 80), (600, 160, 100), (1000, 160, 100))
+NAVIGATING_SHIPS = 100
+MAX_CORRECTIONS = 180
+
+
+def recursive_navigate(ship, target, game_map, speed, avoid_obstacles=True, max_corrections=90, angular_step=1):
+    """
+    The original implementation of Ship.navigate.
+    """
+    if max_corrections <= 0:
+        return None
+    distance = ship.calculate_distance_between(target)
+    angle = ship.calculate_angle_between(target)
+    if avoid_obstacles and game_map.obstacles_between(ship, target):
+        new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
+        new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
+        new_target = Position(ship.x + new_target_dx, ship.y + new_target_dy)
+        return recursive_navigate(ship, new_target, game_map, speed, True, max_corrections - 1, angular_step)
+    speed = speed if (distance >= speed) else distance
+    return ship.thrust(speed, angle)
+
+
+def main():
+    print("{:>6} {:>10} {:>16} {:>16} {:>8}".format("ships", "map", "recursive, ms", "batched, ms", "speedup"))
+    for num_ships, width, height in CROWDED_MAPS:
+        game_map = synthetic_map(num_ships, num_players=4, width=width, height=height, seed=num_ships)
+        planets = game_map.all_planets()
+        ships = game_map._all_ships()[:NAVIGATING_SHIPS]
+        # Every ship goes to the far side of a planet across the map, so that most paths need corrections
+        targets = [ship.closest_point_to(planets[(ship.id * 7) % len(planets)]) for ship in ships]
+        game_map.obstacles_between(ships[0], targets[0])  # Build the obstacle index outside of the timings
+
+        start = time.perf_counter()
+        expected = [recursive_navigate(ship, target, game_map, speed=7, max_corrections=MAX_CORRECTIONS)
+                    for ship, target in zip(ships, targets)]
+        recursive_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [ship.navigate(target, game_map, speed=7, max_corrections=MAX_CORRECTIONS)
+                  for ship, target in zip(ships, targets)]
+        batched_time = time.perf_counter() - start
+
+        assert expected == actual, "Batched navigation commands differ from the recursive ones"
+        print("{:>6} {:>10} {:>16.1f} {:>16.1f} {:>7.1f}x".format(num_ships, "{}x{}".format(width, height),
+                                                                  recursive_time * 1000, batched_time * 1000,
+                                                                  recursive_time / batched_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare the vectorized per-frame feature extraction of the replay parser, produce_compact_frame_features, against the
+per-planet loop it replaced, which read the json dictionary of the replay.
+
+Run from the repository root:
+    python -m benchmarks.parsing_benchmark
+"""
+import timeit
+
+from tsmlstarterbot.common import *
+from tsmlstarterbot.features import produce_compact_frame_features
+from tsmlstarterbot.replay import CompactReplay
+from benchmarks.synthetic import synthetic_replay
+
+SHIP_COUNTS = (50, 200, 600)
+FRAMES = 20
+REPEATS = 5
+
+
+def loop_frame_features(planets, current_frame, bot_to_imitate_id, width, height):
+    """
+    The original feature loop of parsing.parse.
+    """
+    planet_features = {}
+    current_planets = current_frame['planets']
+
+    for planet_id in range(PLANET_MAX_NUM):
+
+        if str(planet_id) not in current_planets:
+            continue
+        planet_data = current_planets[str(planet_id)]
+
+        gravity = 0
+        planet_base_data = planets[planet_id]
+        closest_friendly_ship_distance = 10000
+        closest_enemy_ship_distance = 10000
+
+        ownership = 0
+        if str(planet_data['owner']) == bot_to_imitate_id:
+            ownership = 1
+        elif planet_data['owner'] is not None:
+            ownership = -1
+
+        average_distance = 0
+        my_ships_health = 0
+
+        for player_id, ships in current_frame['ships'].items():
+            for ship_id, ship_data in ships.items():
+                is_bot_to_imitate = 1 if player_id == bot_to_imitate_id else -1
+                dist2 = distance2(planet_base_data['x'], planet_base_data['y'],
+                                  ship_data['x'], ship_data['y'])
+                dist = math.sqrt(dist2)
+                gravity = gravity + is_bot_to_imitate * ship_data['health'] / dist2
+                if is_bot_to_imitate == 1:
+                    closest_friendly_ship_distance = min(closest_friendly_ship_distance, dist)
+                    average_distance = average_distance + dist * ship_data['health']
+                    my_ships_health = my_ships_health + ship_data['health']
+                else:
+                    closest_enemy_ship_distance = min(closest_enemy_ship_distance, dist)
+
+        distance_from_center = distance(planet_base_data['x'], planet_base_data['y'], width / 2, height / 2)
+        average_distance = average_distance / my_ships_health
+
+        is_active = 1.0 if planet_base_data['docking_spots'] > len(
+            planet_data['docked_ships']) or ownership != 1 else 0.0
+
+        signed_current_production = planet_data['current_production'] * ownership
+
+        planet_features[str(planet_id)] = [
+            planet_data['health'],
+            planet_base_data['docking_spots'] - len(planet_data['docked_ships']),
+            planet_data['remaining_production'],
+            signed_current_production,
+            gravity,
+            closest_friendly_ship_distance,
+            closest_enemy_ship_distance,
+            ownership,
+            distance_from_center,
+            average_distance,
+            is_active]
+
+    return planet_features
+
+
+def main():
+    print("{:>6} {:>12} {:>12} {:>8}".format("ships", "loop, ms", "numpy, ms", "speedup"))
+    for num_ships in SHIP_COUNTS:
+        replay = synthetic_replay(FRAMES, num_ships, num_players=4, seed=num_ships)
+        compact = CompactReplay.from_json(replay)
+        loop_arguments = [(replay['planets'], frame, "0", replay['width'], replay['height'])
+                          for frame in replay['frames']]
+        numpy_arguments = [(compact, frame, 0) for frame in range(compact.num_frames)]
+
+        for frame_loop_arguments, frame_numpy_arguments in zip(loop_arguments, numpy_arguments):
+            # repr also tells apart ints from floats, which would change the serialized features
+            assert repr(loop_frame_features(*frame_loop_arguments)) == \
+                repr(produce_compact_frame_features(*frame_numpy_arguments)), \
+                "Vectorized features differ from the loop for {} ships".format(num_ships)
+
+        def run(features, arguments):
+            return lambda: [features(*frame_arguments) for frame_arguments in arguments]
+
+        loop_time = min(timeit.repeat(run(loop_frame_features, loop_arguments), number=1, repeat=REPEATS)) / FRAMES
+        numpy_time = min(timeit.repeat(run(produce_compact_frame_features, numpy_arguments),
+                                       number=1, repeat=REPEATS)) / FRAMES
+        print("{:>6} {:>12.3f} {:>12.3f} {:>7.1f}x".format(num_ships, loop_time * 1000, numpy_time * 1000,
+                                                          loop_time / numpy_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare loading replay files with parsing.load_compact_replay, which reads them in chunks and decodes them with
+replay.decode_replay, against reading them whole and decoding them with json.loads, as parsing.load_replay does: in
+time and in peak memory, the content of the file included. decode_replay is also timed with the json module alone, as
+when orjson isn't installed, and the time to load a replay and compute its features with parse_game is compared too.
+
+Run from the repository root:
+    python -m benchmarks.replay_benchmark
+"""
+import os
+import json
+import timeit
+import tempfile
+import tracemalloc
+
+from tsmlstarterbot import parsing, replay
+from benchmarks.synthetic import synthetic_replay
+
+SIZES = ((100, 100), (300, 200), (300, 600))
+REPEATS = 3
+
+
+def peak_memory(function):
+    """
+    :return: bytes allocated at the peak of the call, including its result
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def best_time(function):
+    return min(timeit.repeat(function, number=1, repeat=REPEATS))
+
+
+def load_without_orjson(path):
+    """
+    parsing.load_compact_replay, with the json module alone.
+    """
+    orjson, replay.orjson = replay.orjson, None
+    try:
+        return parsing.load_compact_replay(path)
+    finally:
+        replay.orjson = orjson
+
+
+def main():
+    if replay.orjson is None:
+        print("orjson is not installed, decode_replay uses the json module alone")
+    print("{:>6} {:>6} {:>6} {:>10} {:>12} {:>14} {:>10} {:>12} {:>16} {:>19}".format(
+        "frames", "ships", "MB", "json, ms", "compact, ms", "no orjson, ms", "json, MB", "compact, MB",
+        "json + parse, ms", "compact + parse, ms"))
+    with tempfile.TemporaryDirectory() as directory:
+        for num_frames, num_ships in SIZES:
+            game = synthetic_replay(num_frames, num_ships, num_players=4, seed=num_ships)
+            bot = game['player_names'][0]
+            path = os.path.join(directory, "replay.json")
+            with open(path, "w") as f:
+                json.dump(game, f)
+            del game
+
+            expected = parsing.parse_game(parsing.load_replay(path), bot)
+            assert repr(parsing.parse_game(parsing.load_compact_replay(path), bot)) == repr(expected), \
+                "The compact replay gives other features for {} frames of {} ships".format(num_frames, num_ships)
+            assert repr(parsing.parse_game(load_without_orjson(path), bot)) == repr(expected), \
+                "The compact replay decoded without orjson gives other features"
+            del expected
+
+            print("{:>6} {:>6} {:>6.1f} {:>10.1f} {:>12.1f} {:>14.1f} {:>10.1f} {:>12.1f} {:>16.1f} {:>19.1f}".format(
+                num_frames, num_ships, os.path.getsize(path) / 1e6,
+                best_time(lambda: parsing.load_replay(path)) * 1000,
+                best_time(lambda: parsing.load_compact_replay(path)) * 1000,
+                best_time(lambda: load_without_orjson(path)) * 1000,
+                peak_memory(lambda: parsing.load_replay(path)) / 1e6,
+                peak_memory(lambda: parsing.load_compact_replay(path)) / 1e6,
+                best_time(lambda: parsing.parse_game(parsing.load_replay(path), bot)) * 1000,
+                best_time(lambda: parsing.parse_game(parsing.load_compact_replay(path), bot)) * 1000))
+
+
+if __name__ == "__main__":
+    main()
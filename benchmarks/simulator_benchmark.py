@@ -0,0 +1,112 @@
+"""
+Measure how fast the local simulator plays games, with scripted players which expand to every planet and then attack,
+so that fleets grow to realistic sizes. The time of the players themselves is not counted.
+
+Run from the repository root:
+    python -m benchmarks.simulator_benchmark
+"""
+import math
+import time
+
+import numpy as np
+
+from hlt import collision, constants
+from tsmlstarterbot.simulator import Simulation, UNDOCKED
+
+# Players, map width and height
+GAMES = ((2, 240, 160), (4, 312, 208), (4, 384, 256))
+SEED = 0
+# Turns tried by the scripted players to avoid obstacles, in degrees
+TURNS = np.array([0] + [sign * turn for turn in range(10, 91, 10) for sign in (1, -1)])
+
+
+def scripted_commands(simulation, player_id):
+    """
+    Commands of a simple player: every undocked ship docks to the closest planet with a free spot and production left,
+    or flies to it, and once there is none left flies to the closest enemy ship. Ships turn by up to 90 degrees to
+    avoid the planets, the ships and where the ships already given an order are going.
+
+    :return: commands in the format sent by Game.send_command_queue
+    """
+    ships = list(simulation.ships.values())
+    planets = list(simulation.planets.values())
+    enemies = [ship for ship in ships if ship.owner != player_id]
+    free_planets = [planet for planet in planets if planet.owner in (None, player_id) and planet.remaining > 0 and
+                    len(planet.docked) < planet.docking_spots]
+
+    obstacle_x = [planet.x for planet in planets] + [ship.x for ship in ships]
+    obstacle_y = [planet.y for planet in planets] + [ship.y for ship in ships]
+    obstacle_radius = [planet.radius for planet in planets] + [constants.SHIP_RADIUS] * len(ships)
+
+    commands = []
+    for index, ship in enumerate(ships, len(planets)):
+        if ship.owner != player_id or ship.status != UNDOCKED:
+            continue
+        if free_planets:
+            planet = min(free_planets, key=lambda p: math.hypot(p.x - ship.x, p.y - ship.y) - p.radius)
+            distance = math.hypot(planet.x - ship.x, planet.y - ship.y) - planet.radius
+            if distance <= constants.DOCK_RADIUS + constants.SHIP_RADIUS:
+                commands.append("d {} {}".format(ship.id, planet.id))
+                continue
+            target_x, target_y, speed = planet.x, planet.y, min(constants.MAX_SPEED, int(distance - 2))
+        elif enemies:
+            target = min(enemies, key=lambda s: (s.x - ship.x) ** 2 + (s.y - ship.y) ** 2)
+            target_x, target_y, speed = target.x, target.y, constants.MAX_SPEED
+        else:
+            continue
+
+        angle = round(math.degrees(math.atan2(target_y - ship.y, target_x - ship.x)))
+        angles = np.radians(angle + TURNS)
+        end_x, end_y = ship.x + speed * np.cos(angles), ship.y + speed * np.sin(angles)
+        others = np.arange(len(obstacle_x)) != index
+        hits = collision.intersect_segments_circles(
+            np.full(len(angles), ship.x), np.full(len(angles), ship.y), end_x, end_y,
+            np.array(obstacle_x)[others], np.array(obstacle_y)[others], np.array(obstacle_radius)[others],
+            fudge=constants.SHIP_RADIUS + 0.1)
+        free = np.flatnonzero(~hits.any(axis=1))
+        if len(free):
+            turn = free[0]
+            commands.append("t {} {} {}".format(ship.id, speed, (angle + TURNS[turn]) % 360))
+            obstacle_x.append(end_x[turn])
+            obstacle_y.append(end_y[turn])
+            obstacle_radius.append(constants.SHIP_RADIUS)
+    return "".join(commands)
+
+
+def play_scripted(num_players, width, height, seed=SEED, max_turns=None):
+    """
+    Play a game between scripted players.
+
+    :return: the Simulation at the end of the game, and the seconds spent in the simulator
+    """
+    simulation = Simulation(num_players, width, height, seed=seed, max_turns=max_turns)
+    simulated = 0.0
+    while not simulation.is_over():
+        start = time.perf_counter()
+        simulation.map_string()
+        simulated += time.perf_counter() - start
+        for player_id in simulation.players_alive():
+            simulation.add_commands(player_id, scripted_commands(simulation, player_id))
+        start = time.perf_counter()
+        simulation.step()
+        simulated += time.perf_counter() - start
+    return simulation, simulated
+
+
+def main():
+    print("{:>8} {:>10} {:>6} {:>10} {:>10} {:>12} {:>10}".format(
+        "players", "map", "turns", "max ships", "game, s", "turn, ms", "turns/s"))
+    for num_players, width, height in GAMES:
+        simulation, simulated = play_scripted(num_players, width, height)
+        again, _ = play_scripted(num_players, width, height)
+        assert again.replay([]) == simulation.replay([]), "The game isn't deterministic for {} players".format(
+            num_players)
+
+        max_ships = max(sum(len(ships) for ships in frame["ships"].values()) for frame in simulation.frames)
+        print("{:>8} {:>10} {:>6} {:>10} {:>10.2f} {:>12.2f} {:>10.0f}".format(
+            num_players, "{}x{}".format(width, height), simulation.turn, max_ships, simulated,
+            simulated / simulation.turn * 1000, simulation.turn / simulated))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Synthetic game states for the benchmarks. Maps are generated as Halite engine map strings, so that they go through
+exactly the same parsing code as real games. Replays for the training code start from such a map.
+"""
+import math
+import random
+
+from hlt import constants
+from hlt.game_map import Map
+
+
+def synthetic_map_string(num_ships, num_players=2, num_planets=28, width=240, height=160, seed=0):
+    """
+    Generate a map string with num_ships ships split evenly among num_players players.
+
+    :param int num_ships: Total number of ships on the map
+    :param int num_players: Number of players
+    :param int num_planets: Number of planets
+    :param int width: Map width
+    :param int height: Map height
+    :param int seed: Random seed
+    :return: The map string as sent by the Halite engine
+    :rtype: str
+    """
+    rng = random.Random(seed)
+
+    # Planets are placed on a jittered grid so that they never overlap
+    columns = math.ceil(math.sqrt(num_planets * width / height))
+    rows = math.ceil(num_planets / columns)
+    cell_w, cell_h = width / columns, height / rows
+    planets = []
+    for planet_id in range(num_planets):
+        row, column = divmod(planet_id, columns)
+        radius = rng.uniform(3, min(cell_w, cell_h) / 4)
+        x = (column + 0.5) * cell_w + rng.uniform(-cell_w / 8, cell_w / 8)
+        y = (row + 0.5) * cell_h + rng.uniform(-cell_h / 8, cell_h / 8)
+        planets.append([planet_id, x, y, int(radius * 255), radius, rng.randint(2, 6)])
+
+    def free_position():
+        while True:
+            x, y = rng.uniform(1, width - 1), rng.uniform(1, height - 1)
+            if all(math.hypot(x - p[1], y - p[2]) > p[4] + 1 for p in planets):
+                return x, y
+
+    # The first two planets of every player are owned by it, with up to two ships docked to each of them
+    owners = {}
+    for player_id in range(num_players):
+        for planet_id in (2 * player_id, 2 * player_id + 1):
+            if planet_id < num_planets:
+                owners[planet_id] = player_id
+
+    ship_id = 0
+    players_tokens = [str(num_players)]
+    docked = {planet_id: [] for planet_id in range(num_planets)}
+    for player_id in range(num_players):
+        count = num_ships // num_players + (1 if player_id < num_ships % num_players else 0)
+        players_tokens += [str(player_id), str(count)]
+        owned_planets = [planet_id for planet_id, owner in owners.items() if owner == player_id]
+        for _ in range(count):
+            planet_id = next((p for p in owned_planets if len(docked[p]) < min(2, planets[p][5])), None)
+            if planet_id is not None:
+                planet = planets[planet_id]
+                angle = rng.uniform(0, 2 * math.pi)
+                x = planet[1] + (planet[4] + constants.SHIP_RADIUS) * math.cos(angle)
+                y = planet[2] + (planet[4] + constants.SHIP_RADIUS) * math.sin(angle)
+                docked[planet_id].append(ship_id)
+                status, progress = 2, 0
+            else:
+                x, y = free_position()
+                planet_id, status, progress = 0, 0, 0
+            players_tokens += [str(ship_id), repr(x), repr(y), str(rng.randint(1, constants.MAX_SHIP_HEALTH)),
+                               "0.0", "0.0", str(status), str(planet_id), str(progress), "0"]
+            ship_id += 1
+
+    planets_tokens = [str(num_planets)]
+    for planet_id, x, y, hp, radius, docking_spots in planets:
+        owned = planet_id in owners
+        planets_tokens += [str(planet_id), repr(x), repr(y), str(hp), repr(radius), str(docking_spots),
+                           str(rng.randint(0, constants.PRODUCTION_PER_SHIP - 1)) if owned else "0",
+                           str(int(radius * constants.RESOURCES_PER_RADIUS)),
+                           "1" if owned else "0", str(owners.get(planet_id, 0)),
+                           str(len(docked[planet_id]))] + [str(s) for s in docked[planet_id]]
+
+    return " ".join(players_tokens + planets_tokens)
+
+
+def synthetic_map(num_ships, my_id=0, num_players=2, num_planets=28, width=240, height=160, seed=0):
+    """
+    Generate and parse a synthetic map. See synthetic_map_string.
+
+    :return: The parsed map
+    :rtype: Map
+    """
+    game_map = Map(my_id, width, height)
+    game_map._parse(synthetic_map_string(num_ships, num_players, num_planets, width, height, seed))
+    return game_map
+
+
+def synthetic_replay(num_frames, num_ships, num_players=2, num_planets=28, width=240, height=160, seed=0):
+    """
+    Generate a replay in the format written by the Halite engine, restricted to the fields the training code reads.
+    Every player keeps about num_ships / num_players ships, which wander randomly and give random orders.
+
+    :param int num_frames: Number of frames
+    :param int num_ships: Total number of ships in every frame
+    :param int num_players: Number of players
+    :param int num_planets: Number of planets
+    :param int width: Map width
+    :param int height: Map height
+    :param int seed: Random seed
+    :return: The replay, as decoded from json
+    :rtype: dict
+    """
+    rng = random.Random(seed)
+    game_map = synthetic_map(num_ships, num_players=num_players, num_planets=num_planets,
+                             width=width, height=height, seed=seed)
+
+    planets = [{"id": planet.id, "x": planet.x, "y": planet.y, "r": planet.radius,
+                "docking_spots": planet.num_docking_spots} for planet in game_map.all_planets()]
+    ships = {str(player.id): {str(ship.id): {"id": ship.id, "x": ship.x, "y": ship.y, "health": ship.health}
+                              for ship in player.all_ships()}
+             for player in game_map.all_players()}
+
+    frames = []
+    moves = []
+    for _ in range(num_frames):
+        frame_planets = {}
+        for planet in game_map.all_planets():
+            owner = planet.owner.id if planet.owner is not None else None
+            frame_planets[str(planet.id)] = {
+                "id": planet.id, "health": planet.health, "owner": owner,
+                "docked_ships": [ship.id for ship in planet.all_docked_ships()],
+                "remaining_production": planet.remaining_resources,
+                "current_production": planet.current_production}
+        frames.append({"ships": {player_id: {ship_id: dict(ship) for ship_id, ship in player_ships.items()}
+                                 for player_id, player_ships in ships.items()},
+                       "planets": frame_planets})
+
+        frame_moves = {}
+        for player_id, player_ships in ships.items():
+            player_moves = {}
+            for ship_id, ship in player_ships.items():
+                if rng.random() < 0.1:
+                    player_moves[ship_id] = {"type": "dock", "shipId": ship["id"],
+                                             "planet_id": rng.randrange(num_planets)}
+                else:
+                    angle = rng.randrange(360)
+                    player_moves[ship_id] = {"type": "thrust", "shipId": ship["id"], "angle": angle,
+                                             "magnitude": constants.MAX_SPEED}
+                    ship["x"] = min(max(ship["x"] + 2 * math.cos(math.radians(angle)), 0.5), width - 0.5)
+                    ship["y"] = min(max(ship["y"] + 2 * math.sin(math.radians(angle)), 0.5), height - 0.5)
+            frame_moves[player_id] = [player_moves]
+        moves.append(frame_moves)
+
+    ranks = list(range(1, num_players + 1))
+    rng.shuffle(ranks)
+    return {"width": width, "height": height, "planets": planets, "frames": frames, "moves": moves,
+            "player_names": ["player{}".format(player_id) for player_id in range(num_players)],
+            "stats": {str(player_id): {"rank": rank} for player_id, rank in enumerate(ranks)}}
@@ -0,0 +1,56 @@
+"""
+Compare the batched target-planet inference of the replay parser against the per-move loop of find_target_planet.
+
+Run from the repository root:
+    python -m benchmarks.target_planet_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from tsmlstarterbot import parsing
+from tsmlstarterbot.replay import CompactReplay
+from benchmarks.synthetic import synthetic_replay
+
+SHIP_COUNTS = (50, 200, 600)
+FRAMES = 50
+REPEATS = 3
+
+
+def main():
+    print("{:>6} {:>8} {:>12} {:>12} {:>8}".format("ships", "moves", "loop, ms", "batched, ms", "speedup"))
+    for num_ships in SHIP_COUNTS:
+        replay = synthetic_replay(FRAMES, num_ships, num_players=2, seed=num_ships)
+        compact = CompactReplay.from_json(replay)
+
+        # Every move of every player, in the order of the compact replay
+        moves = [(frame, player_id, move) for frame, frame_moves in enumerate(replay['moves'])
+                 for player_id, player_moves in frame_moves.items() for move in player_moves[0].values()]
+        move_frames = np.repeat(np.arange(len(replay['moves'])), np.diff(compact.move_offsets))
+        ship_rows = {(frame, ship_id): row for frame in range(compact.num_frames)
+                     for row, ship_id in zip(range(compact.ship_offsets[frame], compact.ship_offsets[frame + 1]),
+                                             compact.ship_id[compact.ship_offsets[frame]:
+                                                             compact.ship_offsets[frame + 1]].tolist())}
+        ships = np.array([ship_rows[frame, ship_id]
+                          for frame, ship_id in zip(move_frames.tolist(), compact.move_ship_id.tolist())])
+
+        def loop():
+            return [parsing.find_target_planet(player_id, replay['frames'][frame], replay['planets'], move)
+                    for frame, player_id, move in moves]
+
+        def batched():
+            return parsing._find_compact_target_planets(compact, move_frames, np.arange(len(moves)), ships)
+
+        targets, is_dock = batched()
+        assert loop() == [target if dock or target < 0 else str(target)
+                          for target, dock in zip(targets.tolist(), is_dock.tolist())], \
+            "Batched targets differ from the loop for {} ships".format(num_ships)
+
+        loop_time = min(timeit.repeat(loop, number=1, repeat=REPEATS))
+        batched_time = min(timeit.repeat(batched, number=1, repeat=REPEATS))
+        print("{:>6} {:>8} {:>12.1f} {:>12.1f} {:>7.1f}x".format(num_ships, len(moves), loop_time * 1000,
+                                                                batched_time * 1000, loop_time / batched_time))
+
+
+if __name__ == "__main__":
+    main()
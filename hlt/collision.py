@@ -1,4 +1,6 @@
-from .entity import Position, Entity
+import math
+
+import numpy as np
 
 
 def intersect_segment_circle(start, end, circle, *, fudge=0.5):
@@ -35,6 +37,67 @@ def intersect_segment_circle(start, end, circle, *, fudge=0.5):
 
     closest_x = start.x + dx * t
     closest_y = start.y + dy * t
-    closest_distance = Position(closest_x, closest_y).calculate_distance_between(circle)
+    closest_distance = math.sqrt((circle.x - closest_x) ** 2 + (circle.y - closest_y) ** 2)
 
     return closest_distance <= circle.radius + fudge
+
+
+def _square(x):
+    """
+    x ** 2 of the scalar code, rounded the same way: np.float_power goes through pow, as float.__pow__ does, while
+    numpy's own ** 2 multiplies x by itself.
+    """
+    return np.float_power(x, 2)
+
+
+def intersect_segments_circles(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, *, fudge=0.5):
+    """
+    Vectorized intersect_segment_circle: test every segment against every circle. Gives exactly the same answers
+    as the scalar function, evaluated pair by pair.
+    :param start_x: The x-coordinates of the segments starts, shape (N,) (or a scalar for a single segment)
+    :param start_y: The y-coordinates of the segments starts, shape (N,)
+    :param end_x: The x-coordinates of the segments ends, shape (N,)
+    :param end_y: The y-coordinates of the segments ends, shape (N,)
+    :param circle_x: The x-coordinates of the circles centers, shape (M,)
+    :param circle_y: The y-coordinates of the circles centers, shape (M,)
+    :param circle_radius: The radii of the circles, shape (M,)
+    :param float fudge: A fudge factor; additional distance to leave between the segments and circles.
+    :return: Mask of shape (N, M), True where the segment intersects the circle. Shape (M,) for a single segment.
+    :rtype: np.ndarray
+    """
+    # Segments along the first axis, circles along the second one
+    start_x = np.asarray(start_x, dtype=float)[..., np.newaxis]
+    start_y = np.asarray(start_y, dtype=float)[..., np.newaxis]
+    end_x = np.asarray(end_x, dtype=float)[..., np.newaxis]
+    end_y = np.asarray(end_y, dtype=float)[..., np.newaxis]
+
+    # Same expressions, in the same order, as in intersect_segment_circle
+    dx = end_x - start_x
+    dy = end_y - start_y
+
+    a = _square(dx) + _square(dy)
+    b = -2 * (_square(start_x) - start_x*end_x - start_x*circle_x + end_x*circle_x +
+              _square(start_y) - start_y*end_y - start_y*circle_y + end_y*circle_y)
+
+    # Time along segment when closest to the circle; the degenerate segments are handled separately below
+    t = np.minimum(-b / np.where(a == 0.0, 1.0, 2 * a), 1.0)
+
+    closest_x = start_x + dx * t
+    closest_y = start_y + dy * t
+    closest_distance = np.sqrt(_square(circle_x - closest_x) + _square(circle_y - closest_y))
+    intersects = (t >= 0) & (closest_distance <= circle_radius + fudge)
+
+    # Start and end are the same point
+    start_distance = np.sqrt(_square(circle_x - start_x) + _square(circle_y - start_y))
+    return np.where(a == 0.0, start_distance <= circle_radius + fudge, intersects)
+
+
+def first_intersections(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, *, fudge=0.5):
+    """
+    Find the first circle (in the given order) that each segment intersects. See intersect_segments_circles.
+    :return: For each segment, the index of the first intersecting circle, or -1 if there is none
+    :rtype: np.ndarray
+    """
+    mask = np.atleast_2d(intersect_segments_circles(start_x, start_y, end_x, end_y,
+                                                    circle_x, circle_y, circle_radius, fudge=fudge))
+    return np.where(mask.any(axis=-1), mask.argmax(axis=-1), -1)
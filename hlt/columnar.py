@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class MapSnapshot:
+    """
+    Columnar representation of a single turn of the game. Every attribute of every ship and planet is stored in a
+    contiguous numpy array, in the order in which the Halite engine sent them (ships grouped by player).
+
+    :ivar player_ids: The ids of all players
+    :ivar ship_id: The ship ids
+    :ivar ship_owner: The id of the player owning each ship
+    :ivar ship_x: The ships x-coordinates
+    :ivar ship_y: The ships y-coordinates
+    :ivar ship_health: The ships health
+    :ivar ship_vel_x: The ships x-velocities
+    :ivar ship_vel_y: The ships y-velocities
+    :ivar ship_docking_status: The ships docking status (values of entity.Ship.DockingStatus)
+    :ivar ship_planet: The id of the planet each ship is docked to (meaningless for undocked ships)
+    :ivar ship_docking_progress: The ships docking progress
+    :ivar ship_cooldown: The ships weapon cooldown
+    :ivar planet_id: The planet ids
+    :ivar planet_x: The planets x-coordinates
+    :ivar planet_y: The planets y-coordinates
+    :ivar planet_health: The planets health
+    :ivar planet_radius: The planets radius
+    :ivar planet_docking_spots: The max number of ships that can be docked to each planet
+    :ivar planet_current_production: The current production of each planet
+    :ivar planet_remaining_resources: The remaining production capacity of each planet
+    :ivar planet_owned: Whether each planet is owned
+    :ivar planet_owner: The id of the player owning each planet (meaningless for planets that are not owned)
+    :ivar planet_num_docked: The number of ships docked to each planet
+    :ivar planet_docked_ships: The ids of the docked ships of all planets, concatenated
+    :ivar planet_docked_offsets: Planet i's docked ships are planet_docked_ships[offsets[i]:offsets[i + 1]]
+    """
+    SHIP_FIELDS = 10
+    PLANET_FIELDS = 11
+
+    def __init__(self, player_ids, ships, planets, docked_ships, docked_offsets):
+        """
+        :param list[int] player_ids: The ids of all players
+        :param np.ndarray ships: Ship fields as sent by the engine, with the owner prepended, shape (ships, 11)
+        :param np.ndarray planets: Planet fields as sent by the engine, without docked ships, shape (planets, 11)
+        :param np.ndarray docked_ships: The ids of the docked ships of all planets, concatenated
+        :param np.ndarray docked_offsets: Offsets of every planet's docked ships in docked_ships
+        """
+        self.player_ids = np.array(player_ids, dtype=int)
+
+        self.ship_owner = ships[:, 0].astype(int)
+        self.ship_id = ships[:, 1].astype(int)
+        self.ship_x = ships[:, 2]
+        self.ship_y = ships[:, 3]
+        self.ship_health = ships[:, 4].astype(int)
+        self.ship_vel_x = ships[:, 5]
+        self.ship_vel_y = ships[:, 6]
+        self.ship_docking_status = ships[:, 7].astype(int)
+        self.ship_planet = ships[:, 8].astype(int)
+        self.ship_docking_progress = ships[:, 9].astype(int)
+        self.ship_cooldown = ships[:, 10].astype(int)
+
+        self.planet_id = planets[:, 0].astype(int)
+        self.planet_x = planets[:, 1]
+        self.planet_y = planets[:, 2]
+        self.planet_health = planets[:, 3].astype(int)
+        self.planet_radius = planets[:, 4]
+        self.planet_docking_spots = planets[:, 5].astype(int)
+        self.planet_current_production = planets[:, 6].astype(int)
+        self.planet_remaining_resources = planets[:, 7].astype(int)
+        self.planet_owned = planets[:, 8].astype(bool)
+        self.planet_owner = planets[:, 9].astype(int)
+        self.planet_num_docked = planets[:, 10].astype(int)
+        self.planet_docked_ships = docked_ships
+        self.planet_docked_offsets = docked_offsets
+
+    def ships_of(self, player_id):
+        """
+        :param int player_id: The id of the player
+        :return: Boolean mask selecting the ships owned by the player
+        :rtype: np.ndarray
+        """
+        return self.ship_owner == player_id
+
+    def docked_ships_of(self, planet_index):
+        """
+        :param int planet_index: The position of the planet in the planet arrays (not its id)
+        :return: The ids of the ships docked to the planet
+        :rtype: np.ndarray
+        """
+        return self.planet_docked_ships[self.planet_docked_offsets[planet_index]:
+                                        self.planet_docked_offsets[planet_index + 1]]
+
+    @staticmethod
+    def _parse(tokens):
+        """
+        Parse the tokenized map description from the game straight into arrays. Ship records have a fixed size, so
+        every player's ships are converted in bulk; only planets (with their variable-length docked ship lists) are
+        walked one by one.
+        :param list[str] tokens: The tokenized input
+        :return: The snapshot
+        :rtype: MapSnapshot
+        """
+        index = 0
+        num_players = int(tokens[index])
+        index += 1
+
+        player_ids = []
+        ship_owners = []
+        ship_tokens = []
+        for _ in range(num_players):
+            player_id, num_ships = int(tokens[index]), int(tokens[index + 1])
+            index += 2
+            end = index + num_ships * MapSnapshot.SHIP_FIELDS
+            player_ids.append(player_id)
+            ship_owners.extend([player_id] * num_ships)
+            ship_tokens.extend(tokens[index:end])
+            index = end
+
+        ships = np.empty((len(ship_owners), MapSnapshot.SHIP_FIELDS + 1))
+        ships[:, 0] = ship_owners
+        ships[:, 1:] = np.array(ship_tokens, dtype=float).reshape((-1, MapSnapshot.SHIP_FIELDS))
+
+        num_planets = int(tokens[index])
+        index += 1
+
+        planet_tokens = []
+        docked_tokens = []
+        docked_offsets = [0]
+        for _ in range(num_planets):
+            end = index + MapSnapshot.PLANET_FIELDS
+            planet_tokens.extend(tokens[index:end])
+            num_docked = int(tokens[end - 1])
+            docked_tokens.extend(tokens[end:end + num_docked])
+            docked_offsets.append(len(docked_tokens))
+            index = end + num_docked
+
+        assert index == len(tokens)  # There should be no remaining tokens at this point
+
+        planets = np.array(planet_tokens, dtype=float).reshape((-1, MapSnapshot.PLANET_FIELDS))
+        return MapSnapshot(player_ids, ships, planets,
+                           np.array(docked_tokens, dtype=int), np.array(docked_offsets, dtype=int))
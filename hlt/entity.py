@@ -1,6 +1,9 @@
 import abc
 import math
 from enum import Enum
+
+import numpy as np
+
 from . import constants
 
 
@@ -18,6 +21,9 @@ class Entity:
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
     """
     __metaclass__ = abc.ABCMeta
+    # Entities are created by the thousand every turn: without a __dict__ they take less memory. Creating them and
+    # reading their attributes is no faster than with the inline instance dicts of Python 3.11.
+    __slots__ = ('x', 'y', 'radius', 'health', 'owner', 'id')
 
     def __init__(self, x, y, radius, health, player, entity_id):
         self.x = x
@@ -90,6 +96,8 @@ class Planet(Entity):
     :ivar health: The planet's health.
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
     """
+    __slots__ = ('num_docking_spots', 'current_production', 'remaining_resources', '_docked_ship_ids',
+                 '_docked_ships', 'ratio_health', 'num_docked', 'ratio_docked')
 
     def __init__(self, planet_id, x, y, hp, radius, docking_spots, current,
                  remaining, owned, owner, docked_ships):
@@ -156,21 +164,21 @@ class Planet(Entity):
                 self._docked_ships[ship] = self.owner.get_ship(ship)
 
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, index):
         """
         Parse a single planet given tokenized input from the game environment.
-        :return: The planet ID, planet object, and unused tokens.
-        :rtype: (int, Planet, list[str])
+        :param list[str] tokens: The tokenized input
+        :param int index: The position of the planet's first token
+        :return: The planet ID, planet object, and the position of the next token.
+        :rtype: (int, Planet, int)
         """
         (plid, x, y, hp, r, docking, current, remaining,
-         owned, owner, num_docked_ships, *remainder) = tokens
+         owned, owner, num_docked_ships) = tokens[index:index + 11]
+        index += 11
 
         plid = int(plid)
-        docked_ships = []
-
-        for _ in range(int(num_docked_ships)):
-            ship_id, *remainder = remainder
-            docked_ships.append(int(ship_id))
+        end = index + int(num_docked_ships)
+        docked_ships = [int(ship_id) for ship_id in tokens[index:end]]
 
         planet = Planet(int(plid),
                         float(x), float(y),
@@ -179,25 +187,61 @@ class Planet(Entity):
                         bool(int(owned)), int(owner),
                         docked_ships)
 
-        return plid, planet, remainder
+        return plid, planet, end
+
+    def _update(self, tokens, index):
+        """
+        Update the planet in place from its record in the tokenized input of a new turn. The position, radius and
+        docking spots never change. Like _parse_single, the owner and docked ships are left as ids until _link.
+        :param list[str] tokens: The tokenized input
+        :param int index: The position of the planet's first token
+        :return: Whether any attribute of the planet changed, and the position of the next token.
+        :rtype: (bool, int)
+        """
+        (_, _, _, hp, _, _, current, remaining,
+         owned, owner, num_docked_ships) = tokens[index:index + 11]
+        index += 11
+
+        end = index + int(num_docked_ships)
+        docked_ships = [int(ship_id) for ship_id in tokens[index:end]]
+        hp, current, remaining = int(hp), int(current), int(remaining)
+        owner = int(owner) if bool(int(owned)) else None
+
+        previous_owner = self.owner.id if self.owner is not None else None
+        changed = (hp != self.health or current != self.current_production or remaining != self.remaining_resources or
+                   owner != previous_owner or docked_ships != self._docked_ship_ids)
+
+        self.health = hp
+        self.current_production = current
+        self.remaining_resources = remaining
+        self.owner = owner
+        self._docked_ship_ids = docked_ships
+        self._docked_ships = {}
+
+        self.ratio_health = self.health / (255.0 * self.radius)
+        self.num_docked = len(self._docked_ship_ids)
+        self.ratio_docked = self.num_docked / self.num_docking_spots
+
+        return changed, end
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, index):
         """
         Parse planet data given a tokenized input.
         :param list[str] tokens: The tokenized input
-        :return: the populated planet dict and the unused tokens.
-        :rtype: (dict, list[str])
+        :param int index: The position of the number of planets
+        :return: the populated planet dict and the position of the next token.
+        :rtype: (dict, int)
         """
-        num_planets, *remainder = tokens
-        num_planets = int(num_planets)
+        num_planets = int(tokens[index])
+        index += 1
         planets = {}
 
         for _ in range(num_planets):
-            plid, planet, remainder = Planet._parse_single(remainder)
+            plid, planet, index = Planet._parse_single(tokens, index)
             planets[plid] = planet
 
-        return planets, remainder
+        return planets, index
 
 
 class Ship(Entity):
@@ -211,8 +255,11 @@ class Ship(Entity):
     :ivar DockingStatus docking_status: The docking status (UNDOCKED, DOCKED, DOCKING, UNDOCKING)
     :ivar planet: The ID of the planet the ship is docked to, if applicable.
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
+    :ivar corrections_tried: The number of headings the last call of navigate checked, 1 if the direct path was free.
     """
 
+    __slots__ = ('docking_status', 'planet', '_docking_progress', '_weapon_cooldown', 'corrections_tried')
+
     class DockingStatus(Enum):
         UNDOCKED = 0
         DOCKING = 1
@@ -231,6 +278,7 @@ class Ship(Entity):
         self.planet = planet if (docking_status is not Ship.DockingStatus.UNDOCKED) else None
         self._docking_progress = progress
         self._weapon_cooldown = cooldown
+        self.corrections_tried = 0
 
     def thrust(self, magnitude, angle):
         """
@@ -282,18 +330,77 @@ class Ship(Entity):
         :rtype: str
         """
         # Assumes a position, not planet (as it would go to the center of the planet otherwise)
+        self.corrections_tried = 0
         if max_corrections <= 0:
             return None
         distance = self.calculate_distance_between(target)
         angle = self.calculate_angle_between(target)
+        self.corrections_tried = 1
         if avoid_obstacles and game_map.obstacles_between(self, target):
-            new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
-            new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
-            new_target = Position(self.x + new_target_dx, self.y + new_target_dy)
-            return self.navigate(new_target, game_map, speed, True, max_corrections - 1, angular_step)
+            blocked = self._blocked_corrections(game_map, distance, angle, max_corrections, angular_step)
+            for correction in range(1, max_corrections):
+                new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
+                new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
+                target = Position(self.x + new_target_dx, self.y + new_target_dy)
+                distance = self.calculate_distance_between(target)
+                angle = self.calculate_angle_between(target)
+                if not blocked[correction] and not game_map.obstacles_between(self, target):
+                    self.corrections_tried = correction + 1
+                    break
+            else:
+                self.corrections_tried = max_corrections
+                return None
         speed = speed if (distance >= speed) else distance
         return self.thrust(speed, angle)
 
+    def _blocked_corrections(self, game_map, distance, angle, max_corrections, angular_step):
+        """
+        Find the corrections navigate would certainly reject, without checking their paths one by one. Every obstacle
+        within reach blocks the headings less than some angle away from its bearing (the segment of the given length
+        passes within ship.radius + 0.1 of it); a correction is blocked if its heading falls inside any of those
+        intervals by more than a small tolerance. Headings near an interval boundary are left for the exact check.
+        :param game_map.Map game_map: The map of the game
+        :param float distance: The length of the path
+        :param float angle: The heading of the first correction, in degrees
+        :param int max_corrections: The number of corrections
+        :param int angular_step: The degree difference between consecutive corrections
+        :return: Whether each correction is certainly blocked. The first one never is, as it is checked by the caller.
+        :rtype: np.ndarray
+        """
+        blocked = np.zeros(max_corrections, dtype=bool)
+        entities, grid = game_map._obstacles()
+        if distance == 0 or not entities:
+            return blocked
+
+        dx = grid.x - self.x
+        dy = grid.y - self.y
+        obstacle_distance = np.sqrt(dx ** 2 + dy ** 2)
+        reach = grid.radius + self.radius + 0.1
+        nearby = obstacle_distance - reach <= distance
+        position = grid.position_of(self)
+        if position is not None:  # None if the ship is not on this map
+            nearby[position] = False
+        obstacle_distance, reach = obstacle_distance[nearby], reach[nearby]
+        bearing = np.degrees(np.arctan2(dy[nearby], dx[nearby]))
+
+        # A slightly shorter path blocks slightly narrower intervals, which keeps them on the safe side
+        length = distance * (1 - 1e-9)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # The path is tangent to the obstacle...
+            tangent = np.arcsin(np.minimum(reach / obstacle_distance, 1.0))
+            # ...or its end touches it.
+            end = np.arccos(np.clip((obstacle_distance ** 2 + length ** 2 - reach ** 2) /
+                                    (2 * obstacle_distance * length), -1.0, 1.0))
+            half_width = np.where(obstacle_distance <= reach, np.pi / 2,
+                                  np.where(np.sqrt(obstacle_distance ** 2 - reach ** 2) <= length, tangent, end))
+        half_width = np.degrees(half_width) - 1e-3
+
+        headings = angle + angular_step * np.arange(max_corrections)
+        offset = (headings[:, np.newaxis] - bearing[np.newaxis, :] + 180) % 360 - 180
+        blocked = (np.abs(offset) < half_width).any(axis=1)
+        blocked[0] = False
+        return blocked
+
     def can_dock(self, planet):
         """
         Determine whether a ship can dock to a planet
@@ -315,16 +422,17 @@ class Ship(Entity):
         self.planet = planets.get(self.planet)  # If not will just reset to none
 
     @staticmethod
-    def _parse_single(player_id, tokens):
+    def _parse_single(player_id, tokens, index):
         """
         Parse a single ship given tokenized input from the game environment.
         :param int player_id: The id of the player who controls the ships
-        :param list[tokens]: The remaining tokens
-        :return: The ship ID, ship object, and unused tokens.
-        :rtype: int, Ship, list[str]
+        :param list[str] tokens: The tokenized input
+        :param int index: The position of the ship's first token
+        :return: The ship ID, ship object, and the position of the next token.
+        :rtype: int, Ship, int
         """
         (sid, x, y, hp, vel_x, vel_y,
-         docked, docked_planet, progress, cooldown, *remainder) = tokens
+         docked, docked_planet, progress, cooldown) = tokens[index:index + 10]
 
         sid = int(sid)
         docked = Ship.DockingStatus(int(docked))
@@ -337,22 +445,58 @@ class Ship(Entity):
                     docked, int(docked_planet),
                     int(progress), int(cooldown))
 
-        return sid, ship, remainder
+        return sid, ship, index + 10
+
+    def _update(self, player_id, tokens, index):
+        """
+        Update the ship in place from its record in the tokenized input of a new turn. Like _parse_single, the owner
+        and planet are left as ids until _link.
+        :param int player_id: The id of the player who controls the ship
+        :param list[str] tokens: The tokenized input
+        :param int index: The position of the ship's first token
+        :return: Whether any attribute of the ship changed, and the position of the next token.
+        :rtype: (bool, int)
+        """
+        (_, x, y, hp, _, _,
+         docked, docked_planet, progress, cooldown) = tokens[index:index + 10]
+
+        x, y, hp = float(x), float(y), int(hp)
+        docked = Ship.DockingStatus(int(docked))
+        planet = int(docked_planet) if (docked is not Ship.DockingStatus.UNDOCKED) else None
+        progress, cooldown = int(progress), int(cooldown)
+
+        previous_planet = self.planet.id if self.planet is not None else None
+        changed = (x != self.x or y != self.y or hp != self.health or docked is not self.docking_status or
+                   planet != previous_planet or progress != self._docking_progress or
+                   cooldown != self._weapon_cooldown)
+
+        self.x = x
+        self.y = y
+        self.owner = player_id
+        self.health = hp
+        self.docking_status = docked
+        self.planet = planet
+        self._docking_progress = progress
+        self._weapon_cooldown = cooldown
+
+        return changed, index + 10
 
     @staticmethod
-    def _parse(player_id, tokens):
+    def _parse(player_id, tokens, index):
         """
         Parse ship data given a tokenized input.
         :param int player_id: The id of the player who owns the ships
         :param list[str] tokens: The tokenized input
-        :return: The dict of Players and unused tokens.
-        :rtype: (dict, list[str])
+        :param int index: The position of the number of ships
+        :return: The dict of Ships and the position of the next token.
+        :rtype: (dict, int)
         """
         ships = {}
-        num_ships, *remainder = tokens
-        for _ in range(int(num_ships)):
-            ship_id, ships[ship_id], remainder = Ship._parse_single(player_id, remainder)
-        return ships, remainder
+        num_ships = int(tokens[index])
+        index += 1
+        for _ in range(num_ships):
+            ship_id, ships[ship_id], index = Ship._parse_single(player_id, tokens, index)
+        return ships, index
 
 
 class Position(Entity):
@@ -367,6 +511,7 @@ class Position(Entity):
     :ivar health: Unused.
     :ivar owner: Unused.
     """
+    __slots__ = ()
 
     def __init__(self, x, y):
         self.x = x
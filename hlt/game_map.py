@@ -1,6 +1,8 @@
 from hlt.entity import Position, Entity
 from typing import List
 from . import collision, entity
+from .columnar import MapSnapshot
+from .spatial import SpatialGrid
 from hlt.structs import Struct
 import numpy as np
 
@@ -11,20 +13,60 @@ class Map:
     :ivar my_id: Current player id associated with the map
     :ivar width: Map width
     :ivar height: Map height
+    :ivar columnar: Whether the map is parsed into a columnar snapshot
+    :ivar snapshot: The columnar snapshot of the current turn (columnar maps only)
+    :ivar incremental: Whether the objects of the previous turn are updated in place rather than created again
+    :ivar added_ships: Ids of the ships which appeared this turn (incremental maps only, None otherwise)
+    :ivar removed_ships: Ids of the ships of the previous turn which are gone (incremental maps only)
+    :ivar changed_ships: Ids of the ships of the previous turn with any attribute changed (incremental maps only)
+    :ivar removed_planets: Ids of the planets of the previous turn which are gone (incremental maps only)
+    :ivar changed_planets: Ids of the planets of the previous turn with any attribute changed (incremental maps only)
     """
+    # Below this many candidates, testing them one by one is faster than the vectorized collision kernel
+    VECTORIZED_COLLISION_THRESHOLD = 10
 
-    def __init__(self, my_id, width, height):
+    def __init__(self, my_id, width, height, columnar=False, incremental=False):
         """
         :param my_id: User's id (tag)
         :param width: Map width
         :param height: Map height
-        """
+        :param columnar: If True, every turn is parsed into a MapSnapshot of numpy arrays, and the Player, Ship and
+        Planet objects are only created once something asks for them.
+        :param incremental: If True, the Player, Planet and Ship objects of the previous turn are updated in place, only
+        the ships which appeared being created, and the ids of what changed are kept in added_ships, removed_ships,
+        changed_ships, removed_planets and changed_planets. Objects of a previous turn then hold the current state.
+        """
+        if columnar and incremental:
+            raise ValueError("A map can't be both columnar and incremental")
         self.my_id = my_id
         self.width = width
         self.height = height
         self.area = width * height
-        self._players = {}
-        self._planets = {}
+        self.columnar = columnar
+        self.snapshot = None
+        self.incremental = incremental
+        self.added_ships = None
+        self.removed_ships = None
+        self.changed_ships = None
+        self.removed_planets = None
+        self.changed_planets = None
+        self._player_objects = {}
+        self._planet_objects = {}
+        self._ship_objects = {}
+        self._materialized = True
+        self._obstacle_index = None
+
+    @property
+    def _players(self):
+        if not self._materialized:
+            self._materialize()
+        return self._player_objects
+
+    @property
+    def _planets(self):
+        if not self._materialized:
+            self._materialize()
+        return self._planet_objects
 
     def get_me(self):
         """
@@ -142,11 +184,122 @@ class Map:
         :return: nothing
         """
         tokens = map_string.split()
+        self._obstacle_index = None
+
+        if self.columnar:
+            self.snapshot = MapSnapshot._parse(tokens)
+            self._materialized = False
+            return
+
+        if self.incremental:
+            self._update(tokens)
+            return
 
-        self._players, tokens = Player._parse(tokens)
-        self._planets, tokens = entity.Planet._parse(tokens)
+        # The parsers walk an index over the tokens rather than slicing off the remaining ones, which would copy the
+        # rest of the list for every entity
+        self._player_objects, index = Player._parse(tokens, 0)
+        self._planet_objects, index = entity.Planet._parse(tokens, index)
 
-        assert(len(tokens) == 0)  # There should be no remaining tokens at this point
+        assert(index == len(tokens))  # There should be no remaining tokens at this point
+        self._link()
+
+    def _update(self, tokens):
+        """
+        Parse the tokenized map description of a new turn into the objects of the previous turn, and record which
+        entities were added, removed or changed.
+        :param list[str] tokens: The tokenized input
+        :return: nothing
+        """
+        ships = {}
+        added_ships, changed_ships = set(), set()
+        players = {}
+
+        index = 0
+        num_players = int(tokens[index])
+        index += 1
+        for _ in range(num_players):
+            player_id, num_ships = int(tokens[index]), int(tokens[index + 1])
+            index += 2
+            player_ships = {}
+            for _ in range(num_ships):
+                ship_id = int(tokens[index])
+                ship = self._ship_objects.get(ship_id)
+                if ship is None:
+                    ship_id, ship, index = entity.Ship._parse_single(player_id, tokens, index)
+                    added_ships.add(ship_id)
+                else:
+                    changed, index = ship._update(player_id, tokens, index)
+                    if changed:
+                        changed_ships.add(ship_id)
+                player_ships[ship_id] = ship
+                ships[ship_id] = ship
+
+            player = self._player_objects.get(player_id)
+            if player is None:
+                player = Player(player_id)
+            player._ships = player_ships
+            players[player_id] = player
+
+        planets = {}
+        changed_planets = set()
+        num_planets = int(tokens[index])
+        index += 1
+        for _ in range(num_planets):
+            planet_id = int(tokens[index])
+            planet = self._planet_objects.get(planet_id)
+            if planet is None:
+                planet_id, planet, index = entity.Planet._parse_single(tokens, index)
+            else:
+                changed, index = planet._update(tokens, index)
+                if changed:
+                    changed_planets.add(planet_id)
+            planets[planet_id] = planet
+
+        assert(index == len(tokens))  # There should be no remaining tokens at this point
+
+        self.added_ships = added_ships
+        self.removed_ships = self._ship_objects.keys() - ships.keys()
+        self.changed_ships = changed_ships
+        self.removed_planets = self._planet_objects.keys() - planets.keys()
+        self.changed_planets = changed_planets
+        self._player_objects = players
+        self._planet_objects = planets
+        self._ship_objects = ships
+        self._link()
+
+    def _materialize(self):
+        """
+        Create the Player, Ship and Planet objects of the current turn from the columnar snapshot.
+        :return: nothing
+        """
+        snapshot = self.snapshot
+        ships_columns = zip(snapshot.ship_owner.tolist(), snapshot.ship_id.tolist(),
+                            snapshot.ship_x.tolist(), snapshot.ship_y.tolist(),
+                            snapshot.ship_health.tolist(),
+                            snapshot.ship_vel_x.tolist(), snapshot.ship_vel_y.tolist(),
+                            snapshot.ship_docking_status.tolist(), snapshot.ship_planet.tolist(),
+                            snapshot.ship_docking_progress.tolist(), snapshot.ship_cooldown.tolist())
+
+        ships = {player_id: {} for player_id in snapshot.player_ids.tolist()}
+        for owner, sid, x, y, hp, vel_x, vel_y, docked, planet, progress, cooldown in ships_columns:
+            ships[owner][sid] = entity.Ship(owner, sid, x, y, hp, vel_x, vel_y,
+                                            entity.Ship.DockingStatus(docked), planet, progress, cooldown)
+        self._player_objects = {player_id: Player(player_id, player_ships)
+                                for player_id, player_ships in ships.items()}
+
+        planets_columns = zip(snapshot.planet_id.tolist(),
+                              snapshot.planet_x.tolist(), snapshot.planet_y.tolist(),
+                              snapshot.planet_health.tolist(), snapshot.planet_radius.tolist(),
+                              snapshot.planet_docking_spots.tolist(),
+                              snapshot.planet_current_production.tolist(),
+                              snapshot.planet_remaining_resources.tolist(),
+                              snapshot.planet_owned.tolist(), snapshot.planet_owner.tolist())
+        self._planet_objects = {}
+        for index, (plid, x, y, hp, r, docking, current, remaining, owned, owner) in enumerate(planets_columns):
+            self._planet_objects[plid] = entity.Planet(plid, x, y, hp, r, docking, current, remaining, owned, owner,
+                                                       snapshot.docked_ships_of(index).tolist())
+
+        self._materialized = True
         self._link()
 
     def _all_ships(self):
@@ -160,6 +313,18 @@ class Map:
             all_ships.extend(player.all_ships())
         return all_ships
 
+    def _obstacles(self):
+        """
+        All planets and ships of the current turn, with a spatial index over them. Built on first use after every
+        _parse and shared by all the queries made during the turn.
+        :return: The list of planets followed by all ships, and the grid indexing that list
+        :rtype: (list[entity.Entity], SpatialGrid)
+        """
+        if self._obstacle_index is None:
+            entities = self.all_planets() + self._all_ships()
+            self._obstacle_index = (entities, SpatialGrid(entities))
+        return self._obstacle_index
+
     def _intersects_entity(self, target):
         """
         Check if the specified entity (x, y, r) intersects any planets. Entity is assumed to not be a planet.
@@ -167,7 +332,12 @@ class Map:
         :return: The colliding entity if so, else None.
         :rtype: entity.Entity
         """
-        for celestial_object in self._all_ships() + self.all_planets():
+        entities, grid = self._obstacles()
+        num_planets = len(self._planets)
+        # Ships are checked before planets
+        candidates = sorted(grid.segment_candidates(target, target, target.radius + 0.1),
+                            key=lambda index: (index < num_planets, index))
+        for celestial_object in (entities[index] for index in candidates):
             if celestial_object is target:
                 continue
             d = celestial_object.calculate_distance_between(target)
@@ -183,13 +353,21 @@ class Map:
         :return: The list of obstacles between the ship and target
         :rtype: list[entity.Entity]
         """
-        obstacles = []
-        for foreign_entity in self.all_planets() + self._all_ships():
-            if foreign_entity == ship or foreign_entity == target:
-                continue
-            if collision.intersect_segment_circle(ship, target, foreign_entity, fudge=ship.radius + 0.1):
-                obstacles.append(foreign_entity)
-        return obstacles
+        entities, grid = self._obstacles()
+        fudge = ship.radius + 0.1
+        candidates = grid.segment_candidates(ship, target, fudge)
+        if len(candidates) > Map.VECTORIZED_COLLISION_THRESHOLD:
+            candidates = np.array(candidates, dtype=int)
+            hits = collision.intersect_segments_circles(ship.x, ship.y, target.x, target.y,
+                                                        grid.x[candidates], grid.y[candidates],
+                                                        grid.radius[candidates], fudge=fudge)
+            hit_entities = [entities[index] for index in candidates[hits]]
+        else:
+            hit_entities = [entities[index] for index in candidates
+                            if collision.intersect_segment_circle(ship, target, entities[index], fudge=fudge)]
+
+        return [foreign_entity for foreign_entity in hit_entities
+                if not (foreign_entity == ship or foreign_entity == target)]
 
 
 class Player:
@@ -223,35 +401,36 @@ class Player:
         return self._ships.get(ship_id)
 
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, index):
         """
         Parse one user given an input string from the Halite engine.
         :param list[str] tokens: The input string as a list of str from the Halite engine.
-        :return: The parsed player id, player object, and remaining tokens
-        :rtype: (int, Player, list[str])
+        :param int index: The position of the player's first token
+        :return: The parsed player id, player object, and the position of the next token
+        :rtype: (int, Player, int)
         """
-        player_id, *remainder = tokens
-        player_id = int(player_id)
-        ships, remainder = entity.Ship._parse(player_id, remainder)
+        player_id = int(tokens[index])
+        ships, index = entity.Ship._parse(player_id, tokens, index + 1)
         player = Player(player_id, ships)
-        return player_id, player, remainder
+        return player_id, player, index
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, index):
         """
         Parse an entire user input string from the Halite engine for all users.
         :param list[str] tokens: The input string as a list of str from the Halite engine.
-        :return: The parsed players in the form of player dict, and remaining tokens
-        :rtype: (dict, list[str])
+        :param int index: The position of the number of players
+        :return: The parsed players in the form of player dict, and the position of the next token
+        :rtype: (dict, int)
         """
-        num_players, *remainder = tokens
-        num_players = int(num_players)
+        num_players = int(tokens[index])
+        index += 1
         players = {}
 
         for _ in range(num_players):
-            player, players[player], remainder = Player._parse_single(remainder)
+            player, players[player], index = Player._parse_single(tokens, index)
 
-        return players, remainder
+        return players, index
 
     def __str__(self):
         return "Player {} with ships {}".format(self.id, self.all_ships())
@@ -1,4 +1,5 @@
 import sys
+import time
 import logging
 import copy
 
@@ -9,6 +10,7 @@ class Game:
     """
     :ivar map: Current map representation
     :ivar initial_map: The initial version of the map before game starts
+    :ivar turn_start_time: Time (in seconds since the Epoch) at which the map of the current turn was received
     """
     @staticmethod
     def _send_string(s):
@@ -68,18 +70,20 @@ class Game:
         logging.basicConfig(filename=log_file, level=logging.ERROR, filemode='w')
         logging.info("Initialized bot {}".format(name))
 
-    def __init__(self, name):
+    def __init__(self, name, columnar=False, incremental=False):
         """
         Initialize the bot with the given name.
 
         :param name: The name of the bot.
+        :param columnar: Whether to parse the map into a columnar snapshot (see game_map.Map).
+        :param incremental: Whether to update the objects of the map in place every turn (see game_map.Map).
         """
         self._name = name
         self._send_name = False
         tag = int(self._get_string())
         Game._set_up_logging(tag, name)
         width, height = [int(x) for x in self._get_string().strip().split()]
-        self.map = game_map.Map(tag, width, height)
+        self.map = game_map.Map(tag, width, height, columnar=columnar, incremental=incremental)
         self.update_map()
         self.initial_map = copy.deepcopy(self.map)
         self._send_name = True
@@ -96,5 +100,7 @@ class Game:
             self._done_sending()
             self._send_name = False
         logging.info("---NEW TURN---")
-        self.map._parse(self._get_string())
+        map_string = self._get_string()
+        self.turn_start_time = time.time()
+        self.map._parse(map_string)
         return self.map
@@ -0,0 +1,89 @@
+import math
+
+import numpy as np
+
+from . import constants
+
+
+class SpatialGrid:
+    """
+    Uniform grid over the entities of one turn, used to find the few entities a segment can possibly touch without
+    testing every entity on the map.
+
+    Every entity is registered in all the cells overlapped by its bounding box, grown by margin. A query for a segment
+    with a fudge of at most margin then only has to look at the cells the segment itself passes through.
+
+    :ivar cell_size: The side of a grid cell
+    :ivar margin: The largest fudge a query may use
+    :ivar x: The x-coordinates of the indexed entities
+    :ivar y: The y-coordinates of the indexed entities
+    :ivar radius: The radii of the indexed entities
+    """
+
+    def __init__(self, entities, cell_size=8.0, margin=constants.SHIP_RADIUS + 0.1):
+        """
+        :param list[entity.Entity] entities: The entities to index. Query results are positions in this list.
+        :param float cell_size: The side of a grid cell
+        :param float margin: The largest fudge a query may use
+        """
+        self.cell_size = cell_size
+        self.margin = margin
+        self._num_entities = len(entities)
+        self.x = np.array([entity.x for entity in entities], dtype=float)
+        self.y = np.array([entity.y for entity in entities], dtype=float)
+        self.radius = np.array([entity.radius for entity in entities], dtype=float)
+        self._cells = {}
+        # Keyed by id(), the entities being kept alive by _entities so that ids can't be reused
+        self._entities = entities
+        self._positions = {}
+        for index, entity in enumerate(entities):
+            self._positions[id(entity)] = index
+            reach = entity.radius + margin
+            for cell_x in range(self._cell(entity.x - reach), self._cell(entity.x + reach) + 1):
+                for cell_y in range(self._cell(entity.y - reach), self._cell(entity.y + reach) + 1):
+                    self._cells.setdefault((cell_x, cell_y), []).append(index)
+
+    def position_of(self, entity):
+        """
+        :param entity.Entity entity: An entity
+        :return: The position of the entity in the indexed list, None if it isn't indexed
+        :rtype: int
+        """
+        return self._positions.get(id(entity))
+
+    def _cell(self, coordinate):
+        return math.floor(coordinate / self.cell_size)
+
+    def segment_candidates(self, start, end, fudge):
+        """
+        Find the entities which may be within fudge of the segment between start and end (this is a superset of the
+        entities collision.intersect_segment_circle would report).
+        :param entity.Entity start: The start of the segment
+        :param entity.Entity end: The end of the segment
+        :param float fudge: The distance to leave between the segment and the entities
+        :return: Sorted positions of the candidate entities in the indexed list
+        :rtype: list[int]
+        """
+        if fudge > self.margin:
+            return list(range(self._num_entities))
+
+        x0, y0, x1, y1 = start.x, start.y, end.x, end.y
+        if x0 > x1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        # Guards against the rounding of the segment/column intersections
+        epsilon = 1e-9
+
+        candidates = set()
+        for cell_x in range(self._cell(x0), self._cell(x1) + 1):
+            if x1 == x0:
+                low, high = min(y0, y1), max(y0, y1)
+            else:
+                # The part of the segment inside this column of cells
+                t_in = (max(x0, cell_x * self.cell_size) - x0) / (x1 - x0)
+                t_out = (min(x1, (cell_x + 1) * self.cell_size) - x0) / (x1 - x0)
+                y_in, y_out = y0 + t_in * (y1 - y0), y0 + t_out * (y1 - y0)
+                low, high = min(y_in, y_out), max(y_in, y_out)
+            for cell_y in range(self._cell(low - epsilon), self._cell(high + epsilon) + 1):
+                candidates.update(self._cells.get((cell_x, cell_y), ()))
+
+        return sorted(candidates)
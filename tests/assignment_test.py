@@ -0,0 +1,110 @@
+import heapq
+import itertools
+import unittest
+
+import numpy as np
+
+from tsmlstarterbot.common import PLANET_MAX_NUM
+from tsmlstarterbot import assignment
+from benchmarks.synthetic import synthetic_map
+from benchmarks.assignment_benchmark import heap_assignment, solved_assignment
+
+SEED = 0
+
+
+def brute_force(distances, capacities):
+    """
+    Smallest total distance over all the assignments within the capacities.
+    """
+    num_ships, num_planets = distances.shape
+    return min(distances[np.arange(num_ships), planets].sum()
+               for planets in itertools.product(range(num_planets), repeat=num_ships)
+               if (np.bincount(planets, minlength=num_planets) <= capacities).all())
+
+
+def heap_greedy(distances, picks, ship_ids):
+    """
+    The greedy heaps the bot used: a heap of (distance, ship id) per planet, popping the ships already taken.
+    """
+    heaps = [sorted(zip(distances[:, planet].tolist(), ship_ids)) for planet in range(distances.shape[1])]
+    row_of_id = {ship_id: row for row, ship_id in enumerate(ship_ids)}
+    taken = set()
+    ships = []
+    for planet in picks:
+        _, ship_id = heapq.heappop(heaps[planet])
+        while ship_id in taken:
+            _, ship_id = heapq.heappop(heaps[planet])
+        taken.add(ship_id)
+        ships.append(row_of_id[ship_id])
+    return ships
+
+
+class TestAssignment(unittest.TestCase):
+    def test_greedy_ships(self):
+        rng = np.random.default_rng(SEED)
+        for case in range(100):
+            num_ships, num_planets = rng.integers(1, 60), rng.integers(1, 8)
+            # Few distinct distances, so that most of the choices are ties broken by the ship ids
+            distances = rng.integers(0, 3 if case % 2 else 50, (num_ships, num_planets)).astype(float)
+            ship_ids = rng.permutation(10 * num_ships)[:num_ships].tolist()
+            picks = rng.integers(0, num_planets, num_ships).tolist()
+            self.assertEqual(assignment.greedy_ships(distances, picks, ship_ids).tolist(),
+                             heap_greedy(distances, picks, ship_ids))
+        self.assertEqual(len(assignment.greedy_ships(distances, picks, ship_ids, deadline=0)), 1)
+
+    def test_optimal(self):
+        rng = np.random.default_rng(SEED)
+        for case in range(200):
+            num_ships, num_planets = rng.integers(1, 7), rng.integers(1, 4)
+            # Rounded distances give many ties
+            distances = np.round(rng.uniform(0, 10, (num_ships, num_planets)), 1 if case % 2 else 3)
+            capacities = rng.multinomial(num_ships, np.ones(num_planets) / num_planets)
+            capacities += rng.integers(0, 2, num_planets) if case % 3 == 0 else 0
+            expected = brute_force(distances, capacities)
+
+            planets = assignment.solve_optimal(distances, capacities)
+            self.assertTrue((np.bincount(planets, minlength=num_planets) <= capacities).all())
+            self.assertAlmostEqual(distances[np.arange(num_ships), planets].sum(), expected)
+
+            if capacities.sum() == num_ships:
+                picks = np.repeat(np.arange(num_planets), capacities)
+                improved, optimal = assignment.improve_assignment(distances, rng.permutation(picks))
+                self.assertTrue(optimal)
+                self.assertEqual(np.bincount(improved, minlength=num_planets).tolist(), capacities.tolist())
+                self.assertAlmostEqual(distances[np.arange(num_ships), improved].sum(), expected)
+
+    def test_modes_against_greedy_heaps(self):
+        rng = np.random.default_rng(SEED)
+        for num_ships in (10, 100, 300):
+            game_map = synthetic_map(2 * num_ships, num_players=2, seed=num_ships)
+            undocked_ships = [ship for ship in game_map.get_me().all_ships()
+                              if ship.docking_status == ship.DockingStatus.UNDOCKED]
+            predictions = rng.dirichlet(np.ones(PLANET_MAX_NUM))
+
+            def planets_of_ships(pairs):
+                return sorted((ship.id, planet.id) for ship, planet in pairs)
+
+            greedy = heap_assignment(game_map, undocked_ships, predictions)
+            # No improvement at all leaves the greedy assignment
+            self.assertEqual(planets_of_ships(solved_assignment(game_map, undocked_ships, predictions, exact=False,
+                                                                deadline=0)), planets_of_ships(greedy))
+
+            def total(pairs):
+                return sum(ship.calculate_distance_between(planet) for ship, planet in pairs)
+
+            optimal = solved_assignment(game_map, undocked_ships, predictions)
+            improved = solved_assignment(game_map, undocked_ships, predictions, exact=False)
+            self.assertLessEqual(total(optimal), total(greedy))
+            self.assertAlmostEqual(total(improved), total(optimal))
+
+    def test_distance_matrix(self):
+        game_map = synthetic_map(50, seed=SEED)
+        ships, planets = game_map._all_ships(), game_map.all_planets()
+        distances = assignment.distance_matrix([ship.x for ship in ships], [ship.y for ship in ships],
+                                               [planet.x for planet in planets], [planet.y for planet in planets])
+        self.assertEqual(distances.tolist(), [[ship.calculate_distance_between(planet) for planet in planets]
+                                              for ship in ships])
+
+
+if __name__ == "__main__":
+    unittest.main()
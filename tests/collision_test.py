@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from hlt import collision
+from hlt.entity import Position
+
+SEED = 0
+CASES = 200
+
+
+def random_scene(rng, num_segments, num_circles, grid):
+    """
+    Random segments and circles. Coordinates are snapped to a grid, so that degenerate segments, tangent circles
+    and circles right at the segment ends come up often.
+    """
+    def coordinates(size):
+        return np.round(rng.uniform(0, 20, size) / grid) * grid
+
+    start_x, start_y = coordinates(num_segments), coordinates(num_segments)
+    end_x, end_y = coordinates(num_segments), coordinates(num_segments)
+    # Some segments are single points
+    degenerate = rng.random(num_segments) < 0.2
+    end_x[degenerate], end_y[degenerate] = start_x[degenerate], start_y[degenerate]
+
+    circle_x, circle_y = coordinates(num_circles), coordinates(num_circles)
+    circle_radius = np.round(rng.uniform(0, 5, num_circles) / grid) * grid
+    return start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius
+
+
+def scalar_mask(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, fudge):
+    mask = np.zeros((len(start_x), len(circle_x)), dtype=bool)
+    for i in range(len(start_x)):
+        start, end = Position(start_x[i], start_y[i]), Position(end_x[i], end_y[i])
+        for j in range(len(circle_x)):
+            circle = Position(circle_x[j], circle_y[j])
+            circle.radius = circle_radius[j]
+            mask[i, j] = collision.intersect_segment_circle(start, end, circle, fudge=fudge)
+    return mask
+
+
+class TestCollision(unittest.TestCase):
+    def test_segments_circles_match_scalar(self):
+        rng = np.random.default_rng(SEED)
+        for _ in range(CASES):
+            scene = random_scene(rng, rng.integers(1, 8), rng.integers(1, 12), rng.choice([0.5, 0.25, 1e-3]))
+            fudge = rng.choice([0.0, 0.5, 0.6, rng.uniform(0, 2)])
+
+            expected = scalar_mask(*scene, fudge=fudge)
+            actual = collision.intersect_segments_circles(*scene, fudge=fudge)
+
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_single_segment(self):
+        rng = np.random.default_rng(SEED + 1)
+        for _ in range(CASES):
+            start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius = random_scene(
+                rng, 1, rng.integers(1, 12), 0.5)
+
+            expected = scalar_mask(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, 0.6)[0]
+            actual = collision.intersect_segments_circles(start_x[0], start_y[0], end_x[0], end_y[0],
+                                                          circle_x, circle_y, circle_radius, fudge=0.6)
+
+            self.assertEqual(actual.shape, circle_x.shape)
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_first_intersections(self):
+        rng = np.random.default_rng(SEED + 2)
+        for _ in range(CASES):
+            scene = random_scene(rng, rng.integers(1, 8), rng.integers(1, 12), 0.5)
+
+            mask = scalar_mask(*scene, fudge=0.5)
+            expected = [row.tolist().index(True) if row.any() else -1 for row in mask]
+            actual = collision.first_intersections(*scene, fudge=0.5)
+
+            self.assertEqual(expected, actual.tolist())
+
+    def test_edge_cases(self):
+        # Degenerate segment exactly at the fudged radius, circle behind the start, circle past the end,
+        # segment starting inside the circle
+        start_x, start_y = np.array([0.0, 0.0, 0.0, 0.0]), np.array([0.0, 0.0, 0.0, 0.0])
+        end_x, end_y = np.array([0.0, 10.0, 10.0, 10.0]), np.array([0.0, 0.0, 0.0, 0.0])
+        circle_x, circle_y = np.array([1.5, -2.0, 11.0, 0.5]), np.array([0.0, 0.0, 0.0, 0.0])
+        circle_radius = np.array([1.0, 1.0, 1.0, 1.0])
+
+        expected = scalar_mask(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, 0.5)
+        actual = collision.intersect_segments_circles(start_x, start_y, end_x, end_y,
+                                                      circle_x, circle_y, circle_radius, fudge=0.5)
+
+        np.testing.assert_array_equal(expected, actual)
+        self.assertTrue(actual[0, 0])
+        self.assertFalse(actual[1, 1])
+        self.assertTrue(actual[2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
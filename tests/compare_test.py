@@ -0,0 +1,83 @@
+import os
+import sys
+import stat
+import tempfile
+import unittest
+
+from tsmlstarterbot import compare
+
+SEED = 0
+TURNS = 3
+
+# Stand-in for the engine: runs the bots through the protocol for a few turns, and ranks them by seed
+ENGINE = """#!{python}
+import sys, json, random, subprocess
+args = sys.argv[1:]
+width, height = args[args.index("-d") + 1].split()
+seed = int(args[args.index("-s") + 1])
+replay_directory = args[args.index("-i") + 1]
+commands = [arg for arg in args if arg.startswith("{python}")]
+bots = [subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for command in commands]
+for player_id, bot in enumerate(bots):
+    bot.stdin.write("{{}}\\n{{}} {{}}\\nmap\\n".format(player_id, width, height))
+    bot.stdin.flush()
+names = [bot.stdout.readline().strip() for bot in bots]
+for turn in range({turns}):
+    for bot in bots:
+        bot.stdin.write("map\\n")
+        bot.stdin.flush()
+        bot.stdout.readline()
+for bot in bots:
+    bot.stdin.close()
+    bot.wait()
+ranks = list(range(1, len(bots) + 1))
+random.Random(seed).shuffle(ranks)
+with open("{{}}/replay-{{}}.hlt".format(replay_directory, seed), "w") as f:
+    json.dump({{"player_names": names, "stats": {{str(i): {{"rank": rank}} for i, rank in enumerate(ranks)}},
+               "frames": []}}, f)
+"""
+
+# Stand-in for a bot: answers every line of the engine after the initial map
+BOT = "import sys; sys.stdin.readline(); sys.stdin.readline(); sys.stdin.readline(); print('{name}', flush=True)\n" \
+      "for line in sys.stdin: print('', flush=True)"
+
+
+class TestCompare(unittest.TestCase):
+    def test_schedule_rotates_seats(self):
+        games = compare.schedule_games(["a", "b", "c"], 6, "out", seed=SEED)
+        self.assertEqual([game.bot_ids for game in games[:3]], [(0, 1, 2), (1, 2, 0), (2, 0, 1)])
+        self.assertEqual(games, compare.schedule_games(["a", "b", "c"], 6, "out", seed=SEED))
+        self.assertTrue(all((game.width, game.height) in compare.MAP_SIZES for game in games))
+
+    def test_wilson_interval(self):
+        self.assertEqual(compare.wilson_interval(0, 0), (0.0, 1.0))
+        low, high = compare.wilson_interval(10, 20)
+        self.assertAlmostEqual(low + high, 1.0)
+        self.assertAlmostEqual(low, 0.2993, places=4)
+        self.assertEqual(compare.wilson_interval(20, 20)[1], 1.0)
+
+    def test_run_games(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = os.path.join(directory, "engine")
+            with open(engine, "w") as f:
+                f.write(ENGINE.format(python=sys.executable, turns=TURNS))
+            os.chmod(engine, os.stat(engine).st_mode | stat.S_IEXEC)
+
+            bots = ['{} -c "{}"'.format(sys.executable, BOT.format(name=name)) for name in ("first", "second")]
+            games = compare.schedule_games(bots, 4, directory, seed=SEED)
+            results = list(compare.run_games(games, engine, workers=2, timeout=60))
+
+            self.assertEqual([result.error for result in results], [None] * 4)
+            for result in results:
+                self.assertEqual(sorted(result.ranks.values()), [1, 2])
+                self.assertEqual([len(result.turn_times[bot_id]) for bot_id in range(2)], [TURNS, TURNS])
+
+            summary, failed_games = compare.summarize(results, bots)
+            self.assertEqual(failed_games, 0)
+            self.assertEqual(sum(stats["wins"] for stats in summary), 4)
+            self.assertEqual([stats["turns"] for stats in summary], [4 * TURNS, 4 * TURNS])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from tsmlstarterbot.common import *
+from tsmlstarterbot.feature_cache import FeatureCacheWriter, load_feature_cache, feature_cache_path, CACHE_PARTS
+from tsmlstarterbot import feature_cache, parsing
+from benchmarks.synthetic import synthetic_replay
+
+SEED = 0
+
+
+class TestFeatureCache(unittest.TestCase):
+    def test_round_trip(self):
+        rng = np.random.default_rng(SEED)
+        games = [(rng.random((frames, PLANET_MAX_NUM, PER_PLANET_FEATURES), dtype=np.float32),
+                  rng.random((frames, PLANET_MAX_NUM), dtype=np.float32))
+                 for frames in (3, 0, 7)]
+        with tempfile.TemporaryDirectory() as directory:
+            with FeatureCacheWriter(directory, "cache") as writer:
+                for game_id, (features, outputs) in enumerate(games):
+                    writer.append_game(game_id, features, outputs)
+            self.assertEqual(writer.frames, 10)
+
+            features, outputs, index = load_feature_cache(directory, "cache")
+            self.assertIsInstance(features, np.memmap)
+            self.assertEqual(features.dtype, np.float32)
+            np.testing.assert_array_equal(features, np.concatenate([f for f, _ in games]))
+            np.testing.assert_array_equal(outputs, np.concatenate([o for _, o in games]))
+            np.testing.assert_array_equal(index, [[0, 0], [0, 1], [0, 2]] + [[2, i] for i in range(7)])
+
+    def test_failed_write_leaves_no_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                with FeatureCacheWriter(directory, "cache") as writer:
+                    writer.append_game(0, np.zeros((2, PLANET_MAX_NUM, PER_PLANET_FEATURES)), np.zeros((2, 3)))
+            self.assertEqual(os.listdir(directory), [])
+            self.assertFalse(any(os.path.exists(feature_cache_path(directory, "cache", part)) for part in CACHE_PARTS))
+
+    def test_shards(self):
+        replays = [synthetic_replay(4, 30, seed=SEED + i) for i in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            expected = parsing.parse(replays, "player0", None)
+            first = parsing.parse(replays[:2], "player0", None, shards_location=directory)
+            self.assertEqual(len(os.listdir(directory)), 2)
+            np.testing.assert_array_equal(first[0], expected[0][:len(first[0])])
+
+            # Only the new replay is parsed, the dataset is assembled from the shards
+            second = parsing.parse(replays, "player0", None, shards_location=directory)
+            self.assertEqual(len(os.listdir(directory)), 3)
+            for actual, wanted in zip(second, expected):
+                np.testing.assert_array_equal(actual, wanted)
+
+    def test_shard_key(self):
+        key = feature_cache.shard_key("replay", "bot", "version")
+        self.assertNotEqual(key, feature_cache.shard_key("replay", "bot", "other version"))
+        self.assertNotEqual(key, feature_cache.shard_key("replay", "other bot", "version"))
+        self.assertNotEqual(key, feature_cache.shard_key("replay2", "bot", "version"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(FileNotFoundError):
+                feature_cache.read_shard(directory, key)
+            feature_cache.write_shard(directory, key, None)
+            self.assertIsNone(feature_cache.read_shard(directory, key))
+
+
+if __name__ == "__main__":
+    unittest.main()
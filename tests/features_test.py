@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from hlt.game_map import Map
+from tsmlstarterbot.common import *
+from tsmlstarterbot import features
+from tsmlstarterbot.replay import CompactReplay
+from benchmarks.synthetic import synthetic_map_string, synthetic_replay
+from benchmarks.parsing_benchmark import loop_frame_features
+
+SEED = 0
+
+
+def frame_feature_matrix(planet_features):
+    """
+    Lay out the features of a replay frame like the input of the network.
+    """
+    feature_matrix = np.zeros((PLANET_MAX_NUM, PER_PLANET_FEATURES))
+    for planet_id, row in planet_features.items():
+        feature_matrix[int(planet_id)] = row
+    return feature_matrix.reshape((1, PLANET_MAX_NUM, PER_PLANET_FEATURES))
+
+
+class TestFeatures(unittest.TestCase):
+    def test_square_matches_python(self):
+        rng = np.random.default_rng(SEED)
+        for size in (1, 100, features._SQUARE_POW_SIZE, features._SQUARE_BLOCK + 1, 100000):
+            values = rng.uniform(-300, 300, size)
+            expected = [value ** 2 for value in values.tolist()]
+            self.assertEqual(expected, features.square(values).tolist())
+
+    def test_training_serving_skew(self):
+        # The first frame of a synthetic replay is the synthetic map with the same parameters
+        for num_ships, num_players in ((10, 2), (150, 4), (400, 3)):
+            for my_id in range(num_players):
+                seed = SEED + num_ships + my_id
+                replay = synthetic_replay(1, num_ships, num_players=num_players, seed=seed)
+                training = frame_feature_matrix(features.produce_compact_frame_features(
+                    CompactReplay.from_json(replay), 0, my_id))
+
+                for columnar in (False, True):
+                    game_map = Map(my_id, replay['width'], replay['height'], columnar=columnar)
+                    game_map._parse(synthetic_map_string(num_ships, num_players=num_players, seed=seed))
+                    serving = features.produce_features_per_planet(game_map)
+
+                    np.testing.assert_array_equal(training, serving)
+
+    def test_frame_features_match_loop(self):
+        replay = synthetic_replay(5, 200, num_players=4, seed=SEED)
+        compact = CompactReplay.from_json(replay)
+        for bot_to_imitate_id in range(4):
+            for index, frame in enumerate(replay['frames']):
+                expected = loop_frame_features(replay['planets'], frame, str(bot_to_imitate_id), replay['width'],
+                                               replay['height'])
+                # repr also tells apart ints from floats, which would change the serialized features
+                self.assertEqual(repr(expected),
+                                 repr(features.produce_compact_frame_features(compact, index, bot_to_imitate_id)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import copy
+import unittest
+
+from hlt.game_map import Map
+from benchmarks.synthetic import synthetic_map_string
+from benchmarks.map_parse_benchmark import legacy_parse, describe
+from benchmarks.simulator_benchmark import play_scripted, scripted_commands
+from tsmlstarterbot.simulator import Simulation
+
+SEED = 0
+
+
+class TestGameMap(unittest.TestCase):
+    def assert_parses_like_legacy(self, map_string):
+        game_map = Map(0, 240, 160)
+        game_map._parse(map_string)
+        self.assertEqual(describe(game_map._players, game_map._planets), describe(*legacy_parse(map_string)))
+
+    def test_parse_synthetic(self):
+        for num_ships, num_players in ((0, 2), (1, 2), (150, 4), (1000, 3)):
+            self.assert_parses_like_legacy(synthetic_map_string(num_ships, num_players=num_players, seed=SEED))
+
+    def test_parse_game(self):
+        # Ships moving, docking and undocking, planets changing hands
+        simulation, _ = play_scripted(4, 312, 208, seed=SEED, max_turns=80)
+        self.assert_parses_like_legacy(simulation.map_string())
+
+    def test_remaining_tokens(self):
+        game_map = Map(0, 240, 160)
+        with self.assertRaises(AssertionError):
+            game_map._parse(synthetic_map_string(10, seed=SEED) + " 7")
+
+    def test_incremental(self):
+        simulation = Simulation(4, 312, 208, seed=SEED, max_turns=120)
+        incremental = Map(0, 312, 208, incremental=True)
+        ships, planets = {}, {}
+        while not simulation.is_over():
+            if simulation.turn == 60:
+                # A planet without ships docked is destroyed
+                del simulation.planets[next(planet.id for planet in simulation.planets.values() if not planet.docked)]
+
+            map_string = simulation.map_string()
+            incremental._parse(map_string)
+            full = Map(0, 312, 208)
+            full._parse(map_string)
+            self.assertEqual(describe(incremental._players, incremental._planets),
+                             describe(full._players, full._planets))
+
+            previous_ships, previous_planets = ships, planets
+            ships = {ship.id: (ship, (ship.x, ship.y, ship.health, ship.docking_status, ship.planet and ship.planet.id,
+                                      ship._docking_progress, ship._weapon_cooldown))
+                     for ship in incremental._all_ships()}
+            planets = {planet.id: (planet, (planet.health, planet.current_production, planet.remaining_resources,
+                                            planet.owner and planet.owner.id, planet._docked_ship_ids))
+                       for planet in incremental.all_planets()}
+            kept_ships, kept_planets = ships.keys() & previous_ships.keys(), planets.keys() & previous_planets.keys()
+
+            self.assertEqual(incremental.added_ships, ships.keys() - previous_ships.keys())
+            self.assertEqual(incremental.removed_ships, previous_ships.keys() - ships.keys())
+            self.assertEqual(incremental.changed_ships,
+                             {ship_id for ship_id in kept_ships if ships[ship_id][1] != previous_ships[ship_id][1]})
+            self.assertEqual(incremental.removed_planets, previous_planets.keys() - planets.keys())
+            self.assertEqual(incremental.changed_planets, {planet_id for planet_id in kept_planets
+                                                           if planets[planet_id][1] != previous_planets[planet_id][1]})
+            # What is still there is the same objects
+            for ship_id in kept_ships:
+                self.assertIs(ships[ship_id][0], previous_ships[ship_id][0])
+            for planet_id in kept_planets:
+                self.assertIs(planets[planet_id][0], previous_planets[planet_id][0])
+            if simulation.turn == 60:
+                self.assertEqual(len(incremental.removed_planets), 1)
+
+            for player_id in simulation.players_alive():
+                simulation.add_commands(player_id, scripted_commands(simulation, player_id))
+            simulation.step()
+
+    def test_entities_are_slotted(self):
+        game_map = Map(0, 240, 160)
+        game_map._parse(synthetic_map_string(50, seed=SEED))
+        ship, planet = game_map._all_ships()[0], game_map.get_planet(0)
+        for celestial_object in (ship, planet, ship.closest_point_to(planet)):
+            self.assertFalse(hasattr(celestial_object, "__dict__"))
+        # Game keeps a deep copy of the first map
+        initial_map = copy.deepcopy(game_map)
+        self.assertEqual(describe(initial_map._players, initial_map._planets),
+                         describe(game_map._players, game_map._planets))
+
+    def assert_linked(self, game_map):
+        """
+        The owners, the planets of the docked ships and the docked ships of the planets are the objects of the map.
+        """
+        for ship in game_map._all_ships():
+            self.assertIs(ship.owner, game_map.get_player(ship.owner.id))
+            self.assertIs(ship.owner.get_ship(ship.id), ship)
+            if ship.planet is not None:
+                self.assertIs(ship.planet, game_map.get_planet(ship.planet.id))
+        for planet in game_map.all_planets():
+            if planet.owner is None:
+                self.assertEqual(planet.all_docked_ships(), [])
+                continue
+            self.assertIs(planet.owner, game_map.get_player(planet.owner.id))
+            for ship in planet.all_docked_ships():
+                self.assertIs(ship, planet.owner.get_ship(ship.id))
+                self.assertIs(ship.planet, planet)
+
+    def assert_columnar_like_objects(self, columnar_map, map_string):
+        game_map = Map(0, columnar_map.width, columnar_map.height)
+        game_map._parse(map_string)
+        columnar_map._parse(map_string)
+
+        # The snapshot, in the order the engine sent the entities
+        snapshot, ships, planets = columnar_map.snapshot, game_map._all_ships(), game_map.all_planets()
+        self.assertEqual(snapshot.player_ids.tolist(), [player.id for player in game_map.all_players()])
+        self.assertEqual(list(zip(snapshot.ship_owner.tolist(), snapshot.ship_id.tolist(), snapshot.ship_x.tolist(),
+                                  snapshot.ship_y.tolist(), snapshot.ship_health.tolist(),
+                                  snapshot.ship_docking_status.tolist(), snapshot.ship_docking_progress.tolist(),
+                                  snapshot.ship_cooldown.tolist())),
+                         [(ship.owner.id, ship.id, ship.x, ship.y, ship.health, ship.docking_status.value,
+                           ship._docking_progress, ship._weapon_cooldown) for ship in ships])
+        self.assertEqual(list(zip(snapshot.planet_id.tolist(), snapshot.planet_x.tolist(), snapshot.planet_y.tolist(),
+                                  snapshot.planet_health.tolist(), snapshot.planet_radius.tolist(),
+                                  snapshot.planet_docking_spots.tolist(), snapshot.planet_current_production.tolist(),
+                                  snapshot.planet_remaining_resources.tolist(), snapshot.planet_owned.tolist())),
+                         [(planet.id, planet.x, planet.y, planet.health, planet.radius, planet.num_docking_spots,
+                           planet.current_production, planet.remaining_resources, planet.is_owned())
+                          for planet in planets])
+        self.assertEqual([snapshot.docked_ships_of(index).tolist() for index in range(len(planets))],
+                         [planet._docked_ship_ids for planet in planets])
+
+        # The objects created from it
+        self.assertEqual(describe(columnar_map._players, columnar_map._planets),
+                         describe(game_map._players, game_map._planets))
+        self.assertEqual([[ship.id for ship in planet.all_docked_ships()] for planet in columnar_map.all_planets()],
+                         [[ship.id for ship in planet.all_docked_ships()] for planet in planets])
+        self.assert_linked(columnar_map)
+        self.assert_linked(game_map)
+
+    def test_columnar(self):
+        for num_ships, num_players in ((0, 2), (1, 2), (150, 4), (1000, 3)):
+            self.assert_columnar_like_objects(Map(0, 240, 160, columnar=True),
+                                              synthetic_map_string(num_ships, num_players=num_players, seed=SEED))
+
+        # The same map parsing every turn of a game, with ships docked and planets owned
+        simulation = Simulation(4, 312, 208, seed=SEED, max_turns=120)
+        columnar_map = Map(0, 312, 208, columnar=True)
+        docked = owned = 0
+        while not simulation.is_over():
+            map_string = simulation.map_string()
+            self.assert_columnar_like_objects(columnar_map, map_string)
+            docked += sum(len(planet.all_docked_ships()) for planet in columnar_map.all_planets())
+            owned += sum(planet.is_owned() for planet in columnar_map.all_planets())
+
+            for player_id in simulation.players_alive():
+                simulation.add_commands(player_id, scripted_commands(simulation, player_id))
+            simulation.step()
+        self.assertGreater(docked, 0)
+        self.assertGreater(owned, 0)
+
+    def test_incremental_is_not_columnar(self):
+        with self.assertRaises(ValueError):
+            Map(0, 240, 160, columnar=True, incremental=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
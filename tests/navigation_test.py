@@ -0,0 +1,49 @@
+import unittest
+
+from benchmarks.synthetic import synthetic_map
+from benchmarks.navigation_benchmark import recursive_navigate
+
+SEED = 0
+# (ships, map width, map height)
+CROWDED_MAPS = ((200, 120, 80), (600, 160, 100))
+NAVIGATING_SHIPS = 40
+
+
+class TestNavigation(unittest.TestCase):
+    def test_navigate_matches_recursive(self):
+        for num_ships, width, height in CROWDED_MAPS:
+            game_map = synthetic_map(num_ships, num_players=4, width=width, height=height, seed=SEED + num_ships)
+            planets = game_map.all_planets()
+            ships = game_map._all_ships()[:NAVIGATING_SHIPS]
+            # Every ship goes to the far side of a planet across the map, so that most paths need corrections
+            targets = [ship.closest_point_to(planets[(ship.id * 7) % len(planets)]) for ship in ships]
+            for speed, max_corrections, angular_step in ((7, 180, 1), (7, 90, 1), (3, 30, 2), (7, 1, 1), (7, 0, 1)):
+                for ship, target in zip(ships, targets):
+                    self.assertEqual(ship.navigate(target, game_map, speed, max_corrections=max_corrections,
+                                                   angular_step=angular_step),
+                                     recursive_navigate(ship, target, game_map, speed,
+                                                        max_corrections=max_corrections, angular_step=angular_step),
+                                     (num_ships, ship.id, speed, max_corrections, angular_step))
+
+    def test_corrections_tried(self):
+        num_ships, width, height = CROWDED_MAPS[-1]
+        game_map = synthetic_map(num_ships, num_players=4, width=width, height=height, seed=SEED + num_ships)
+        planets = game_map.all_planets()
+        for ship in game_map._all_ships()[:NAVIGATING_SHIPS]:
+            target = ship.closest_point_to(planets[(ship.id * 7) % len(planets)])
+            for max_corrections in (90, 1, 0):
+                command = ship.navigate(target, game_map, 7, max_corrections=max_corrections)
+                if max_corrections == 0:
+                    self.assertEqual(ship.corrections_tried, 0)
+                elif command is None:
+                    self.assertEqual(ship.corrections_tried, max_corrections)
+                elif not game_map.obstacles_between(ship, target):
+                    self.assertEqual(ship.corrections_tried, 1)
+                else:
+                    # The heading of the command is the correction which was found free
+                    correction = (int(command.split()[3]) - round(ship.calculate_angle_between(target))) % 360
+                    self.assertEqual(ship.corrections_tried, correction + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,7 @@ warnings.filterwarnings("ignore")
 warnings.filterwarnings('ignore', category=ResourceWarning)
 # warnings.simplefilter("ignore", category=ResourceWarning)
 from tsmlstarterbot.cnn_net_model import CNN_Net
-from tsmlstarterbot.common import PLANET_MAX_NUM, PER_PLANET_FEATURES
+from tsmlstarterbot.common import PLANET_MAX_NUM, PER_PLANET_FEATURES, LatencyStats
 
 import numpy as np
 import unittest
@@ -63,6 +63,31 @@ class TestNeuralNet(unittest.TestCase):
         print(f"{original_predictions[0, 0]} - {permuted_predictions[0, 1]} = {original_predictions[0, 0] - permuted_predictions[0, 1]}")
         print(f"{original_predictions[0, 1]} - {permuted_predictions[0, 0]} = {original_predictions[0, 1] - permuted_predictions[0, 0]}")
 
+    def test_predict_single_matches_predict(self):
+        np.random.seed(SEED)
+        nn = CNN_Net(input_size=(PLANET_MAX_NUM, PER_PLANET_FEATURES), output_size=PLANET_MAX_NUM,
+                     cached_model=False, cached_model_path="", seed=SEED)
+        input_data = np.random.rand(5, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        expected = nn.predict(input_data)
+        for index in range(len(input_data)):
+            single = nn.predict_single(input_data[index:index + 1])
+            self.assertEqual(single.shape, (1, PLANET_MAX_NUM))
+            np.testing.assert_allclose(single, expected[index:index + 1], atol=1e-6)
+        self.assertEqual(len(nn.inference_latency), len(input_data))
+
+    def test_latency_percentiles(self):
+        stats = LatencyStats(history=101)
+        self.assertIsNone(stats.percentile(50))
+        self.assertEqual(str(stats), "no calls")
+        # 1 to 101 ms, in shuffled order, after older calls pushed out by the history
+        for duration in [10.0] * 50 + np.random.default_rng(SEED).permutation(np.arange(1, 102) / 1000).tolist():
+            stats.record(duration)
+        self.assertEqual(len(stats), 101)
+        self.assertAlmostEqual(stats.percentile(0), 0.001)
+        self.assertAlmostEqual(stats.percentile(50), 0.051)
+        self.assertAlmostEqual(stats.percentile(99), 0.100)
+        self.assertAlmostEqual(stats.percentile(99.5), 0.1005)
+        self.assertEqual(str(stats), "p50=51.000ms p99=100.000ms over 101 calls")
 
 
 if __name__ == "__main__":
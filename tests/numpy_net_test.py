@@ -0,0 +1,48 @@
+# Place this before directly or indirectly importing tensorflow
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '99' #99
+import warnings
+warnings.filterwarnings("ignore")
+from tsmlstarterbot.cnn_net_model import CNN_Net
+from tsmlstarterbot.numpy_net import NumpyNet
+from tsmlstarterbot.common import PLANET_MAX_NUM, PER_PLANET_FEATURES
+
+import tempfile
+import numpy as np
+import unittest
+
+TOLERANCE = 1e-5
+SEED = 0
+
+
+class TestNumpyNet(unittest.TestCase):
+    def test_matches_keras(self):
+        np.random.seed(SEED)
+        nn = CNN_Net(input_size=(PLANET_MAX_NUM, PER_PLANET_FEATURES), output_size=PLANET_MAX_NUM,
+                     cached_model=False, cached_model_path="", seed=SEED)
+
+        # Give the batch normalization layers non-trivial statistics, as after training
+        for layer in nn._model.layers:
+            if type(layer).__name__ == "BatchNormalization":
+                layer.moving_mean.assign(np.random.rand(*layer.moving_mean.shape))
+                layer.moving_variance.assign(np.random.rand(*layer.moving_variance.shape) + 0.5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            weights_path = os.path.join(directory, "cnn_model.npz")
+            nn.export_weights(weights_path)
+            numpy_nn = NumpyNet(weights_path)
+
+        input_data = np.random.rand(16, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        expected = nn.predict(input_data)
+        actual = numpy_nn.predict(input_data)
+
+        self.assertEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(expected, actual, atol=TOLERANCE)
+
+        single = numpy_nn.predict_single(input_data[:1])
+        np.testing.assert_allclose(expected[:1], single, atol=TOLERANCE)
+        self.assertEqual(len(numpy_nn.inference_latency), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import json
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from tsmlstarterbot import parsing
+from benchmarks.simulator_benchmark import play_scripted
+
+SEED = 0
+CASES = 200
+
+
+class TestParsing(unittest.TestCase):
+    def test_angles_match_angle(self):
+        rng = np.random.default_rng(SEED)
+        # Grid coordinates give exact multiples of 45 degrees and many ties
+        x = np.concatenate([rng.uniform(-300, 300, 10000), rng.integers(-3, 4, 1000).astype(float), [0.0, -0.0]])
+        y = np.concatenate([rng.uniform(-300, 300, 10000), rng.integers(-3, 4, 1000).astype(float), [-0.0, 0.0]])
+        self.assertEqual([parsing.angle(x_i, y_i) for x_i, y_i in zip(x.tolist(), y.tolist())],
+                         parsing.angles(x, y).tolist())
+
+    def test_target_planets_match_loop(self):
+        rng = random.Random(SEED)
+        for _ in range(CASES):
+            num_planets = rng.randint(0, 8)
+            planets = [{"id": planet_id, "x": float(rng.randint(0, 6)), "y": float(rng.randint(0, 6))}
+                       for planet_id in range(num_planets)]
+            # Some planets are destroyed, some are missing from the frame
+            frame_planets = {str(planet["id"]): {"health": rng.choice([0, 1, 100])}
+                             for planet in planets if rng.random() < 0.9}
+            ships = {str(ship_id): {"x": float(rng.randint(0, 6)), "y": float(rng.randint(0, 6))}
+                     for ship_id in range(rng.randint(1, 10))}
+            frame = {"ships": {"0": ships}, "planets": frame_planets}
+            moves = [{"type": "thrust", "shipId": ship_id, "angle": rng.choice([0, 45, 90, 180, rng.randrange(360)])}
+                     for ship_id in range(len(ships))]
+
+            expected = [parsing.find_target_planet("0", frame, planets, move) for move in moves]
+
+            alive = np.array([[str(planet["id"]) in frame_planets and frame_planets[str(planet["id"])]["health"] > 0
+                               for planet in planets]] * len(moves)).reshape((len(moves), num_planets))
+            actual = parsing.find_target_planets(
+                np.array([ships[str(move["shipId"])]["x"] for move in moves]),
+                np.array([ships[str(move["shipId"])]["y"] for move in moves]),
+                np.array([float(move["angle"]) for move in moves]),
+                np.array([planet["x"] for planet in planets]), np.array([planet["y"] for planet in planets]), alive)
+
+            self.assertEqual(expected, [str(target) if target >= 0 else -1 for target in actual.tolist()])
+
+    def test_parallel_parse_matches_serial(self):
+        games = [play_scripted(2, 240, 160, seed=seed, max_turns=60)[0].replay(["first", "second"])
+                 for seed in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index, game in enumerate(games):
+                paths.append(os.path.join(directory, "{}.hlt".format(index)))
+                with open(paths[-1], "w") as f:
+                    json.dump(game, f)
+
+            serial_input, serial_output = parsing.parse(paths, "first", dump_features_location=None)
+            self.assertGreater(len(serial_input), 0)
+            for replays, workers in ((paths, 2), (paths, 3), (games, 1), (games, 2)):
+                data_input, data_output = parsing.parse(replays, "first", dump_features_location=None,
+                                                        workers=workers)
+                self.assertEqual(data_input.tobytes(), serial_input.tobytes())
+                self.assertEqual(data_output.tobytes(), serial_output.tobytes())
+
+    def test_parse_needs_a_collection_to_choose_the_bot(self):
+        with self.assertRaises(ValueError):
+            parsing.parse(iter([]), None, dump_features_location=None)
+
+    def test_read_replay_header(self):
+        player_names = ["stats", "player_names"]
+        stats = {"0": {"rank": 2}, "1": {"rank": 1}}
+        # The names of the fields also show up as values, and as keys nested in the frames
+        frames = [{"ships": {}, "stats": 5, "note": '"player_names": ["x"]'}]
+        documents = {
+            "header after the frames": {"frames": frames, "player_names": player_names, "stats": stats},
+            "header before the frames": {"player_names": player_names, "stats": stats, "frames": frames},
+            "one field on each side": {"stats": stats, "frames": frames, "player_names": player_names},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, document in documents.items():
+                for separators in ((",", ":"), (", ", " : ")):
+                    path = os.path.join(directory, "replay.hlt")
+                    with open(path, "w") as f:
+                        json.dump(document, f, separators=separators)
+                    with mock.patch.object(parsing.json, "loads", wraps=json.loads) as loads:
+                        header = parsing.read_replay_header(path)
+                    self.assertEqual(header, {"player_names": player_names, "stats": stats}, name)
+                    # The nested "stats" of the frames, found when the real one comes before them, isn't a dictionary
+                    # of ranks, which sends it back to decoding everything
+                    self.assertEqual(loads.called, name != "header after the frames", name)
+                    self.assertEqual(parsing.find_winner_name(path), "player_names")
+
+            # "stats" found last is the nested one, which isn't a dictionary of ranks: the whole replay is decoded
+            path = os.path.join(directory, "replay.hlt")
+            with open(path, "w") as f:
+                f.write('{"player_names": ["a", "b"], "stats": {"0": {"rank": 1}, "1": {"rank": 2}}, '
+                        '"frames": [{"stats": {"0": 3}}]}')
+            self.assertEqual(parsing.read_replay_header(path),
+                             {"player_names": ["a", "b"], "stats": {"0": {"rank": 1}, "1": {"rank": 2}}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import io
+import os
+import json
+import zipfile
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from tsmlstarterbot import parsing, replay
+from tsmlstarterbot.replay import CompactReplay, decode_replay
+from benchmarks.synthetic import synthetic_replay
+
+SEED = 0
+
+
+def assert_replays_equal(expected, actual):
+    assert vars(expected).keys() == vars(actual).keys()
+    for name, value in vars(expected).items():
+        if isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(value, getattr(actual, name), err_msg=name)
+            assert value.dtype == getattr(actual, name).dtype, name
+        else:
+            assert value == getattr(actual, name), name
+
+
+class TestReplay(unittest.TestCase):
+    def test_decode_matches_json(self):
+        replay = synthetic_replay(6, 40, num_players=3, seed=SEED)
+        # Fields the parser doesn't read, in and around the frames
+        replay['version'] = 1
+        replay['constants'] = {"MAX_SPEED": 7, "nested": [{"frames": []}]}
+        for frame in replay['frames']:
+            frame['events'] = [{"event": "spawned", "entity": {"id": 0, "x": 1.5}}]
+
+        for text in (json.dumps(replay), json.dumps(replay, separators=(",", ":")),
+                     json.dumps(replay, indent=2, sort_keys=True)):
+            assert_replays_equal(CompactReplay.from_json(json.loads(text)), decode_replay(text))
+
+    def test_decode_in_chunks(self):
+        game = synthetic_replay(20, 40, num_players=3, seed=SEED + 2)
+        # Objects inside the frames and moves which start like them, and which batches must not be cut at
+        for frame in game['frames']:
+            frame['events'] = [{"ships": 1}, {"ships": {"x": "{\"ships\""}}]
+        for frame_moves in game['moves']:
+            for player_moves in frame_moves.values():
+                player_moves.append({"0": {"type": "thrust", "angle": 0}})
+
+        for text in (json.dumps(game), json.dumps(game, separators=(",", ":")),
+                     json.dumps(game, indent=2, sort_keys=True)):
+            expected = CompactReplay.from_json(json.loads(text))
+            for orjson in (replay.orjson, None):
+                for chunk_size, batch_size in ((7, 50), (100, 3000), (5000, 200)):
+                    with mock.patch.multiple(replay, orjson=orjson, CHUNK_SIZE=chunk_size, BATCH_SIZE=batch_size):
+                        assert_replays_equal(expected, decode_replay(text))
+                        assert_replays_equal(expected, decode_replay(io.StringIO(text)))
+                        with self.assertRaises(json.JSONDecodeError):
+                            decode_replay(io.StringIO(text[:len(text) // 2]))
+
+    def test_load_compact_replay(self):
+        game = synthetic_replay(6, 30, num_players=2, seed=SEED + 3)
+        expected = CompactReplay.from_json(game)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "replay.json")
+            with open(path, "w") as f:
+                json.dump(game, f)
+            zip_path = os.path.join(directory, "replays.zip")
+            with zipfile.ZipFile(zip_path, "w") as z:
+                z.write(path, "replay.json")
+
+            for source in (game, path, (zip_path, "replay.json")):
+                assert_replays_equal(expected, parsing.load_compact_replay(source))
+
+    def test_parse_game(self):
+        replay = synthetic_replay(8, 60, num_players=2, seed=SEED + 1)
+        compact = decode_replay(json.dumps(replay))
+        for bot_to_imitate in replay['player_names']:
+            self.assertEqual(repr(parsing.parse_game(replay, bot_to_imitate)),
+                             repr(parsing.parse_game(compact, bot_to_imitate)))
+        self.assertIsNone(parsing.parse_game(compact, "missing bot"))
+
+    def test_malformed(self):
+        text = json.dumps(synthetic_replay(2, 10, seed=SEED))
+        for broken in (text[:-1], text[:len(text) // 2], text.replace('"frames": [', '"frames": {', 1)):
+            with self.assertRaises(json.JSONDecodeError):
+                decode_replay(broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from unittest import mock
+
+from tsmlstarterbot import scheduler
+from tsmlstarterbot.scheduler import TurnScheduler
+
+
+class FakeClock:
+    """
+    Stands for the time module in the scheduler, its time only moving when told to.
+    """
+    def __init__(self, now=1024.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class TestTurnScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(scheduler, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = TurnScheduler(turn_budget=2.0, max_corrections=180, min_corrections=10,
+                                       navigation_reserve=0.2)
+
+    def run_phase(self, name, duration):
+        with self.scheduler.phase(name):
+            self.clock.now += duration
+
+    def test_time_left_outside_of_a_turn(self):
+        self.assertEqual(self.scheduler.time_left(), float('inf'))
+
+    def test_time_left_keeps_the_reserves(self):
+        defaults = TurnScheduler.DEFAULT_DURATIONS
+        self.scheduler.start_turn(self.clock.now - 0.1)
+        # Outside of a phase nothing is reserved
+        self.assertAlmostEqual(self.scheduler.time_left(), 1.9)
+        with self.scheduler.phase("parse"):
+            self.assertAlmostEqual(self.scheduler.time_left(), 1.9 - defaults["features"] - defaults["inference"] -
+                                   defaults["assignment"] - 0.2)
+        with self.scheduler.phase("assignment"):
+            self.clock.now += 0.5
+            self.assertAlmostEqual(self.scheduler.time_left(), 1.4 - 0.2)
+        with self.scheduler.phase("navigation"):
+            self.assertAlmostEqual(self.scheduler.time_left(), 1.4)
+
+    def test_time_left_reserves_the_measured_durations(self):
+        self.scheduler.start_turn()
+        for duration in (0.3, 0.1, 0.2):
+            self.run_phase("inference", duration)
+        self.run_phase("assignment", 0.05)
+        self.scheduler.start_turn()
+        with self.scheduler.phase("features"):
+            # The longest inference of the recent turns, the last assignment, and the navigation reserve
+            self.assertAlmostEqual(self.scheduler.time_left(), 2.0 - 0.3 - 0.05 - 0.2)
+
+    def test_phase_bookkeeping(self):
+        self.scheduler.start_turn()
+        for name in TurnScheduler.PHASES:
+            self.assertEqual(self.scheduler.expected_duration(name), TurnScheduler.DEFAULT_DURATIONS[name])
+        for duration in (0.02, 0.04, 0.03):
+            self.run_phase("parse", duration)
+        self.assertAlmostEqual(self.scheduler.expected_duration("parse"), 0.04)
+        self.assertIsNone(self.scheduler._current_phase)
+
+        # The phase is measured from the given start, and even if it raises
+        with self.assertRaises(RuntimeError):
+            with self.scheduler.phase("features", start=self.clock.now - 0.5):
+                self.assertEqual(self.scheduler._current_phase, "features")
+                raise RuntimeError
+        self.assertAlmostEqual(self.scheduler.expected_duration("features"), 0.5)
+        self.assertIsNone(self.scheduler._current_phase)
+
+        # Only the recent turns count
+        short = TurnScheduler(history=2)
+        for duration in (0.9, 0.1, 0.2):
+            with short.phase("parse", start=self.clock.now - duration):
+                pass
+        self.assertAlmostEqual(short.expected_duration("parse"), 0.2)
+
+    def test_navigation_corrections_degrade_to_zero(self):
+        # Nothing measured yet
+        self.assertEqual(self.scheduler.navigation_corrections(100), 180)
+
+        self.scheduler.start_turn()
+        with self.scheduler.phase("navigation"):
+            # A call which tried 2 corrections in 1/64 s
+            self.scheduler.record_navigation(1 / 64, 2)
+            self.assertEqual(self.scheduler.navigation_corrections(1), 180)
+            self.assertEqual(self.scheduler.navigation_corrections(2), 128)
+            self.assertEqual(self.scheduler.navigation_corrections(16), 16)
+            # 8 corrections per ship is below min_corrections
+            self.assertEqual(self.scheduler.navigation_corrections(32), 0)
+
+            self.clock.now += 1.0
+            self.assertEqual(self.scheduler.navigation_corrections(1), 128)
+            self.assertEqual(self.scheduler.navigation_corrections(8), 16)
+            self.assertEqual(self.scheduler.navigation_corrections(16), 0)
+
+            self.clock.now += 1.0
+            self.assertEqual(self.scheduler.navigation_corrections(1), 0)
+
+    def test_navigation_cost_is_per_correction_tried(self):
+        self.scheduler.start_turn()
+        with self.scheduler.phase("navigation"):
+            # A call which tried a single correction costs as much per correction as it took
+            self.scheduler.record_navigation(1 / 64, 1)
+            self.assertEqual(self.scheduler.navigation_corrections(8), 16)
+            # The most expensive correction of the recent calls is budgeted for
+            self.scheduler.record_navigation(1 / 64, 8)
+            self.assertEqual(self.scheduler.navigation_corrections(8), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
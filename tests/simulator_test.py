@@ -0,0 +1,127 @@
+import os
+import sys
+import math
+import tempfile
+import unittest
+
+from hlt import constants
+from hlt.game_map import Map
+from tsmlstarterbot import parsing, simulator
+from tsmlstarterbot.replay import decode_replay
+from benchmarks.simulator_benchmark import play_scripted
+
+SEED = 0
+
+# The bot of the Halite II starter kit, with a name given on the command line
+STARTER_BOT = """
+import sys
+import hlt
+game = hlt.Game(sys.argv[1])
+while True:
+    game_map = game.update_map()
+    commands = []
+    for ship in game_map.get_me().all_ships():
+        if ship.docking_status != ship.DockingStatus.UNDOCKED:
+            continue
+        for planet in game_map.all_planets():
+            if planet.is_owned():
+                continue
+            if ship.can_dock(planet):
+                commands.append(ship.dock(planet))
+            else:
+                command = ship.navigate(ship.closest_point_to(planet), game_map, speed=7, max_corrections=18)
+                if command:
+                    commands.append(command)
+            break
+    game.send_command_queue(commands)
+"""
+
+
+class TestSimulator(unittest.TestCase):
+    def test_map_string(self):
+        simulation = simulator.Simulation(4, 312, 208, seed=SEED)
+        for columnar in (False, True):
+            game_map = Map(1, simulation.width, simulation.height, columnar=columnar)
+            game_map._parse(simulation.map_string())
+            self.assertEqual(len(game_map.all_planets()), simulator.MAX_PLANETS)
+            self.assertEqual([len(player.all_ships()) for player in game_map.all_players()],
+                             [simulator.INITIAL_SHIPS] * 4)
+            for planet in game_map.all_planets():
+                self.assertEqual((planet.x, planet.y), (simulation.planets[planet.id].x,
+                                                        simulation.planets[planet.id].y))
+
+    def test_deterministic(self):
+        simulation, _ = play_scripted(2, 240, 160, seed=SEED, max_turns=150)
+        again, _ = play_scripted(2, 240, 160, seed=SEED, max_turns=150)
+        self.assertEqual(simulation.replay(["a", "b"]), again.replay(["a", "b"]))
+        self.assertGreater(max(simulation.ships_produced), simulator.INITIAL_SHIPS)
+
+    def test_commands(self):
+        simulation = simulator.Simulation(2, 240, 160, seed=SEED)
+        ship, other = [ship for ship in simulation.ships.values() if ship.owner == 0][:2]
+        enemy = next(ship for ship in simulation.ships.values() if ship.owner == 1)
+        # Commands come without separators, only the first one for a ship counts, enemy ships are ignored
+        simulation.add_commands(0, "t {} 7 0t {} 7 90u {}t {} 7 0".format(ship.id, ship.id, other.id, enemy.id))
+        x, y = ship.x, ship.y
+        simulation.step()
+        self.assertAlmostEqual(ship.x, x + constants.MAX_SPEED)
+        self.assertAlmostEqual(ship.y, y)
+        self.assertEqual(enemy.vel_x, 0)
+        self.assertEqual(simulation.moves[0]["0"][0][str(ship.id)]["angle"], 0)
+
+        with self.assertRaises(ValueError):
+            simulation.add_commands(0, "t {} 7".format(ship.id))
+        with self.assertRaises(ValueError):
+            simulation.add_commands(0, "x 1 2")
+
+    def test_docking_production_and_combat(self):
+        simulation = simulator.Simulation(2, 240, 160, seed=SEED)
+        ship = next(ship for ship in simulation.ships.values() if ship.owner == 0)
+        planet = simulation.planets[0]
+        ship.x, ship.y = planet.x + planet.radius + 1, planet.y
+
+        simulation.add_commands(0, "d {} {}".format(ship.id, planet.id))
+        simulation.step()
+        self.assertEqual((ship.status, planet.owner, planet.docked), (simulator.DOCKING, 0, [ship.id]))
+        for _ in range(constants.DOCK_TURNS - 1):
+            simulation.step()
+        self.assertEqual(ship.status, simulator.DOCKED)
+
+        ships = len(simulation.ships)
+        turns = math.ceil(constants.PRODUCTION_PER_SHIP / constants.BASE_PRODUCTIVITY)
+        for _ in range(turns):
+            simulation.step()
+        self.assertEqual(len(simulation.ships), ships + 1)
+
+        # An enemy in range of the docked ship hits it, the docked ship doesn't fire back
+        enemy = next(ship for ship in simulation.ships.values() if ship.owner == 1)
+        enemy.x, enemy.y = ship.x + constants.WEAPON_RADIUS, ship.y
+        simulation.step()
+        self.assertEqual(ship.health, constants.BASE_SHIP_HEALTH - constants.WEAPON_DAMAGE)
+        self.assertEqual(enemy.health, constants.BASE_SHIP_HEALTH)
+
+    def test_play(self):
+        with tempfile.TemporaryDirectory() as directory:
+            bot_path = os.path.join(directory, "starter.py")
+            with open(bot_path, "w") as f:
+                f.write(STARTER_BOT)
+            package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            bot = "cd {} && PYTHONPATH={} {} {} {{}}".format(directory, package, sys.executable, bot_path)
+            # The third bot crashes before sending its name
+            commands = [bot.format("first"), bot.format("second"), "exit 1"]
+
+            simulation, names, replay_path = simulator.play(commands, 240, 160, seed=SEED,
+                                                            replay_directory=directory, max_turns=30, quiet=True)
+            self.assertEqual(names, ["first", "second", "player2"])
+            self.assertEqual(simulation.turn, 30)
+            self.assertEqual(simulation.ranks()[2], 3)
+
+            with open(replay_path) as f:
+                replay = decode_replay(f.read())
+            self.assertEqual(replay.num_frames, 31)
+            # Frames where no ship flies to a planet have no training data
+            self.assertTrue(0 < len(parsing.parse_game(replay, "first")) <= 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
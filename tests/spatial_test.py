@@ -0,0 +1,131 @@
+import random
+import unittest
+
+from hlt import collision, constants
+from hlt.entity import Position
+from hlt.game_map import Map
+from hlt.spatial import SpatialGrid
+from benchmarks.synthetic import synthetic_map_string
+
+SEED = 0
+CELL_SIZE = 8.0
+SEGMENTS = 300
+
+
+def snapped_map_string(map_string, step):
+    """
+    The map string with the ships which aren't docked moved to the nearest multiple of step, so that many of them sit
+    on the lines between grid cells.
+    """
+    tokens = map_string.split()
+    index = 1
+    for _ in range(int(tokens[0])):
+        num_ships = int(tokens[index + 1])
+        index += 2
+        for _ in range(num_ships):
+            if tokens[index + 6] == "0":
+                for field in (1, 2):
+                    tokens[index + field] = repr(round(float(tokens[index + field]) / step) * step)
+            index += 10
+    return " ".join(tokens)
+
+
+def full_scan_obstacles(game_map, ship, target):
+    """
+    Map.obstacles_between before the grid: every planet, then every ship.
+    """
+    return [foreign_entity for foreign_entity in game_map.all_planets() + game_map._all_ships()
+            if not (foreign_entity == ship or foreign_entity == target) and
+            collision.intersect_segment_circle(ship, target, foreign_entity, fudge=ship.radius + 0.1)]
+
+
+def full_scan_intersection(game_map, target):
+    """
+    Map._intersects_entity before the grid: every ship, then every planet.
+    """
+    for celestial_object in game_map._all_ships() + game_map.all_planets():
+        if celestial_object is target:
+            continue
+        if celestial_object.calculate_distance_between(target) <= celestial_object.radius + target.radius + 0.1:
+            return celestial_object
+    return None
+
+
+def segments(rng, game_map, count):
+    """
+    Segments from ships and from points of the map: random ones, vertical and horizontal ones, ones running along the
+    lines between cells, single points, and ones ending on cell corners.
+    """
+    ships = game_map._all_ships()
+
+    def point():
+        return Position(rng.uniform(0, game_map.width), rng.uniform(0, game_map.height))
+
+    def grid_point():
+        return Position(rng.randrange(int(game_map.width / CELL_SIZE)) * CELL_SIZE,
+                        rng.randrange(int(game_map.height / CELL_SIZE)) * CELL_SIZE)
+
+    result = []
+    for case in range(count):
+        start = rng.choice(ships) if case % 2 else point()
+        length = rng.choice([0.5, 3, 7, 30])
+        kind = case % 6
+        if kind == 0:
+            end = point()
+        elif kind == 1:
+            end = Position(start.x, start.y + rng.choice([-length, length]))
+        elif kind == 2:
+            end = Position(start.x + rng.choice([-length, length]), start.y)
+        elif kind == 3:
+            start = grid_point()
+            if rng.random() < 0.5:
+                end = Position(start.x, start.y + rng.choice([-1, 1]) * CELL_SIZE * rng.randint(1, 4))
+            else:
+                end = Position(start.x + rng.choice([-1, 1]) * CELL_SIZE * rng.randint(1, 4), start.y)
+        elif kind == 4:
+            end = Position(start.x, start.y)
+        else:
+            end = grid_point()
+        result.append((start, end))
+    return result
+
+
+class TestSpatialGrid(unittest.TestCase):
+    def maps(self):
+        for num_ships, step in ((50, None), (600, None), (600, CELL_SIZE / 2), (300, CELL_SIZE)):
+            map_string = synthetic_map_string(num_ships, num_players=3, seed=SEED + num_ships)
+            if step is not None:
+                map_string = snapped_map_string(map_string, step)
+            game_map = Map(0, 240, 160)
+            game_map._parse(map_string)
+            yield game_map
+
+    def test_obstacles_between_matches_full_scan(self):
+        rng = random.Random(SEED)
+        for game_map in self.maps():
+            for start, end in segments(rng, game_map, SEGMENTS):
+                self.assertEqual(game_map.obstacles_between(start, end), full_scan_obstacles(game_map, start, end))
+
+    def test_intersects_entity_matches_full_scan(self):
+        rng = random.Random(SEED)
+        for game_map in self.maps():
+            targets = game_map._all_ships() + [end for _, end in segments(rng, game_map, SEGMENTS)]
+            for target in targets:
+                self.assertIs(game_map._intersects_entity(target), full_scan_intersection(game_map, target))
+
+    def test_candidates_cover_every_fudge(self):
+        rng = random.Random(SEED)
+        for game_map in self.maps():
+            entities = game_map.all_planets() + game_map._all_ships()
+            grid = SpatialGrid(entities, cell_size=CELL_SIZE)
+            for start, end in segments(rng, game_map, SEGMENTS):
+                for fudge in (0, 0.1, grid.margin, grid.margin + 0.5, 5 * constants.SHIP_RADIUS):
+                    candidates = grid.segment_candidates(start, end, fudge)
+                    self.assertEqual(candidates, sorted(set(candidates)))
+                    hits = [index for index, foreign_entity in enumerate(entities)
+                            if collision.intersect_segment_circle(start, end, foreign_entity, fudge=fudge)]
+                    self.assertTrue(set(hits) <= set(candidates), (start, end, fudge))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from tsmlstarterbot.common import *
+from tsmlstarterbot.training_data import split_games, FrameBatches
+
+SEED = 0
+
+
+class TestTrainingData(unittest.TestCase):
+    def test_split_games(self):
+        game_ids = np.repeat(np.arange(10), np.arange(1, 11))
+        train_rows, validation_rows = split_games(len(game_ids), 0.2, game_ids, seed=SEED)
+
+        self.assertEqual(sorted(np.concatenate([train_rows, validation_rows])), list(range(len(game_ids))))
+        self.assertEqual(len(np.unique(game_ids[validation_rows])), 2)
+        self.assertFalse(set(game_ids[train_rows]) & set(game_ids[validation_rows]))
+
+        train_rows, validation_rows = split_games(100, 0.2)
+        self.assertEqual(validation_rows.tolist(), list(range(80, 100)))
+
+    def test_batches_cover_every_frame_once(self):
+        frames = 1000
+        features = np.arange(frames * PLANET_MAX_NUM * PER_PLANET_FEATURES, dtype=np.float64).reshape(
+            (frames, PLANET_MAX_NUM, PER_PLANET_FEATURES))
+        outputs = features[:, :, 0]
+        rows = np.flatnonzero(np.arange(frames) % 7 != 3)
+
+        for shuffle_buffer in (0, 50, 5000):
+            batches = FrameBatches(features, outputs, rows, batch_size=64, shuffle_buffer=shuffle_buffer,
+                                   chunk_size=30, seed=SEED)
+            epochs = [list(batches) for _ in range(2)]
+            for epoch in epochs:
+                self.assertEqual(len(epoch), len(batches))
+                self.assertTrue(all(len(x) == 64 for x, _ in epoch[:-1]))
+                seen = np.concatenate([x[:, 0, 0] for x, _ in epoch]) / (PLANET_MAX_NUM * PER_PLANET_FEATURES)
+                if shuffle_buffer:
+                    np.testing.assert_array_equal(np.sort(seen), rows)
+                else:
+                    np.testing.assert_array_equal(seen, rows)
+                for x, y in epoch:
+                    np.testing.assert_array_equal(x[:, :, 0], y)
+            if shuffle_buffer:
+                self.assertFalse(np.array_equal(epochs[0][0][0], epochs[1][0][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
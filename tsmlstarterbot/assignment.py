@@ -0,0 +1,277 @@
+"""
+Assignment of the undocked ships to the planets the neural net wants them sent to.
+
+The net gives the share of the ships each planet should get. planet_quotas turns the shares into a number of ships
+per planet, then the ships are assigned so that every planet gets its number of ships and the total distance flown is
+as small as possible. This is a transportation problem: ships are the sources, planets the sinks. Since there are only
+a few planets, it is solved on the graph of the planets, where the edge q -> r is the cheapest way to move one of the
+ships of q to r, instead of on the much larger graph of the ships.
+
+    - solve_optimal starts from the closest planet of every ship, and moves the ships in excess along shortest paths
+      (successive shortest paths of a min-cost flow).
+    - greedy_ships is the greedy assignment of the bot, every planet taking the closest ship left in turn.
+    - improve_assignment starts from the greedy assignment, and cancels the cycles of moves which shorten
+      the total distance, until there is none left, which is optimal, or until a deadline.
+"""
+import time
+import heapq
+
+import numpy as np
+
+from tsmlstarterbot.features import square
+
+# Improvements smaller than this are rounding errors, ignoring them keeps zero cost cycles from being cancelled forever
+EPSILON = 1e-9
+
+
+def distance_matrix(ship_x, ship_y, planet_x, planet_y):
+    """
+    Distances between the centers of every ship and every planet, equal to the bit to those of
+    Entity.calculate_distance_between.
+
+    :return: array of shape (ships, planets)
+    """
+    dx = np.asarray(planet_x, dtype=float)[None, :] - np.asarray(ship_x, dtype=float)[:, None]
+    dy = np.asarray(planet_y, dtype=float)[None, :] - np.asarray(ship_y, dtype=float)[:, None]
+    return np.sqrt(square(dx) + square(dy))
+
+
+def planet_quotas(predictions, planet_ids, number_of_ships):
+    """
+    Hand out the ships one at a time, each to the planet which is owed the most ships, predictions[planet id] *
+    number_of_ships in total. Ties go to the lowest planet id.
+
+    :param predictions: share of the ships of every planet, indexed by planet id
+    :param planet_ids: ids of the planets of the map
+    :param number_of_ships: number of ships to hand out
+    :return: the index in planet_ids of the planet every ship is handed to, in order
+    """
+    planet_heap = [(-predictions[planet_id] * number_of_ships, planet_id, index)
+                   for index, planet_id in enumerate(planet_ids)]
+    heapq.heapify(planet_heap)
+    picks = []
+    for _ in range(number_of_ships if planet_heap else 0):
+        ships_to_send, planet_id, index = planet_heap[0]
+        heapq.heapreplace(planet_heap, (-(-ships_to_send - 1), planet_id, index))
+        picks.append(index)
+    return picks
+
+
+def _transfer_costs(distances, assignment, num_planets):
+    """
+    :return: array of shape (planets, planets), the smallest increase of the total distance when one of the ships of
+    planet q goes to planet r instead (inf if q has no ship or q == r)
+    """
+    assigned = np.flatnonzero(assignment >= 0)
+    costs = np.full((num_planets, num_planets), np.inf)
+    if len(assigned) == 0:
+        return costs
+    order = assigned[np.argsort(assignment[assigned], kind='stable')]
+    planets, starts = np.unique(assignment[order], return_index=True)
+    deltas = distances[order] - distances[order, assignment[order]][:, None]
+    costs[planets] = np.minimum.reduceat(deltas, starts, axis=0)
+    np.fill_diagonal(costs, np.inf)
+    return costs
+
+
+def _moved_ship(distances, assignment, source, destination):
+    """
+    :return: the ship of planet source which adds the least distance when moved to planet destination
+    """
+    ships = np.flatnonzero(assignment == source)
+    return ships[np.argmin(distances[ships, destination] - distances[ships, source])]
+
+
+def _relax(distance, costs):
+    """
+    One round of Bellman-Ford on the graph of the planets.
+
+    :return: the new distances, and the predecessor of every planet whose distance improved (-1 for the others)
+    """
+    candidates = distance[:, None] + costs
+    best = np.argmin(candidates, axis=0)
+    new_distance = candidates[best, np.arange(len(distance))]
+    improved = new_distance < distance - EPSILON
+    return np.where(improved, new_distance, distance), np.where(improved, best, -1)
+
+
+def _augment(distances, assignment, load, capacities):
+    """
+    Move one ship out of an overfull planet, along the shortest path (in added distance) to a planet with a free place,
+    possibly moving ships between other planets on the way. Without negative cycles before, there are none after
+    (successive shortest paths), so num_planets rounds of Bellman-Ford are enough.
+    """
+    num_planets = len(load)
+    costs = _transfer_costs(distances, assignment, num_planets)
+    distance = np.where(load > capacities, 0.0, np.inf)
+    predecessor = np.full(num_planets, -1)
+    for _ in range(num_planets):
+        distance, improved_from = _relax(distance, costs)
+        if (improved_from < 0).all():
+            break
+        predecessor = np.where(improved_from >= 0, improved_from, predecessor)
+
+    free = np.flatnonzero(load < capacities)
+    planet = free[np.argmin(distance[free])]
+    moves = []
+    while predecessor[planet] >= 0:
+        moves.append((_moved_ship(distances, assignment, predecessor[planet], planet), planet))
+        planet = predecessor[planet]
+    for moved, destination in moves:
+        assignment[moved] = destination
+    load[moves[0][1]] += 1
+    load[planet] -= 1
+
+
+def solve_optimal(distances, capacities):
+    """
+    Assign every ship to a planet, with at most capacities[p] ships on planet p, minimizing the total distance.
+
+    Every ship starts at its closest planet, which is the optimal assignment without capacities. The ships in excess
+    are then moved one at a time along shortest paths, which keeps the assignment optimal.
+
+    :param distances: array of shape (ships, planets), see distance_matrix
+    :param capacities: array of the number of ships each planet may get, summing to at least the number of ships
+    :return: array of the planet (column of distances) of every ship
+    """
+    num_ships, num_planets = distances.shape
+    capacities = np.asarray(capacities)
+    if capacities.sum() < num_ships:
+        raise ValueError("{} ships don't fit in {} places".format(num_ships, capacities.sum()))
+
+    assignment = np.argmin(distances, axis=1) if num_planets else np.zeros(0, dtype=int)
+    load = np.bincount(assignment, minlength=num_planets)
+    while (load > capacities).any():
+        _augment(distances, assignment, load, capacities)
+    return assignment
+
+
+def _closest_ships(column, ship_ids, available, after, count):
+    """
+    The count ships closest to a planet, after a given one, in the order of the ship heaps of the bot: by distance,
+    then by ship id. The ships as close as the last one are all included, so that ties keep their order.
+
+    :param column: distances of every ship to the planet
+    :param ship_ids: ids of the ships
+    :param available: mask of the ships which may be returned
+    :param after: (distance, ship id) of the last ship returned before, None for the first call
+    :param count: number of ships wanted
+    :return: array of ships (rows of the distances), sorted
+    """
+    candidates = available.copy()
+    if after is not None:
+        after_distance, after_id = after
+        candidates &= (column > after_distance) | ((column == after_distance) & (ship_ids > after_id))
+    candidates = np.flatnonzero(candidates)
+    if count < len(candidates):
+        threshold = column[candidates[np.argpartition(column[candidates], count - 1)[count - 1]]]
+        candidates = candidates[column[candidates] <= threshold]
+    return candidates[np.lexsort((ship_ids[candidates], column[candidates]))]
+
+
+def greedy_ships(distances, picks, ship_ids=None, deadline=None):
+    """
+    The greedy assignment of the bot: every planet of picks in turn takes the closest ship not taken yet, the one with
+    the lowest id in case of a tie.
+
+    Rather than a heap of all the ships for every planet, most of whose entries end up taken by other planets, the
+    ships of a planet are only sorted when it first takes one, and then only as many as it still wants (with some spare
+    for the ones other planets take in the meantime), more being sorted if they run out.
+
+    :param distances: array of shape (ships, planets), see distance_matrix
+    :param picks: planets (columns of distances) in the order they take a ship, see planet_quotas
+    :param ship_ids: ids of the ships, breaking the ties. The row numbers if None.
+    :param deadline: time (in seconds since the Epoch) after which the remaining picks get no ship
+    :return: array of the ship (row of distances) taken by every pick, shorter than picks if the deadline passed
+    """
+    num_ships, num_planets = distances.shape
+    ship_ids = np.arange(num_ships) if ship_ids is None else np.asarray(ship_ids)
+    picks = np.asarray(picks, dtype=int)
+    wanted = np.bincount(picks, minlength=num_planets)
+    available = np.ones(num_ships, dtype=bool)
+    # Sorted closest ships of every planet, and how far along them the planet is
+    orders = [None] * num_planets
+    positions = [0] * num_planets
+
+    ships = []
+    for planet in picks.tolist():
+        order, position = orders[planet], positions[planet]
+        while order is None or position == len(order) or not available[order[position]]:
+            if order is None or position == len(order):
+                after = None if order is None else (distances[order[-1], planet], ship_ids[order[-1]])
+                order = _closest_ships(distances[:, planet], ship_ids, available, after, 2 * wanted[planet])
+                orders[planet], position = order, 0
+            else:
+                position += 1
+        ship = int(order[position])
+        positions[planet] = position + 1
+        wanted[planet] -= 1
+        available[ship] = False
+        ships.append(ship)
+
+        if deadline is not None and time.time() >= deadline:
+            break
+    return np.array(ships, dtype=int)
+
+
+def assign_greedy(distances, picks):
+    """
+    :param distances: array of shape (ships, planets), see distance_matrix
+    :param picks: planets (columns of distances) in the order they take a ship, see planet_quotas
+    :return: array of the planet of every ship in the greedy assignment (see greedy_ships), -1 for the ships no planet
+    took
+    """
+    assignment = np.full(distances.shape[0], -1)
+    assignment[greedy_ships(distances, picks)] = picks
+    return assignment
+
+
+def improve_assignment(distances, assignment, deadline=None):
+    """
+    Shorten the total distance of an assignment without changing the number of ships of any planet, by moving ships
+    along the cycles of planets which shorten it, until none is left, which makes it optimal, or until the deadline.
+
+    :param distances: array of shape (ships, planets), see distance_matrix
+    :param assignment: array of the planet of every ship, modified in place
+    :param deadline: time (in seconds since the Epoch) after which the assignment is returned as it is
+    :return: assignment, and whether it is optimal
+    """
+    num_planets = distances.shape[1]
+    while deadline is None or time.time() < deadline:
+        costs = _transfer_costs(distances, assignment, num_planets)
+        distance = np.zeros(num_planets)
+        predecessor = np.full(num_planets, -1)
+        for _ in range(num_planets):
+            distance, improved_from = _relax(distance, costs)
+            if (improved_from < 0).all():
+                return assignment, True
+            predecessor = np.where(improved_from >= 0, improved_from, predecessor)
+            cycle_planet = int(np.flatnonzero(improved_from >= 0)[0])
+
+        # Still improving after num_planets rounds: following the predecessors leads into a cycle shortening the total
+        for _ in range(num_planets):
+            cycle_planet = predecessor[cycle_planet]
+        cycle = [cycle_planet]
+        while predecessor[cycle[-1]] != cycle_planet:
+            cycle.append(predecessor[cycle[-1]])
+        moves = [(_moved_ship(distances, assignment, predecessor[planet], planet), planet) for planet in cycle]
+        for moved, destination in moves:
+            assignment[moved] = destination
+    return assignment, False
+
+
+def solve(distances, picks, exact=True, deadline=None):
+    """
+    Assign the ships to the planets, each planet getting as many ships as it appears in picks.
+
+    :param distances: array of shape (ships, planets), see distance_matrix
+    :param picks: planets (columns of distances) handed a ship, one per ship, see planet_quotas
+    :param exact: whether to find the optimal assignment whatever the time it takes. Otherwise the greedy assignment
+    is improved until the deadline.
+    :param deadline: time (in seconds since the Epoch) by which the approximate assignment must be returned
+    :return: array of the planet of every ship
+    """
+    if exact:
+        return solve_optimal(distances, np.bincount(np.asarray(picks, dtype=int), minlength=distances.shape[1]))
+    assignment, _ = improve_assignment(distances, assign_greedy(distances, picks), deadline)
+    return assignment
@@ -1,13 +1,8 @@
-
 import os
-import sys
 import time
-import heapq
 import logging
 import numpy as np
 
-# Disable stderr to import Keras and Tensorflow without breaking game server
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '99' #99
 logging.basicConfig(filename='mybot.log', level=logging.DEBUG)
 
 import warnings
@@ -17,36 +12,37 @@ import hlt
 from hlt.structs import Struct
 from tsmlstarterbot.common import *
 from hlt.game_map import get_centroid
-from tsmlstarterbot.cnn_net_model import CNN_Net
+from tsmlstarterbot.numpy_net import NumpyNet
+from tsmlstarterbot.features import produce_features_per_planet
+from tsmlstarterbot.scheduler import TurnScheduler
+from tsmlstarterbot.assignment import distance_matrix, planet_quotas, greedy_ships, solve
 
 
 class Bot:
-    def __init__(self, models_location="../models/cnn_model_v0.hd5", bots_name="Victory_v0"):
-        # Redirect sys.stdout to the file
-        stderr_fn = sys.stderr
-        stdout_fn = sys.stdout
-        sys.stdout = open('./LogSTDOUT.txt', 'w')
-        sys.stderr = open('./LogSTDERR.txt', 'w')
+    # Ways of choosing which ships go to which planet, see produce_ships_to_planets_assignment
+    ASSIGNMENT_MODES = ("greedy", "optimal", "fast")
 
+    def __init__(self, models_location="../models/cnn_model_v0.npz", bots_name="Victory_v0", assignment_mode="greedy"):
+        if assignment_mode not in self.ASSIGNMENT_MODES:
+            raise ValueError("Unknown assignment mode {}, expected one of {}".format(assignment_mode,
+                                                                                    self.ASSIGNMENT_MODES))
         self._name = bots_name
+        self._assignment_mode = assignment_mode
         self._current_directory = os.path.dirname(os.path.abspath(__file__))
-        self._neural_net = CNN_Net(input_size=(PLANET_MAX_NUM, PER_PLANET_FEATURES),
-                                   output_size=PLANET_MAX_NUM, cached_model=True,
-                                   cached_model_path=os.path.join(self._current_directory, models_location),
-                                   seed=11)
-        sys.stdout.close()
-        sys.stderr.close()
-        sys.stderr = stderr_fn
-        sys.stdout = stdout_fn
+        # The model exported by CNN_Net.export_weights (see tsmlstarterbot/export.py), so that neither TensorFlow nor
+        # Keras have to be imported by the bot
+        self._neural_net = NumpyNet(os.path.join(self._current_directory, models_location))
 
         # Run prediction on random data to make sure that code path is executed at least once before the game starts
         random_input_data = np.random.rand(1, PLANET_MAX_NUM, PER_PLANET_FEATURES)
-        predictions = self._neural_net.predict(random_input_data)
+        predictions = self._neural_net.predict_single(random_input_data)
 
 
 
         assert predictions.shape[1] == PLANET_MAX_NUM
 
+        self._scheduler = TurnScheduler()
+
     def play(self):
         """
         Play a game using stdin/stdout.
@@ -58,45 +54,47 @@ class Bot:
         while True:
             # Update the game map.
             game_map = game.update_map()
-            start_time = time.time()
+            self._scheduler.start_turn(game.turn_start_time)
 
             logging.debug('Start turn #{}, structuring...'.format(turn))
-            # Sort all game entities
-            # S: ships
-            # P: planets
-            # C: count of ships/planets
-            # D: density of ships/planets
-            # enemy_undocked: enemy ships that are not docked
-            S, P = game_map.sort_entities()
-
-            # Calculate centroids (0<centX<1, 0<centY<1)
-            # My flying ships
-            centroid_me = get_centroid(S.my.undocked, game.map.width, game.map.height)
-            # Enemy N's flying ships
-            centroid_enemies = get_centroid(S.enemies.undocked, game.map.width, game.map.height)
-
-            logging.debug('Structuring ended: {}'.format(time.time() - start_time))
-
-            # Change timeout cutoff as function of how many ships there are
-            timeout_lim = 1.9 - len(S.my.all) / 1000
+            with self._scheduler.phase("parse", start=game.turn_start_time):
+                # Sort all game entities
+                # S: ships
+                # P: planets
+                # C: count of ships/planets
+                # D: density of ships/planets
+                # enemy_undocked: enemy ships that are not docked
+                S, P = game_map.sort_entities()
+
+                # Calculate centroids (0<centX<1, 0<centY<1)
+                # My flying ships
+                centroid_me = get_centroid(S.my.undocked, game.map.width, game.map.height)
+                # Enemy N's flying ships
+                centroid_enemies = get_centroid(S.enemies.undocked, game.map.width, game.map.height)
 
             # Produce features for each planet.
-            features = self.produce_features_per_planet(game_map)
+            with self._scheduler.phase("features"):
+                features = self.produce_features_per_planet(game_map)
 
             # Find predictions which planets we should send ships to.
             # predictions shape: [1, PER_PLANET_FEATURES] -> [1, 11]
-            predictions = np.squeeze(self._neural_net.predict(features))
+            with self._scheduler.phase("inference"):
+                predictions = np.squeeze(self._neural_net.predict_single(features))
             logging.debug('Predictions type: {} and shape: {}'.format(type(predictions), predictions.shape))
+            logging.debug('Inference latency: {}'.format(self._neural_net.inference_latency))
 
             # Use simple greedy algorithm to assign closest ships to each planet according to predictions.
-            ships_to_planets_assignment = self.produce_ships_to_planets_assignment(game_map, S, P, predictions,
-                                                                                   start_time, timeout_lim)
+            with self._scheduler.phase("assignment"):
+                ships_to_planets_assignment = self.produce_ships_to_planets_assignment(game_map, S, P, predictions)
 
             # Produce halite instruction for each ship.
-            instructions = self.produce_instructions(game_map, ships_to_planets_assignment, start_time)
+            with self._scheduler.phase("navigation"):
+                instructions = self.produce_instructions(game_map, ships_to_planets_assignment)
 
             # Send the command.
             game.send_command_queue(instructions)
+            self._scheduler.log_turn(turn)
+            turn += 1
 
 
 
@@ -109,72 +107,21 @@ class Bot:
         :param game_map: game map
         :return: 2-D array where i-th row represents set of features of the i-th planet
         """
-        feature_matrix = [[0 for _ in range(PER_PLANET_FEATURES)] for _ in range(PLANET_MAX_NUM)]
-
-        for planet in game_map.all_planets():
-
-            # Compute "ownership" feature - 0 if planet is not occupied, 1 if occupied by us, -1 if occupied by enemy.
-            if planet.owner == game_map.get_me():
-                ownership = 1
-            elif planet.owner is None:
-                ownership = 0
-            else:  # owned by enemy
-                ownership = -1
-
-            my_best_distance = 10000
-            enemy_best_distance = 10000
-
-            gravity = 0
-
-            health_weighted_ship_distance = 0
-            sum_of_health = 0
-
-            for player in game_map.all_players():
-                for ship in player.all_ships():
-                    d = ship.calculate_distance_between(planet)
-                    if player == game_map.get_me():
-                        my_best_distance = min(my_best_distance, d)
-                        sum_of_health += ship.health
-                        health_weighted_ship_distance += d * ship.health
-                        gravity += ship.health / (d * d)
-                    else:
-                        enemy_best_distance = min(enemy_best_distance, d)
-                        gravity -= ship.health / (d * d)
-
-            distance_from_center = distance(planet.x, planet.y, game_map.width / 2, game_map.height / 2)
-
-            health_weighted_ship_distance = health_weighted_ship_distance / sum_of_health
-
-            remaining_docking_spots = planet.num_docking_spots - len(planet.all_docked_ships())
-            signed_current_production = planet.current_production * ownership
-
-            is_active = remaining_docking_spots > 0 or ownership != 1
-
-            feature_matrix[planet.id] = [
-                planet.health,
-                remaining_docking_spots,
-                planet.remaining_resources,
-                signed_current_production,
-                gravity,
-                my_best_distance,
-                enemy_best_distance,
-                ownership,
-                distance_from_center,
-                health_weighted_ship_distance,
-                is_active
-            ]
-
-        return np.array(feature_matrix).reshape((1, PLANET_MAX_NUM, PER_PLANET_FEATURES))
+        return produce_features_per_planet(game_map)
 
 
     def produce_ships_to_planets_assignment(self, game_map, ships_struct: Struct,
                                             planets_struct: Struct,
-                                            predictions, start_time, time_limit):
+                                            predictions):
         """
         Given the predictions from the neural net, create assignment (undocked ship -> planet) deciding which
         planet each ship should go to. Note that we already know how many ships is going to each planet
         (from the neural net), we just don't know which ones.
 
+        In the greedy mode, the planet owed the most ships takes the closest ship left, one ship at a time. The optimal
+        and fast modes give the planets the same numbers of ships, minimizing the total distance (see
+        tsmlstarterbot.assignment). The fast mode improves the greedy assignment until the time of the phase is up.
+
         :param game_map: game map
         :param predictions: probability distribution describing where the ships should be sent
         :return: list of pairs (ship, planet)
@@ -182,56 +129,26 @@ class Bot:
 
         undocked_ships = ships_struct.my.undocked
 
-        # greedy assignment
-        assignment = []
-        number_of_ships_to_assign = len(undocked_ships)
-
-        if number_of_ships_to_assign == 0:
+        planets = game_map.all_planets()
+        if not undocked_ships or not planets:
             return []
 
-        planet_heap = []
-        ship_heaps = [[] for _ in range(PLANET_MAX_NUM)]
-
-        # Create heaps for greedy ship assignment.
-        for planet in game_map.all_planets():
-            # We insert negative number of ships as a key, since we want max heap here.
-            heapq.heappush(planet_heap, (-predictions[planet.id] * number_of_ships_to_assign, planet.id))
-            h = []
-            for ship in undocked_ships:
-                d = ship.calculate_distance_between(planet)
-                heapq.heappush(h, (d, ship.id))
-            ship_heaps[planet.id] = h
-
-        # Create greedy assignment
-        already_assigned_ships = set()
-
-        while number_of_ships_to_assign > len(already_assigned_ships):
-            # Remove the best planet from the heap and put it back in with adjustment.
-            # (Account for the fact the distribution values are stored as negative numbers on the heap.)
-            ships_to_send, best_planet_id = heapq.heappop(planet_heap)
-            ships_to_send = -(-ships_to_send - 1)
-            heapq.heappush(planet_heap, (ships_to_send, best_planet_id))
-
-            # Find the closest unused ship to the best planet.
-            _, best_ship_id = heapq.heappop(ship_heaps[best_planet_id])
-            while best_ship_id in already_assigned_ships:
-                _, best_ship_id = heapq.heappop(ship_heaps[best_planet_id])
-
-            # Assign the best ship to the best planet.
-            assignment.append(
-                (game_map.get_me().get_ship(best_ship_id), game_map.get_planet(best_planet_id)))
-            already_assigned_ships.add(best_ship_id)
-
-            # Check time-out to see if we need to stop analyzing ships
-            elapsed = time.time() - start_time
-            if elapsed > time_limit:
-                logging.warning('break={}'.format(elapsed))
-                break
-
-        return assignment
-
-
-    def produce_instructions(self, game_map, ships_to_planets_assignment, round_start_time):
+        picks = planet_quotas(predictions, [planet.id for planet in planets], len(undocked_ships))
+        distances = distance_matrix([ship.x for ship in undocked_ships], [ship.y for ship in undocked_ships],
+                                    [planet.x for planet in planets], [planet.y for planet in planets])
+        deadline = time.time() + self._scheduler.time_left()
+
+        if self._assignment_mode != "greedy":
+            planet_of_ship = solve(distances, picks, exact=self._assignment_mode == "optimal", deadline=deadline)
+            return [(ship, planets[planet]) for ship, planet in zip(undocked_ships, planet_of_ship.tolist())]
+
+        ships = greedy_ships(distances, picks, [ship.id for ship in undocked_ships], deadline=deadline)
+        if len(ships) < len(picks):
+            # Out of time: the remaining ships get no orders
+            logging.warning('Out of time in assignment, {} ships assigned'.format(len(ships)))
+        return [(undocked_ships[ship], planets[planet]) for ship, planet in zip(ships.tolist(), picks)]
+
+    def produce_instructions(self, game_map, ships_to_planets_assignment):
         """
         Given list of pairs (ship, planet) produce instructions for every ship to go to its respective planet.
         If the planet belongs to the enemy, we go to the weakest docked ship.
@@ -239,12 +156,12 @@ class Bot:
 
         :param game_map: game map
         :param ships_to_planets_assignment: list of tuples (ship, planet)
-        :param round_start_time: time (in seconds) between the Epoch and the start of this round
         :return: list of instructions to send to the Halite engine
         """
         command_queue = []
         # Send each ship to its planet
-        for ship, planet in ships_to_planets_assignment:
+        for index, (ship, planet) in enumerate(ships_to_planets_assignment):
+            ships_left = len(ships_to_planets_assignment) - index
             speed = hlt.constants.MAX_SPEED
 
             is_planet_friendly = not planet.is_owned() or planet.owner == game_map.get_me()
@@ -254,7 +171,7 @@ class Bot:
                     command_queue.append(ship.dock(planet))
                 else:
                     command_queue.append(
-                        self.navigate(game_map, round_start_time, ship, ship.closest_point_to(planet), speed))
+                        self.navigate(game_map, ship, ship.closest_point_to(planet), speed, ships_left))
             else:
                 docked_ships = planet.all_docked_ships()
                 assert len(docked_ships) > 0
@@ -263,30 +180,31 @@ class Bot:
                     if weakest_ship is None or weakest_ship.health > s.health:
                         weakest_ship = s
                 command_queue.append(
-                    self.navigate(game_map, round_start_time, ship, ship.closest_point_to(weakest_ship), speed))
+                    self.navigate(game_map, ship, ship.closest_point_to(weakest_ship), speed, ships_left))
         return command_queue
 
 
-    def navigate(self, game_map, start_of_round, ship, destination, speed):
+    def navigate(self, game_map, ship, destination, speed, ships_left):
         """
-        Send a ship to its destination. Because "navigate" method in Halite API is expensive, we use that method only if
-        we haven't used too much time yet.
+        Send a ship to its destination. Because "navigate" method in Halite API is expensive, the scheduler decides
+        how many corrections it may use given the time left, or whether we should just thrust towards the destination.
 
         :param game_map: game map
-        :param start_of_round: time (in seconds) between the Epoch and the start of this round
         :param ship: ship we want to send
         :param destination: destination to which we want to send the ship to
         :param speed: speed with which we would like to send the ship to its destination
+        :param ships_left: number of ships still to navigate this turn, including this one
         :return:
         """
-        current_time = time.time()
-        have_time = current_time - start_of_round < 1.2
+        max_corrections = self._scheduler.navigation_corrections(ships_left)
         navigate_command = None
-        if have_time:
-            navigate_command = ship.navigate(destination, game_map, speed=speed, max_corrections=180)
+        if max_corrections > 0:
+            start = time.time()
+            navigate_command = ship.navigate(destination, game_map, speed=speed, max_corrections=max_corrections)
+            self._scheduler.record_navigation(time.time() - start, ship.corrections_tried)
         if navigate_command is None:
             # ship.navigate may return None if it cannot find a path. In such a case we just thrust.
-            logging.warning('Low with time in navigation: {}'.format(have_time))
+            logging.warning('Thrusting without navigation, corrections allowed: {}'.format(max_corrections))
             dist = ship.calculate_distance_between(destination)
             speed = speed if (dist >= speed) else dist
             navigate_command = ship.thrust(speed, ship.calculate_angle_between(destination))
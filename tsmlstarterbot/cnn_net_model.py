@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import warnings
 import numpy as np
 import pandas as pd
@@ -21,6 +22,9 @@ from keras.layers import Conv1D, GlobalAveragePooling1D, MaxPooling1D
 from keras.layers import BatchNormalization
 from keras.losses import CategoricalCrossentropy
 
+from tsmlstarterbot.common import LatencyStats
+from tsmlstarterbot.training_data import split_games, FrameBatches
+
 
 class CNN_Net(object):
     FIRST_LAYER_FILTERS = 32
@@ -32,6 +36,7 @@ class CNN_Net(object):
                  cached_model: bool, cached_model_path: str, seed=None):
 
         np.random.seed(seed)
+        self._seed = seed
         if cached_model:
             # returns an already compiled model
             self._model = load_model(cached_model_path)
@@ -42,6 +47,8 @@ class CNN_Net(object):
                                             optimizer="adam",
                                             metrics=['accuracy'], verbose=False)
 
+        self.inference_latency = LatencyStats()
+        self._predict_step = self._trace_predict_step()
 
 
     def create_model(self, input_size: Tuple[int, int], output_size: int,
@@ -78,17 +85,33 @@ class CNN_Net(object):
 
     def train(self, input_train, target_train, validation_split: float,
               n_epochs: int, batch_size: int, verbose: int,
-              model_version: str)-> NoReturn:
+              model_version: str, game_ids=None, shuffle_buffer: int = 10000)-> NoReturn:
+        """
+        Train the model on batches streamed from the (possibly memory-mapped) arrays, so that the dataset doesn't need
+        to fit in memory.
+
+        :param input_train: features, array of shape (frames, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        :param target_train: expected outputs, array of shape (frames, PLANET_MAX_NUM)
+        :param validation_split: fraction of the games used for validation
+        :param game_ids: game of each frame, to keep the frames of a game on one side of the split.
+        Without it, the last frames are used for validation.
+        :param shuffle_buffer: number of frames mixed together when shuffling the training set
+        """
         print(f"Input features shape: {input_train.shape}")
         print(f"output targets shape: {target_train.shape}")
 
+        train_rows, validation_rows = split_games(len(input_train), validation_split, game_ids, seed=self._seed)
+        print(f"Training frames: {len(train_rows)}, validation frames: {len(validation_rows)}")
+        train_data = self._dataset(FrameBatches(input_train, target_train, train_rows, batch_size,
+                                                shuffle_buffer=shuffle_buffer, seed=self._seed))
+        validation_data = self._dataset(FrameBatches(input_train, target_train, validation_rows, batch_size)) \
+            if len(validation_rows) else None
+
         # Fit data to model
-        history = self._model.fit(input_train, target_train,
-                                  batch_size=batch_size,
+        history = self._model.fit(train_data,
                                   epochs=n_epochs,
                                   verbose=verbose,
-                                  validation_split=validation_split,
-                                  shuffle=True)
+                                  validation_data=validation_data)
 
         # Plot history
         print(f"History consist of: {history.history.keys()}")
@@ -99,15 +122,92 @@ class CNN_Net(object):
         curve_path = os.path.join(current_directory, os.path.pardir, "models", "training_plot.png")
         fig.savefig(curve_path)
 
-        # Save model
+        # Save model, and its TensorFlow-free export for the bot
         self.save(model_save_fn="cnn_model_" + model_version + ".hd5")
+        self.export_weights(os.path.join("../models", "cnn_model_" + model_version + ".npz"))
+
 
+    @staticmethod
+    def _dataset(batches: FrameBatches):
+        """
+        :return: tf.data pipeline over the batches, reading the next batches while the current one is trained on
+        """
+        output_signature = (tf.TensorSpec(shape=(None,) + batches.features.shape[1:], dtype=batches.dtype),
+                            tf.TensorSpec(shape=(None,) + batches.outputs.shape[1:], dtype=batches.dtype))
+        return tf.data.Dataset.from_generator(lambda: iter(batches), output_signature=output_signature) \
+            .prefetch(tf.data.AUTOTUNE)
 
     def predict(self, input_data):
         predictions = self._model.predict(input_data)
         return predictions
 
+    def _trace_predict_step(self):
+        """
+        Build a graph-compiled forward pass of the model in inference mode. Unlike Model.predict, calling it does not
+        set up a data adapter and batching loop every time, which dominates the cost of predicting a single sample.
+        """
+        input_signature = [tf.TensorSpec(shape=(None,) + tuple(self._model.input_shape[1:]), dtype=tf.float32)]
+        return tf.function(lambda x: self._model(x, training=False), input_signature=input_signature)
+
+    def predict_single(self, input_data):
+        """
+        Low-latency prediction for the per-turn input of the bot. The latency of every call is recorded in
+        inference_latency.
+
+        :param input_data: array of shape (1, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        :return: array of shape (1, PLANET_MAX_NUM)
+        """
+        start = time.perf_counter()
+        predictions = self._predict_step(tf.convert_to_tensor(input_data, dtype=tf.float32)).numpy()
+        self.inference_latency.record(time.perf_counter() - start)
+        return predictions
+
 
     def save(self, model_save_path="../models",
              model_save_fn="cnn_model.hd5"):
         self._model.save(os.path.join(model_save_path, model_save_fn))
+
+    def export_weights(self, weights_path: str) -> NoReturn:
+        """
+        Export the network to a compact .npz file of numpy arrays, which NumpyNet can run without TensorFlow.
+
+        :param weights_path: path of the .npz file to write
+        """
+        layer_types = []
+        arrays = {}
+        for layer in self._model.layers:
+            layer_type = type(layer).__name__
+            prefix = "layer{}_".format(len(layer_types))
+            config = layer.get_config()
+
+            if layer_type == "InputLayer":
+                continue
+            elif layer_type in ("Conv1D", "Dense"):
+                if layer_type == "Conv1D" and (config["padding"] != "valid" or tuple(config["dilation_rate"]) != (1,)):
+                    raise ValueError("Only 'valid' padding without dilation is supported for Conv1D layers")
+                weights = layer.get_weights()
+                arrays[prefix + "kernel"] = weights[0]
+                arrays[prefix + "bias"] = weights[1] if config["use_bias"] else np.zeros(weights[0].shape[-1],
+                                                                                        dtype=weights[0].dtype)
+                arrays[prefix + "activation"] = np.array(config["activation"])
+                if layer_type == "Conv1D":
+                    arrays[prefix + "strides"] = np.array(config["strides"][0])
+            elif layer_type == "BatchNormalization":
+                # Weights are [gamma (if scale), beta (if center), moving_mean, moving_variance]
+                *affine, moving_mean, moving_variance = layer.get_weights()
+                arrays[prefix + "gamma"] = affine.pop(0) if config["scale"] else np.ones_like(moving_mean)
+                arrays[prefix + "beta"] = affine.pop(0) if config["center"] else np.zeros_like(moving_mean)
+                arrays[prefix + "moving_mean"] = moving_mean
+                arrays[prefix + "moving_variance"] = moving_variance
+                arrays[prefix + "epsilon"] = np.array(config["epsilon"], dtype=moving_mean.dtype)
+            elif layer_type == "MaxPooling1D":
+                if config["padding"] != "valid":
+                    raise ValueError("Only 'valid' padding is supported for MaxPooling1D layers")
+                arrays[prefix + "pool_size"] = np.array(config["pool_size"][0])
+                arrays[prefix + "strides"] = np.array(config["strides"][0])
+            elif layer_type not in ("GlobalAveragePooling1D", "Dropout"):
+                raise ValueError("Layer {} of type {} can't be exported".format(layer.name, layer_type))
+
+            layer_types.append(layer_type)
+
+        np.savez(weights_path, layers=np.array(layer_types), **arrays)
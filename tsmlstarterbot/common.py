@@ -1,4 +1,7 @@
 import math
+from collections import deque
+
+import numpy as np
 
 # Max number of planets.
 PLANET_MAX_NUM = 28
@@ -27,3 +30,36 @@ def distance2(x1, y1, x2, y2):
 
 def distance(x1, y1, x2, y2):
     return math.sqrt(distance2(x1, y1, x2, y2))
+
+
+class LatencyStats:
+    """
+    Keeps the most recent durations of an operation and reports their percentiles.
+    """
+    def __init__(self, history=1000):
+        """
+        :param history: number of most recent durations to keep
+        """
+        self._durations = deque(maxlen=history)
+
+    def record(self, duration):
+        """
+        :param duration: duration of one call, in seconds
+        """
+        self._durations.append(duration)
+
+    def percentile(self, q):
+        """
+        :param q: percentile to compute, between 0 and 100
+        :return: the percentile of the recent durations in seconds, or None if nothing was recorded
+        """
+        return float(np.percentile(self._durations, q)) if self._durations else None
+
+    def __len__(self):
+        return len(self._durations)
+
+    def __str__(self):
+        if not self._durations:
+            return "no calls"
+        return "p50={:.3f}ms p99={:.3f}ms over {} calls".format(self.percentile(50) * 1000,
+                                                              self.percentile(99) * 1000, len(self))
@@ -0,0 +1,291 @@
+"""
+Play many games between bots and compare their results.
+
+    python -m tsmlstarterbot.compare --engine bin/halite --games 20 --workers 4 \
+        "python3 MyBotShortTraining.py" "python3 MyBot.py"
+
+Games run concurrently, each in its own directory of --output_directory, with its replay and the logs of the engine.
+Bots change seats from one game to the next, so that no bot always plays from the same position. The win rate of every
+bot is reported with a 95% confidence interval, along with the time its turns took.
+
+The engine is any command accepting the arguments of --engine_args followed by the commands of the bots, and writing
+an uncompressed replay into the replay directory, such as the Halite II binary or the local simulator:
+
+    python -m tsmlstarterbot.compare --engine "python3 -m tsmlstarterbot.simulator" ...
+
+Turn times are measured by running every bot behind a proxy which forwards its input and output, so they don't depend
+on the engine either.
+"""
+import os
+import sys
+import glob
+import json
+import math
+import time
+import random
+import shlex
+import functools
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from collections import namedtuple
+
+import numpy as np
+
+from tsmlstarterbot.parsing import read_replay_header
+
+# Map sizes of Halite II games
+MAP_SIZES = ((240, 160), (264, 176), (288, 192), (312, 208), (336, 224), (360, 240), (384, 256))
+
+# Arguments of the Halite II engine, formatted with the attributes of the Game
+DEFAULT_ENGINE_ARGS = '-d "{width} {height}" -s {seed} -i {replay_directory} --no-compression -q'
+
+# Two-sided 95% confidence
+Z_95 = 1.959964
+
+# bots are the commands of the bots in the order of their seats, bot_ids their index in the list of bots compared
+Game = namedtuple("Game", ["index", "seed", "width", "height", "bots", "bot_ids", "directory"])
+# ranks and turn_times are dictionaries bot id -> rank in the game, durations of its turns in seconds
+GameResult = namedtuple("GameResult", ["game", "ranks", "turn_times", "replay", "error"])
+
+
+def schedule_games(bots, num_games, output_directory, seed=None, map_sizes=MAP_SIZES):
+    """
+    :param bots: commands of the bots, all of them play every game
+    :param num_games: number of games
+    :param output_directory: directory where the directory of each game is created
+    :param seed: seed choosing the seeds and the map sizes of the games
+    :param map_sizes: map sizes to choose from
+    :return: list of Game. The bots are rotated by one seat from one game to the next.
+    """
+    rng = random.Random(seed)
+    games = []
+    for index in range(num_games):
+        width, height = rng.choice(map_sizes)
+        bot_ids = [(seat + index) % len(bots) for seat in range(len(bots))]
+        games.append(Game(index=index, seed=rng.randrange(2 ** 31), width=width, height=height,
+                          bots=tuple(bots[bot_id] for bot_id in bot_ids), bot_ids=tuple(bot_ids),
+                          directory=os.path.join(output_directory, "game-{:04d}".format(index))))
+    return games
+
+
+def _timed_command(command, turn_times_path):
+    """
+    :return: shell command running the bot behind time_turns
+    """
+    return shlex.join([sys.executable, "-m", "tsmlstarterbot.compare", "--time_turns", turn_times_path,
+                       "--bot_directory", os.getcwd(), command])
+
+
+def play_game(game, engine, engine_args=DEFAULT_ENGINE_ARGS, timeout=None):
+    """
+    Run one game with the engine.
+
+    :param game: the Game
+    :param engine: command of the engine
+    :param engine_args: arguments of the engine, formatted with the attributes of the game (and replay_directory)
+    :param timeout: seconds after which the game is abandoned
+    :return: GameResult, with the rank of every bot, the durations of its turns and the path to the replay. If the
+    game failed, ranks is None and error tells why.
+    """
+    directory = os.path.abspath(game.directory)
+    os.makedirs(directory, exist_ok=True)
+    turn_times_paths = [os.path.join(directory, "turn_times_{}.txt".format(seat)) for seat in range(len(game.bots))]
+    # Leftovers of a previous run in the same directory
+    for path in turn_times_paths + glob.glob(os.path.join(directory, "*.hlt")):
+        if os.path.exists(path):
+            os.remove(path)
+
+    args = shlex.split(engine_args.format(replay_directory=directory, **game._asdict()))
+    commands = [_timed_command(bot, path) for bot, path in zip(game.bots, turn_times_paths)]
+    # The proxies import this package, wherever the engine runs them from
+    python_path = [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+    python_path += [path for path in os.environ.get("PYTHONPATH", "").split(os.pathsep) if path]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(python_path))
+
+    with open(os.path.join(directory, "engine_output.txt"), "w") as output:
+        try:
+            completed = subprocess.run(shlex.split(engine) + args + commands, cwd=directory, env=env, stdout=output,
+                                       stderr=subprocess.STDOUT, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return GameResult(game, None, None, None, str(e))
+    if completed.returncode != 0:
+        return GameResult(game, None, None, None, "engine exited with code {}".format(completed.returncode))
+
+    replays = glob.glob(os.path.join(directory, "*.hlt"))
+    if not replays:
+        return GameResult(game, None, None, None, "no replay in {}".format(directory))
+    replay = max(replays, key=os.path.getmtime)
+
+    try:
+        stats = read_replay_header(replay)["stats"]
+    except (ValueError, KeyError) as e:
+        return GameResult(game, None, None, replay, "unreadable replay: {}".format(e))
+
+    # Player ids are the seats of the bots
+    ranks = {bot_id: stats[str(seat)]["rank"] for seat, bot_id in enumerate(game.bot_ids)}
+    turn_times = {bot_id: _read_turn_times(path) for bot_id, path in zip(game.bot_ids, turn_times_paths)}
+    return GameResult(game, ranks, turn_times, replay, None)
+
+
+def _read_turn_times(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        # The first line is the initialization, until the bot sent its name
+        return [float(line) for line in f.read().split()[1:]]
+
+
+def run_games(games, engine, engine_args=DEFAULT_ENGINE_ARGS, workers=1, timeout=None):
+    """
+    Play the games, workers at a time.
+
+    :return: iterator over the GameResult of the games, in the order they finish
+    """
+    play = functools.partial(play_game, engine=engine, engine_args=engine_args, timeout=timeout)
+    if workers <= 1:
+        yield from map(play, games)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(play, games)
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """
+    Wilson score interval of a binomial proportion, which behaves well for few games and win rates close to 0 or 1.
+
+    :return: lower and upper bounds of the interval, (0, 1) without trials
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    center = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    margin = z / (1 + z * z / trials) * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def summarize(results, bots):
+    """
+    :param results: GameResult of the games
+    :param bots: commands of the bots
+    :return: list of the statistics of every bot: games, wins, win rate with its confidence interval, average rank and
+    turn times (mean, 95th percentile and max, in seconds), and the number of failed games
+    """
+    summary = []
+    played = [result for result in results if result.error is None]
+    for bot_id, bot in enumerate(bots):
+        ranks = [result.ranks[bot_id] for result in played]
+        wins = sum(rank == 1 for rank in ranks)
+        turn_times = np.array([t for result in played for t in result.turn_times[bot_id]])
+        summary.append({
+            "bot": bot,
+            "games": len(ranks),
+            "wins": wins,
+            "win_rate": wins / len(ranks) if ranks else 0.0,
+            "win_rate_interval": wilson_interval(wins, len(ranks)),
+            "average_rank": float(np.mean(ranks)) if ranks else None,
+            "turns": len(turn_times),
+            "turn_time_mean": float(turn_times.mean()) if len(turn_times) else None,
+            "turn_time_p95": float(np.percentile(turn_times, 95)) if len(turn_times) else None,
+            "turn_time_max": float(turn_times.max()) if len(turn_times) else None,
+        })
+    return summary, len(results) - len(played)
+
+
+def print_summary(summary, failed_games):
+    print("{:<40} {:>6} {:>6} {:>18} {:>8} {:>10} {:>10} {:>10}".format(
+        "bot", "games", "wins", "win rate (95% CI)", "avg rank", "turn, ms", "p95, ms", "max, ms"))
+    for stats in summary:
+        low, high = stats["win_rate_interval"]
+        times = ["{:.1f}".format(stats[key] * 1000) if stats[key] is not None else "-"
+                 for key in ("turn_time_mean", "turn_time_p95", "turn_time_max")]
+        average_rank = "{:.2f}".format(stats["average_rank"]) if stats["average_rank"] is not None else "-"
+        print("{:<40} {:>6} {:>6} {:>18} {:>8} {:>10} {:>10} {:>10}".format(
+            stats["bot"][:40], stats["games"], stats["wins"], "{:.2f} ({:.2f}-{:.2f})".format(stats["win_rate"], low, high),
+            average_rank, *times))
+    if failed_games:
+        print("{} games failed, see engine_output.txt in their directories.".format(failed_games))
+
+
+def time_turns(command, turn_times_path, directory=None):
+    """
+    Run a bot, forwarding the input of the engine to it and its output to the engine, and append how long it took to
+    answer to every message to turn_times_path, one duration in seconds per line. The durations are written as they
+    come, since the engine may kill the proxy at the end of the game.
+
+    :param command: shell command of the bot
+    :param turn_times_path: file the durations are appended to
+    :param directory: working directory of the bot
+    :return: exit code of the bot
+    """
+    bot = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=directory)
+    last_input = [None]
+
+    def forward_input():
+        for line in iter(sys.stdin.buffer.readline, b""):
+            last_input[0] = time.perf_counter()
+            try:
+                bot.stdin.write(line)
+                bot.stdin.flush()
+            except BrokenPipeError:
+                break
+        bot.stdin.close()
+
+    threading.Thread(target=forward_input, daemon=True).start()
+
+    with open(turn_times_path, "a") as turn_times:
+        for line in iter(bot.stdout.readline, b""):
+            answered = time.perf_counter()
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+            if last_input[0] is not None:
+                turn_times.write("{:.6f}\n".format(answered - last_input[0]))
+                turn_times.flush()
+    return bot.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Halite II match runner")
+    parser.add_argument("bots", nargs="+", help="Commands running the bots")
+    parser.add_argument("--engine", help="Command of the game engine", default="bin/halite")
+    parser.add_argument("--engine_args", help="Arguments of the engine, formatted with the game's seed, width, "
+                                              "height and replay_directory", default=DEFAULT_ENGINE_ARGS)
+    parser.add_argument("--games", type=int, help="Number of games", default=10)
+    parser.add_argument("--workers", type=int, help="Number of games played at the same time",
+                        default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, help="Seed choosing the seeds and map sizes of the games")
+    parser.add_argument("--output_directory", help="Directory of the replays and logs", default="compare")
+    parser.add_argument("--timeout", type=float, help="Seconds after which a game is abandoned")
+    parser.add_argument("--time_turns", help=argparse.SUPPRESS)
+    parser.add_argument("--bot_directory", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.time_turns:
+        sys.exit(time_turns(args.bots[0], args.time_turns, args.bot_directory))
+
+    games = schedule_games(args.bots, args.games, args.output_directory, seed=args.seed)
+    results = []
+    for result in run_games(games, args.engine, args.engine_args, workers=args.workers, timeout=args.timeout):
+        results.append(result)
+        outcome = result.error if result.error else ", ".join(
+            "{}: {}".format(args.bots[bot_id], rank)
+            for bot_id, rank in sorted(result.ranks.items(), key=lambda item: item[1]))
+        print("Game {} ({}x{}, seed {}): {}".format(result.game.index, result.game.width, result.game.height,
+                                                    result.game.seed, outcome))
+
+    summary, failed_games = summarize(results, args.bots)
+    with open(os.path.join(args.output_directory, "results.json"), "w") as f:
+        json.dump({"games": [{"index": result.game.index, "seed": result.game.seed, "width": result.game.width,
+                              "height": result.game.height, "seats": result.game.bots,
+                              "ranks": [result.ranks[bot_id] for bot_id in result.game.bot_ids]
+                              if result.ranks else None,
+                              "replay": result.replay, "error": result.error} for result in sorted(
+                        results, key=lambda result: result.game.index)],
+                   "bots": summary}, f, indent=2)
+    print_summary(summary, failed_games)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import argparse
+import os
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '99'
+from tsmlstarterbot.cnn_net_model import CNN_Net
+from tsmlstarterbot.common import *
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trained Keras model for the TensorFlow-free bot runtime")
+    parser.add_argument("--model", help="Path of the trained .hd5 model", default="../models/cnn_model_v0.hd5")
+    parser.add_argument("--output", help="Path of the .npz file to write (next to the model by default)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.model)[0] + ".npz"
+    net = CNN_Net(input_size=(PLANET_MAX_NUM, PER_PLANET_FEATURES), output_size=PLANET_MAX_NUM,
+                  cached_model=True, cached_model_path=args.model)
+    net.export_weights(output)
+    print("Exported {} to {}".format(args.model, output))
+
+
+if __name__ == "__main__":
+    main()
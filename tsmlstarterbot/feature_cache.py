@@ -0,0 +1,184 @@
+import os
+import struct
+import hashlib
+import tempfile
+
+import numpy as np
+
+from tsmlstarterbot.common import *
+
+# Arrays of a feature cache, each stored in its own .npy file:
+#   features: (frames, PLANET_MAX_NUM, PER_PLANET_FEATURES), the input of the network
+#   outputs: (frames, PLANET_MAX_NUM), the share of the ships sent to each planet
+#   index: (frames, 2), the game and the frame (within the game) of each row
+CACHE_PARTS = ("features", "outputs", "index")
+
+
+def feature_cache_path(location, name, part):
+    """
+    :param location: directory of the cache
+    :param name: name of the cache
+    :param part: one of CACHE_PARTS
+    :return: path of the .npy file of the part
+    """
+    return os.path.join(location, "{}.{}.npy".format(name, part))
+
+
+def load_feature_cache(location, name, mmap_mode='r'):
+    """
+    Open a feature cache written by FeatureCacheWriter. The arrays are memory-mapped, nothing is read or copied
+    until it's used.
+
+    :param location: directory of the cache
+    :param name: name of the cache
+    :param mmap_mode: see numpy.load, None to read the arrays into memory
+    :return: features, outputs and index arrays (see CACHE_PARTS)
+    """
+    return tuple(np.load(feature_cache_path(location, name, part), mmap_mode=mmap_mode) for part in CACHE_PARTS)
+
+
+class _NpyAppender:
+    """
+    A .npy file written one block of rows at a time. The header has a fixed size, so that the final shape can be
+    written over the placeholder once all the rows are known.
+    """
+    HEADER_SIZE = 128
+
+    def __init__(self, path, dtype, row_shape):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._file.write(b" " * self.HEADER_SIZE)
+
+    def append(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[1:] != self.row_shape:
+            raise ValueError("Expected rows of shape {}, got {}".format(self.row_shape, rows.shape[1:]))
+        self._file.write(rows.tobytes())
+        self.rows += len(rows)
+
+    def close(self):
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+
+    def discard(self):
+        self._file.close()
+        os.remove(self.path)
+
+    def _header(self):
+        header = "{{'descr': {!r}, 'fortran_order': False, 'shape': {!r}, }}".format(
+            np.lib.format.dtype_to_descr(self.dtype), (self.rows,) + self.row_shape)
+        magic = b"\x93NUMPY\x01\x00"
+        # Format 1.0: magic string, little-endian length of the header, header padded with spaces ending with \n
+        header_length = self.HEADER_SIZE - len(magic) - 2
+        return magic + struct.pack("<H", header_length) + header.ljust(header_length - 1).encode("latin1") + b"\n"
+
+
+class FeatureCacheWriter:
+    """
+    Writes the features of the parsed games to a feature cache as they come, so that they never have to be held in
+    memory all at once. The files only get their final names when the writer is closed, a cache is therefore
+    either complete or absent.
+    """
+
+    def __init__(self, location, name, dtype=np.float32):
+        """
+        :param location: directory of the cache, created if needed
+        :param name: name of the cache
+        :param dtype: type of the features and outputs
+        """
+        os.makedirs(location, exist_ok=True)
+        self._paths = [feature_cache_path(location, name, part) for part in CACHE_PARTS]
+        row_shapes = [(PLANET_MAX_NUM, PER_PLANET_FEATURES), (PLANET_MAX_NUM,), (2,)]
+        dtypes = [dtype, dtype, np.int64]
+        self._appenders = [_NpyAppender(path + ".tmp", part_dtype, row_shape)
+                           for path, part_dtype, row_shape in zip(self._paths, dtypes, row_shapes)]
+
+    @property
+    def frames(self):
+        return self._appenders[0].rows
+
+    def append_game(self, game_id, features, outputs):
+        """
+        :param game_id: id of the game
+        :param features: features of the frames of the game, shape (frames, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        :param outputs: expected outputs of the frames of the game, shape (frames, PLANET_MAX_NUM)
+        """
+        index = np.column_stack([np.full(len(features), game_id), np.arange(len(features))])
+        for appender, rows in zip(self._appenders, (features, outputs, index)):
+            appender.append(rows)
+
+    def close(self):
+        for appender, path in zip(self._appenders, self._paths):
+            appender.close()
+            os.replace(appender.path, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            for appender in self._appenders:
+                appender.discard()
+
+
+def shard_key(replay_content, bot_to_imitate, code_version):
+    """
+    Name of the shard holding the features of one replay. Any change to the replay, the bot or the feature code gives
+    a different name, so stale shards are never read; they are only left behind.
+
+    :param replay_content: undecoded content of the replay
+    :param bot_to_imitate: name of the bot whose frames are kept
+    :param code_version: version of the code computing the features
+    :return: name of the shard
+    """
+    digest = hashlib.sha1()
+    for part in (replay_content, bot_to_imitate, code_version):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _shard_path(location, key):
+    return os.path.join(location, key + ".npz")
+
+
+def read_shard(location, key):
+    """
+    :param location: directory of the shards
+    :param key: name of the shard, see shard_key
+    :return: features and outputs of the game, or None if the bot didn't play it
+    :raises FileNotFoundError: if the game hasn't been parsed yet
+    """
+    with np.load(_shard_path(location, key)) as shard:
+        if not shard["played"]:
+            return None
+        return shard["features"], shard["outputs"]
+
+
+def write_shard(location, key, game):
+    """
+    Save the features of one game. The shard only gets its final name once complete, so that concurrent writers
+    and interrupted runs never leave a partial shard behind.
+
+    :param location: directory of the shards, created if needed
+    :param key: name of the shard, see shard_key
+    :param game: features and outputs of the game, or None if the bot didn't play it
+    """
+    os.makedirs(location, exist_ok=True)
+    arrays = {"played": game is not None}
+    if game is not None:
+        arrays["features"], arrays["outputs"] = game
+    fd, tmp_path = tempfile.mkstemp(dir=location, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, _shard_path(location, key))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
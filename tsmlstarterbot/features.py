@@ -0,0 +1,271 @@
+import numpy as np
+
+from tsmlstarterbot.common import *
+
+
+def sequential_sum(values):
+    """
+    Sum the last axis strictly left to right. np.sum uses pairwise summation, which rounds differently from the
+    scalar accumulation loops the features were originally written with; a cumulative sum does not.
+
+    :param values: array of shape (..., n)
+    :return: array of shape (...)
+    """
+    if values.shape[-1] == 0:
+        return np.zeros(values.shape[:-1])
+    return np.cumsum(values, axis=-1)[..., -1]
+
+
+_EXPONENT_BITS = np.int64(0x7ff0000000000000)
+_MANTISSA_BITS = np.int64(0x000fffffffffffff)
+# Squares are computed by blocks of this many values; blocks smaller than _SQUARE_POW_SIZE just call pow
+_SQUARE_BLOCK = 4096
+_SQUARE_POW_SIZE = 1500
+
+
+def square(values):
+    """
+    Square like Python's ** does, so that distances match those of the scalar code (Entity.calculate_distance_between,
+    common.distance2) to the bit.
+
+    Python's ** calls pow, which is not correctly rounded (glibc's is within 0.512 ulp for squares): when the exact
+    square lies close to halfway between two floats, it may round to the other neighbour than the multiplication
+    numpy uses for ** 2. Those squares are found from the exact rounding error of the multiplication (Dekker's
+    algorithm) and recomputed with np.float_power, which calls pow. Calling it on everything is much slower.
+
+    :param values: array
+    :return: array of the squares
+    """
+    values = np.asarray(values, dtype=float)
+    flat_values = values.reshape(-1)
+    squares = np.empty_like(flat_values)
+    # Blocks keep the temporaries of _square_block in cache
+    for start in range(0, flat_values.size, _SQUARE_BLOCK):
+        squares[start:start + _SQUARE_BLOCK] = _square_block(flat_values[start:start + _SQUARE_BLOCK])
+    return squares.reshape(values.shape)
+
+
+def _square_block(values):
+    if values.size < _SQUARE_POW_SIZE:
+        # Cheaper than the fixed cost of the checks below
+        return np.float_power(values, 2)
+
+    product = values * values
+
+    # values ** 2 == product + error exactly
+    high = values * 134217729.0  # 2 ** 27 + 1
+    high -= high - values
+    low = values - high
+    error = high * high
+    error -= product
+    high *= low
+    high *= 2
+    error += high
+    low *= low
+    error += low
+    np.abs(error, out=error)
+
+    # Beyond 0.48 ulp of the product, pow may round the other way
+    bits = product.view(np.int64)
+    threshold = bits & _EXPONENT_BITS
+    threshold -= 52 << 52
+    threshold = threshold.view(float)
+    threshold *= 0.48
+    close_to_halfway = error > threshold
+    # Powers of two have a closer neighbour below them
+    close_to_halfway |= (bits & _MANTISSA_BITS) == 0
+    if close_to_halfway.any():
+        product[close_to_halfway] = np.float_power(values[close_to_halfway], 2)
+    return product
+
+
+def compute_planet_features(planet_x, planet_y, planet_health, planet_docking_spots, planet_docked,
+                            planet_remaining, planet_production, planet_ownership,
+                            ship_x, ship_y, ship_health, ship_is_mine, width, height):
+    """
+    The definition of the PER_PLANET_FEATURES features, shared by the training data (produce_compact_frame_features)
+    and the bot (produce_features_per_planet). Every planet is broadcast against every ship; sums run over the ships in
+    the given order, strictly left to right.
+
+    :param planet_x: planets x-coordinates, shape (P,)
+    :param planet_y: planets y-coordinates, shape (P,)
+    :param planet_health: planets health, shape (P,)
+    :param planet_docking_spots: max number of ships that can be docked to each planet, shape (P,)
+    :param planet_docked: number of ships docked to each planet, shape (P,)
+    :param planet_remaining: remaining production of each planet, shape (P,)
+    :param planet_production: current production of each planet, shape (P,)
+    :param planet_ownership: 1 if owned by us, -1 if owned by enemy, 0 otherwise, shape (P,)
+    :param ship_x: ships x-coordinates, shape (S,)
+    :param ship_y: ships y-coordinates, shape (S,)
+    :param ship_health: ships health, shape (S,)
+    :param ship_is_mine: True for our ships, shape (S,), at least one of them
+    :param width: map width
+    :param height: map height
+    :return: list of the features, arrays of shape (P,) in the order of FEATURE_NAMES. Features computed from integer
+    planet attributes only are integer arrays.
+    """
+    ship_is_mine = np.asarray(ship_is_mine, dtype=bool)
+
+    # (P, S) matrices. Both coordinates are squared in a single call, square has a fixed cost.
+    offsets = np.empty((2, len(planet_x), len(ship_x)))
+    np.subtract(planet_x[:, np.newaxis], ship_x, out=offsets[0])
+    np.subtract(planet_y[:, np.newaxis], ship_y, out=offsets[1])
+    distance2 = square(offsets).sum(axis=0)
+    distance = np.sqrt(distance2)
+
+    # Adding 0 turns a sum of -0.0 into 0.0, as a sum starting from 0 would
+    gravity = sequential_sum(np.where(ship_is_mine, ship_health, -ship_health) / distance2) + 0.0
+
+    closest_friendly_ship_distance = distance.min(axis=1, initial=10000, where=ship_is_mine)
+    closest_enemy_ship_distance = distance.min(axis=1, initial=10000, where=~ship_is_mine)
+
+    my_ships_health = ship_health[ship_is_mine].sum()
+    average_distance = sequential_sum(distance[:, ship_is_mine] * ship_health[ship_is_mine]) / my_ships_health
+
+    distance_from_center = np.sqrt(square(np.stack([planet_x - width / 2, planet_y - height / 2])).sum(axis=0))
+
+    available_docking_spots = planet_docking_spots - planet_docked
+    signed_current_production = planet_production * planet_ownership
+    is_active = ((available_docking_spots > 0) | (planet_ownership != 1)).astype(float)
+
+    return [
+        planet_health,
+        available_docking_spots,
+        planet_remaining,
+        signed_current_production,
+        gravity,
+        closest_friendly_ship_distance,
+        closest_enemy_ship_distance,
+        planet_ownership,
+        distance_from_center,
+        average_distance,
+        is_active]
+
+
+def _feature_matrix(planet_ids, features):
+    """
+    :param planet_ids: ids of the planets, shape (P,)
+    :param features: features of the planets, as returned by compute_planet_features
+    :return: array of shape (1, PLANET_MAX_NUM, PER_PLANET_FEATURES), rows of absent planets are zeros
+    """
+    feature_matrix = np.zeros((PLANET_MAX_NUM, PER_PLANET_FEATURES))
+    feature_matrix[planet_ids] = np.column_stack(features)
+    return feature_matrix.reshape((1, PLANET_MAX_NUM, PER_PLANET_FEATURES))
+
+
+def produce_features_per_planet(game_map):
+    """
+    Gather ship and planet attributes of the current turn into arrays and compute the features of all planets.
+
+    :param game_map: game map
+    :return: array of shape (1, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+    """
+    if game_map.snapshot is not None:
+        return _produce_features_from_snapshot(game_map.snapshot, game_map.my_id, game_map.width, game_map.height)
+
+    me = game_map.get_me()
+
+    ships = []
+    ship_is_mine = []
+    for player in game_map.all_players():
+        player_ships = player.all_ships()
+        ships.extend(player_ships)
+        ship_is_mine.extend([player == me] * len(player_ships))
+
+    planets = game_map.all_planets()
+    ownership = [1 if planet.owner == me else 0 if planet.owner is None else -1 for planet in planets]
+
+    return _feature_matrix(np.array([planet.id for planet in planets], dtype=int), compute_planet_features(
+        planet_x=np.array([planet.x for planet in planets], dtype=float),
+        planet_y=np.array([planet.y for planet in planets], dtype=float),
+        planet_health=np.array([planet.health for planet in planets], dtype=int),
+        planet_docking_spots=np.array([planet.num_docking_spots for planet in planets], dtype=int),
+        planet_docked=np.array([len(planet.all_docked_ships()) for planet in planets], dtype=int),
+        planet_remaining=np.array([planet.remaining_resources for planet in planets], dtype=int),
+        planet_production=np.array([planet.current_production for planet in planets], dtype=int),
+        planet_ownership=np.array(ownership, dtype=int),
+        ship_x=np.array([ship.x for ship in ships], dtype=float),
+        ship_y=np.array([ship.y for ship in ships], dtype=float),
+        ship_health=np.array([ship.health for ship in ships], dtype=float),
+        ship_is_mine=np.array(ship_is_mine, dtype=bool),
+        width=game_map.width,
+        height=game_map.height))
+
+
+def _produce_features_from_snapshot(snapshot, my_id, width, height):
+    """
+    Same as produce_features_per_planet, reading the attributes straight from the columnar snapshot of a map.
+
+    :param hlt.columnar.MapSnapshot snapshot: snapshot of the current turn
+    :param my_id: our player id
+    :param width: map width
+    :param height: map height
+    :return: array of shape (1, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+    """
+    ownership = np.where(snapshot.planet_owned, np.where(snapshot.planet_owner == my_id, 1, -1), 0)
+
+    return _feature_matrix(snapshot.planet_id, compute_planet_features(
+        planet_x=snapshot.planet_x,
+        planet_y=snapshot.planet_y,
+        planet_health=snapshot.planet_health,
+        planet_docking_spots=snapshot.planet_docking_spots,
+        planet_docked=np.where(snapshot.planet_owned, snapshot.planet_num_docked, 0),
+        planet_remaining=snapshot.planet_remaining_resources,
+        planet_production=snapshot.planet_current_production,
+        planet_ownership=ownership,
+        ship_x=snapshot.ship_x,
+        ship_y=snapshot.ship_y,
+        ship_health=snapshot.ship_health.astype(float),
+        ship_is_mine=snapshot.ships_of(my_id),
+        width=width,
+        height=height))
+
+
+def _feature_dict(planet_ids, features):
+    """
+    :return: dictionary planet id (as a string) -> list of features, see produce_compact_frame_features
+    """
+    return {str(planet_id): list(planet_features)
+            for planet_id, planet_features in zip(planet_ids, zip(*(feature.tolist() for feature in features)))}
+
+
+def produce_compact_frame_features(replay, frame, bot_to_imitate_id):
+    """
+    Compute the features of all planets of a frame of a replay.CompactReplay, from the point of view of the bot to
+    imitate.
+
+    :param replay: the compact replay
+    :param frame: index of the frame, with at least one ship of the bot to imitate
+    :param bot_to_imitate_id: id of the bot to imitate
+    :return: dictionary planet id (as a string) -> list of features in the order of FEATURE_NAMES. Integer features
+    are Python ints.
+    """
+    planets = slice(replay.planet_offsets[frame], replay.planet_offsets[frame + 1])
+    planet_ids = replay.frame_planet_id[planets]
+    # Planets in increasing id order
+    rows = np.flatnonzero(planet_ids < PLANET_MAX_NUM)
+    rows = rows[np.argsort(planet_ids[rows], kind='stable')]
+    planet_ids = planet_ids[rows]
+    if not len(planet_ids):
+        return {}
+
+    owner = replay.frame_planet_owner[planets][rows]
+    ships = slice(replay.ship_offsets[frame], replay.ship_offsets[frame + 1])
+
+    features = compute_planet_features(
+        planet_x=replay.planet_x[planet_ids],
+        planet_y=replay.planet_y[planet_ids],
+        planet_health=replay.frame_planet_health[planets][rows],
+        planet_docking_spots=replay.planet_docking_spots[planet_ids],
+        planet_docked=replay.frame_planet_docked[planets][rows],
+        planet_remaining=replay.frame_planet_remaining[planets][rows],
+        planet_production=replay.frame_planet_production[planets][rows],
+        planet_ownership=np.where(owner == bot_to_imitate_id, 1, np.where(owner == -1, 0, -1)),
+        ship_x=replay.ship_x[ships],
+        ship_y=replay.ship_y[ships],
+        ship_health=replay.ship_health[ships],
+        ship_is_mine=replay.ship_owner[ships] == bot_to_imitate_id,
+        width=replay.width,
+        height=replay.height)
+
+    return _feature_dict(planet_ids.tolist(), features)
@@ -0,0 +1,98 @@
+import time
+import numpy as np
+
+from tsmlstarterbot.common import LatencyStats
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+
+
+def _conv1d(x, kernel, bias, strides):
+    # 'valid' padding: out[:, t] = sum_j x[:, t * strides + j] @ kernel[j]
+    kernel_size = kernel.shape[0]
+    steps = (x.shape[1] - kernel_size) // strides + 1
+    return bias + sum(x[:, j:j + strides * (steps - 1) + 1:strides, :] @ kernel[j] for j in range(kernel_size))
+
+
+def _max_pooling1d(x, pool_size, strides):
+    # 'valid' padding
+    steps = (x.shape[1] - pool_size) // strides + 1
+    return np.max([x[:, j:j + strides * (steps - 1) + 1:strides, :] for j in range(pool_size)], axis=0)
+
+
+class NumpyNet(object):
+    """
+    Inference-only runtime for networks exported with CNN_Net.export_weights. Reproduces the layers used by
+    CNN_Net.create_model (Conv1D, BatchNormalization, MaxPooling1D, GlobalAveragePooling1D, Dropout, Dense) with numpy
+    only, so that the bot does not need to import TensorFlow.
+    """
+
+    def __init__(self, weights_path: str):
+        """
+        :param weights_path: path to the .npz file written by CNN_Net.export_weights
+        """
+        with np.load(weights_path) as weights:
+            self._layers = [self._load_layer(str(layer_type), weights, "layer{}_".format(i))
+                            for i, layer_type in enumerate(weights["layers"])]
+        self.inference_latency = LatencyStats()
+
+    @staticmethod
+    def _load_layer(layer_type, weights, prefix):
+        """
+        :return: function computing the layer output from its input
+        """
+        if layer_type == "Conv1D":
+            kernel, bias = weights[prefix + "kernel"], weights[prefix + "bias"]
+            strides = int(weights[prefix + "strides"])
+            activation = ACTIVATIONS[str(weights[prefix + "activation"])]
+            return lambda x: activation(_conv1d(x, kernel, bias, strides))
+        if layer_type == "BatchNormalization":
+            # Fold the normalization into a single affine transformation
+            scale = weights[prefix + "gamma"] / np.sqrt(weights[prefix + "moving_variance"] + weights[prefix + "epsilon"])
+            shift = weights[prefix + "beta"] - weights[prefix + "moving_mean"] * scale
+            return lambda x: x * scale + shift
+        if layer_type == "MaxPooling1D":
+            pool_size, strides = int(weights[prefix + "pool_size"]), int(weights[prefix + "strides"])
+            return lambda x: _max_pooling1d(x, pool_size, strides)
+        if layer_type == "GlobalAveragePooling1D":
+            return lambda x: x.mean(axis=1)
+        if layer_type == "Dropout":
+            return lambda x: x
+        if layer_type == "Dense":
+            kernel, bias = weights[prefix + "kernel"], weights[prefix + "bias"]
+            activation = ACTIVATIONS[str(weights[prefix + "activation"])]
+            return lambda x: activation(x @ kernel + bias)
+        raise ValueError("Unsupported layer type: {}".format(layer_type))
+
+    def predict(self, input_data):
+        """
+        :param input_data: array of shape (batch, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        :return: array of shape (batch, PLANET_MAX_NUM)
+        """
+        x = np.asarray(input_data, dtype=np.float32)
+        for layer in self._layers:
+            x = layer(x)
+        return x
+
+    def predict_single(self, input_data):
+        """
+        Prediction for the per-turn input of the bot. The latency of every call is recorded in inference_latency.
+
+        :param input_data: array of shape (1, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        :return: array of shape (1, PLANET_MAX_NUM)
+        """
+        start = time.perf_counter()
+        predictions = self.predict(input_data)
+        self.inference_latency.record(time.perf_counter() - start)
+        return predictions
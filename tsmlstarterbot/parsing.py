@@ -1,14 +1,23 @@
+import io
 import os
 import json
+import zipfile
+import hashlib
+import functools
+import importlib
+import contextlib
+import multiprocessing
 from tqdm import tqdm
 import numpy as np
-import pandas as pd
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '99'
 
 import warnings
 warnings.filterwarnings("ignore")
 
 from tsmlstarterbot.common import *
+from tsmlstarterbot.features import produce_compact_frame_features
+from tsmlstarterbot.replay import CompactReplay, decode_replay, MOVE_THRUST, MOVE_DOCK
+from tsmlstarterbot.feature_cache import FeatureCacheWriter, load_feature_cache, shard_key, read_shard, write_shard
 
 
 def angle(x, y):
@@ -70,243 +79,460 @@ def find_target_planet(bot_id, current_frame, planets, move):
     return optimal_planet
 
 
-def format_data_for_training(data):
+def angles(x, y):
     """
-    Create numpy array with planet features ready to feed to the neural net.
-    :param data: parsed features
-    :return: numpy array of shape (number of frames, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+    Vectorized angle.
+
+    :param x: array of x-coordinates
+    :param y: array of y-coordinates, same shape as x
+    :return: angles in whole degrees, as floats, identical to angle
+    """
+    radians = np.arctan2(y, x)
+    radians = np.where(radians < 0, radians + 2 * math.pi, radians)
+    degrees = radians / math.pi * 180
+    result = np.rint(degrees)
+    # np.arctan2 can differ from math.atan2 in the last bit, which only changes the rounding of a value right at the
+    # middle of two degrees. Such values are computed again exactly like angle does.
+    ambiguous = np.abs(degrees - np.floor(degrees) - 0.5) < 1e-9
+    if ambiguous.any():
+        result[ambiguous] = [angle(x_i, y_i) for x_i, y_i in zip(x[ambiguous].tolist(), y[ambiguous].tolist())]
+    return result
+
+
+def find_target_planets(ship_x, ship_y, ship_angle, planet_x, planet_y, planet_alive=None):
     """
-    training_input = []
-    training_output = []
-    for d in data:
-        features, expected_output = d
+    Batched find_target_planet, for thrust moves: the angle of every ship to every planet is computed at once, and
+    each ship gets the planet with the minimal angle distance. Ties go to the first planet, like find_target_planet.
+
+    :param ship_x: x-coordinates of the ships which thrusted, shape (S,)
+    :param ship_y: y-coordinates of the ships, shape (S,)
+    :param ship_angle: angles of the thrusts, shape (S,)
+    :param planet_x: x-coordinates of the planets, in the order of the replay, shape (P,)
+    :param planet_y: y-coordinates of the planets, shape (P,)
+    :param planet_alive: whether each planet can be a target of each ship, i.e. it's in the frame of the move and
+    its health is positive, shape (S, P). All planets if None.
+    :return: index of the target planet of every ship, -1 if there was no planet alive, shape (S,)
+    """
+    if len(ship_x) == 0 or len(planet_x) == 0:
+        return np.full(len(ship_x), -1, dtype=np.int64)
 
-        if len(expected_output.values()) == 0:
-            continue
+    planet_angles = angles(planet_x - ship_x[:, np.newaxis], planet_y - ship_y[:, np.newaxis])
+    distances = np.mod(ship_angle[:, np.newaxis] - planet_angles + 360, 360)
+    if planet_alive is not None:
+        distances[~planet_alive] = np.inf
 
-        features_matrix = []
-        for planet_id in range(PLANET_MAX_NUM):
-            if str(planet_id) in features:
-                features_matrix.append(features[str(planet_id)])
-            else:
-                features_matrix.append([0] * PER_PLANET_FEATURES)
+    targets = np.argmin(distances, axis=1)
+    if planet_alive is not None:
+        targets[~planet_alive.any(axis=1)] = -1
+    return targets
+
+
+def format_data_for_training(data, dtype=np.float32):
+    """
+    Create numpy array with planet features ready to feed to the neural net. The frames are counted first, and written
+    straight into arrays of their final size.
+    :param data: parsed features
+    :param dtype: type of the arrays
+    :return: numpy arrays of shape (number of frames, PLANET_MAX_NUM, PER_PLANET_FEATURES) and
+    (number of frames, PLANET_MAX_NUM)
+    """
+    frames = [(features, expected_output) for features, expected_output in data if len(expected_output) > 0]
+    training_input = np.zeros((len(frames), PLANET_MAX_NUM, PER_PLANET_FEATURES), dtype=dtype)
+    training_output = np.zeros((len(frames), PLANET_MAX_NUM), dtype=dtype)
 
-        fm = np.array(features_matrix)
+    for frame, (features, expected_output) in enumerate(frames):
+        planet_ids = [planet_id for planet_id in range(PLANET_MAX_NUM) if str(planet_id) in features]
+        training_input[frame, planet_ids] = [features[str(planet_id)] for planet_id in planet_ids]
 
-        output = [0] * PLANET_MAX_NUM
         for planet_id, p in expected_output.items():
-            output[int(planet_id)] = p
-        result = np.array(output)
+            training_output[frame, int(planet_id)] = p
 
-        training_input.append(fm)
-        training_output.append(result)
+    return training_input, training_output
 
-    return np.array(training_input), np.array(training_output)
 
+@contextlib.contextmanager
+def _open_replay(replay):
+    """
+    :param replay: path to an uncompressed replay file, or tuple (path to a zip file, name of the replay in the archive)
+    :return: context manager of a text file object of the replay
+    """
+    if isinstance(replay, tuple):
+        zip_path, name = replay
+        with zipfile.ZipFile(zip_path) as z, z.open(name) as f:
+            yield io.TextIOWrapper(f, encoding="utf-8")
+    else:
+        with open(replay) as f:
+            yield f
 
-def serialize_data(data, dump_features_location, dump_features_fn):
+
+def _read_replay_text(replay):
+    """
+    :param replay: see _open_replay
+    :return: undecoded content of the replay
     """
-    Serialize all the features into .h5 file.
+    with _open_replay(replay) as f:
+        return f.read()
 
-    :param data: data to serialize
-    :param dump_features_location: path to .h5 file where the features should be saved
+
+def load_replay(replay):
+    """
+    Load a game replay.
+    :param replay: json dictionary describing the game, path to an uncompressed replay file, or tuple
+    (path to a zip file, name of the replay in the archive)
+    :return: json dictionary describing the game
     """
-    training_data_for_pandas = {
-        (game_id, frame_id, planet_id): planet_features
-        for game_id, frame in enumerate(data)
-        for frame_id, planets in enumerate(frame)
-        for planet_id, planet_features in planets[0].items()}
+    if isinstance(replay, dict):
+        return replay
+    return json.loads(_read_replay_text(replay))
 
 
-    training_output_for_pandas = {
-        (game_id, frame_id, planet_id): planet_features
-        for game_id, frame in enumerate(data)
-        for frame_id, planets in enumerate(frame)
-        for planet_id, planet_features in planets[1].items()}
+def load_compact_replay(replay):
+    """
+    Load a game replay as a CompactReplay. Replay files are read in chunks and decoded with replay.decode_replay,
+    without holding their whole content or building the json dictionary of the whole game.
+    :param replay: see load_replay
+    :return: the compact replay of the game
+    """
+    if isinstance(replay, dict):
+        return CompactReplay.from_json(replay)
+    with _open_replay(replay) as f:
+        return decode_replay(f)
 
-    # Input
-    training_data_to_store = pd.DataFrame.from_dict(training_data_for_pandas, orient="index")
-    training_data_to_store.columns = FEATURE_NAMES
-    index_names = ["game", "frame", "planet"]
-    training_data_to_store.index = pd.MultiIndex.from_tuples(training_data_to_store.index, names=index_names)
-    # Output
-    training_output_to_store = pd.DataFrame.from_dict(training_output_for_pandas, orient="index")
-    training_output_to_store.columns = ['Allocated']
-    index_names = ["game", "frame", "planet"]
-    training_output_to_store.index = pd.MultiIndex.from_tuples(training_output_to_store.index, names=index_names)
 
-    training_data_to_store = training_data_to_store.join(training_output_to_store)
-    training_data_to_store.to_csv(os.path.join(dump_features_location, dump_features_fn + ".csv"),
-                                  sep=';', encoding='utf-8')
+HEADER_FIELDS = ("player_names", "stats")
 
 
-def parse(all_games_json_data, bot_to_imitate=None,
-          dump_features_location="../train_data", dump_features_fn="train_data"):
+def _decode_top_level_field(text, field, decoder):
     """
-    Parse the games to compute features. This method computes PER_PLANET_FEATURES features for each planet in each frame
-    in each game the bot we're imitating played.
+    Decode the value of a top level field of a json document without decoding the rest of it. The key is searched
+    from the end, since the engine writes the fields after the frames and moves. Occurrences of the name which are
+    not followed by a colon (e.g. a player called like the field) are skipped.
 
-    :param all_games_json_data: list of json dictionaries describing games
-    :param bot_to_imitate: name of the bot to imitate or None if we want to imitate the bot who won the most games
-    :param dump_features_location: location where to serialize the features
-    :return: data ready for training
+    :return: decoded value, or None if the field was not found
     """
-    print("Parsing data...")
+    key = '"{}"'.format(field)
+    position = text.rfind(key)
+    while position >= 0:
+        end = position + len(key)
+        while end < len(text) and text[end].isspace():
+            end += 1
+        if end < len(text) and text[end] == ':':
+            end += 1
+            while end < len(text) and text[end].isspace():
+                end += 1
+            try:
+                return decoder.raw_decode(text, end)[0]
+            except ValueError:
+                return None
+        position = text.rfind(key, 0, position)
+    return None
+
+
+def read_replay_header(replay):
+    """
+    Read the fields describing the players of a game (HEADER_FIELDS) without building the frames and moves, which make
+    up nearly all of a replay. Falls back to decoding the whole replay if the fields can't be located reliably.
 
-    parsed_games = 0
+    :param replay: see load_replay
+    :return: dictionary with the HEADER_FIELDS of the game
+    """
+    if isinstance(replay, dict):
+        return {field: replay[field] for field in HEADER_FIELDS}
 
-    training_data = []
+    text = _read_replay_text(replay)
+    decoder = json.JSONDecoder()
+    header = {field: _decode_top_level_field(text, field, decoder) for field in HEADER_FIELDS}
 
-    if bot_to_imitate is None:
-        print("No bot name provided, choosing the bot with the highest number of games won...")
-        players_games_count = {}
-        for json_data in all_games_json_data:
-            w = find_winner(json_data)
-            p = json_data['player_names'][int(w)]
-            if p not in players_games_count:
-                players_games_count[p] = 0
-            players_games_count[p] += 1
+    player_names, stats = header['player_names'], header['stats']
+    if not (isinstance(player_names, list) and isinstance(stats, dict) and
+            all(isinstance(s, dict) and 'rank' in s for s in stats.values())):
+        json_data = json.loads(text)
+        return {field: json_data[field] for field in HEADER_FIELDS}
+    return header
 
-        with open("../players_rating.json", "w") as fp:
-            json.dump(players_games_count , fp)
 
-        bot_to_imitate = max(players_games_count, key=players_games_count.get)
-    print("Bot to imitate: {}.".format(bot_to_imitate))
+def find_winner_name(replay):
+    """
+    :param replay: see load_replay
+    :return: name of the bot who won the game
+    """
+    header = read_replay_header(replay)
+    return header['player_names'][int(find_winner(header))]
 
-    for json_data in tqdm(all_games_json_data, total=len(all_games_json_data)):
 
-        frames = json_data['frames']
-        moves = json_data['moves']
-        width = json_data['width']
-        height = json_data['height']
+def _find_compact_target_planets(replay, frames, moves, ships):
+    """
+    Same as find_target_planet, for moves of a CompactReplay. The angles of all the thrust moves are computed at once.
+
+    :param replay: the compact replay
+    :param frames: frame of each move, shape (M,)
+    :param moves: rows of the moves, shape (M,)
+    :param ships: rows of the ships that moved, shape (M,)
+    :return: id of the planet each ship was moving towards, -1 if none, and whether the move was to dock, which
+    find_target_planet tells apart by returning an int rather than a string
+    """
+    move_types = replay.move_type[moves]
+    is_dock = move_types == MOVE_DOCK
+    targets = np.full(len(moves), -1, dtype=np.int64)
+    targets[is_dock] = replay.move_planet_id[moves[is_dock]]
+
+    # Planets which could be targeted in each frame: present and with positive health
+    frame_planets = np.repeat(np.arange(replay.num_frames), np.diff(replay.planet_offsets))
+    planet_position = {planet_id: position for position, planet_id in enumerate(replay.planet_id.tolist())}
+    positions = np.array([planet_position.get(planet_id, -1) for planet_id in replay.frame_planet_id.tolist()],
+                         dtype=np.int64)
+    alive = (positions >= 0) & (replay.frame_planet_health > 0)
+    frame_alive = np.zeros((replay.num_frames, len(replay.planet_id)), dtype=bool)
+    frame_alive[frame_planets[alive], positions[alive]] = True
+
+    thrust = np.flatnonzero(move_types == MOVE_THRUST)
+    planets = find_target_planets(replay.ship_x[ships[thrust]], replay.ship_y[ships[thrust]],
+                                  replay.move_angle[moves[thrust]], replay.planet_x, replay.planet_y,
+                                  frame_alive[frames[thrust]])
+    targets[thrust] = np.where(planets >= 0, replay.planet_id[planets], -1)
+    return targets, is_dock
+
+
+def parse_game(replay, bot_to_imitate):
+    """
+    Compute PER_PLANET_FEATURES features for each planet in each frame of a single game, along with the allocation of
+    the ships of the bot we're imitating.
+
+    :param replay: replay.CompactReplay of the game, or json dictionary describing it
+    :param bot_to_imitate: name of the bot to imitate
+    :return: list of pairs (planet features, allocations) for every frame, or None if the bot didn't play the game
+    """
+    if isinstance(replay, dict):
+        replay = CompactReplay.from_json(replay)
+
+    # For each game see if bot_to_imitate played in it
+    if bot_to_imitate not in set(replay.player_names):
+        return None
+    # We train on all the games of the bot regardless whether it won or not.
+    bot_to_imitate_id = replay.player_names.index(bot_to_imitate)
+
+    # Ignore the last frame, no decision to be made there
+    num_frames = max(min(replay.num_frames - 1, len(replay.move_offsets) - 1), 0)
+
+    # Ships of the bot and their moves of the same frame, in the order of the ships
+    ship_frames = np.repeat(np.arange(replay.num_frames), np.diff(replay.ship_offsets))
+    ships = np.flatnonzero((replay.ship_owner == bot_to_imitate_id) & (ship_frames < num_frames))
+    move_frames = np.repeat(np.arange(len(replay.move_offsets) - 1), np.diff(replay.move_offsets))
+    moves = np.flatnonzero(replay.move_owner == bot_to_imitate_id)
+
+    ship_keys = ship_frames[ships] * (replay.ship_id.max(initial=0) + 1) + replay.ship_id[ships]
+    move_keys = move_frames[moves] * (replay.ship_id.max(initial=0) + 1) + replay.move_ship_id[moves]
+    move_order = np.argsort(move_keys, kind='stable')
+    matches = np.minimum(np.searchsorted(move_keys[move_order], ship_keys), max(len(moves) - 1, 0))
+    has_move = (move_keys[move_order][matches] == ship_keys) if len(moves) else np.zeros(len(ships), dtype=bool)
+
+    moving_frames = ship_frames[ships[has_move]]
+    targets, is_dock = _find_compact_target_planets(replay, moving_frames, moves[move_order][matches[has_move]],
+                                                    ships[has_move])
+    frame_moves = np.searchsorted(moving_frames, np.arange(num_frames + 1))
+    targets, is_dock = targets.tolist(), is_dock.tolist()
+
+    game_training_data = []
+
+    for idx in np.unique(ship_frames[ships]).tolist():
+        # find % allocation for all ships
+        all_moving_ships = 0
+        allocations = {}
+
+        # for each planet we want to find how many ships are being moved towards it now
+        for move in range(frame_moves[idx], frame_moves[idx + 1]):
+            planet_id = targets[move]
+            if planet_id < 0 or planet_id >= PLANET_MAX_NUM:
+                continue
 
-        # For each game see if bot_to_imitate played in it
-        if bot_to_imitate not in set(json_data['player_names']):
+            p = planet_id if is_dock[move] else str(planet_id)
+            if p not in allocations:
+                allocations[p] = 0
+            allocations[p] = allocations[p] + 1
+            all_moving_ships = all_moving_ships + 1
+
+        if all_moving_ships == 0:
             continue
-        # We train on all the games of the bot regardless whether it won or not.
-        bot_to_imitate_id = str(json_data['player_names'].index(bot_to_imitate))
 
-        parsed_games = parsed_games + 1
-        game_training_data = []
+        # Compute what % of the ships should be sent to given planet
+        for planet_id, allocated_ships in allocations.items():
+            allocations[planet_id] = allocated_ships / all_moving_ships
 
-        # Ignore the last frame, no decision to be made there
-        for idx in range(len(frames) - 1):
+        planet_features = produce_compact_frame_features(replay, idx, bot_to_imitate_id)
 
-            current_moves = moves[idx]
-            current_frame = frames[idx]
+        game_training_data.append((planet_features, allocations))
 
-            if bot_to_imitate_id not in current_frame['ships'] or len(current_frame['ships'][bot_to_imitate_id]) == 0:
-                continue
+    return game_training_data
 
-            planet_features = {}  # planet_id -> list of features per ship per planet
-            current_planets = current_frame['planets']
-
-            # find % allocation for all ships
-            all_moving_ships = 0
-            allocations = {}
-
-            # for each planet we want to find how many ships are being moved towards it now
-            for ship_id, ship_data in current_frame['ships'][bot_to_imitate_id].items():
-                if ship_id in current_moves[bot_to_imitate_id][0]:
-                    p = find_target_planet(bot_to_imitate_id, current_frame,
-                                           json_data['planets'],
-                                           current_moves[bot_to_imitate_id][0][ship_id],
-                                           )
-                    planet_id = int(p)
-                    if planet_id < 0 or planet_id >= PLANET_MAX_NUM:
-                        continue
-
-                    if p not in allocations:
-                        allocations[p] = 0
-                    allocations[p] = allocations[p] + 1
-                    all_moving_ships = all_moving_ships + 1
-
-            if all_moving_ships == 0:
-                continue
 
-            # Compute what % of the ships should be sent to given planet
-            for planet_id, allocated_ships in allocations.items():
-                allocations[planet_id] = allocated_ships / all_moving_ships
+def _game_arrays(replay, bot_to_imitate):
+    """
+    Parse a single game, see parse_game. The frames are returned as arrays, which are much cheaper to send back to the
+    main process than the nested lists.
+
+    :return: features and outputs of the frames (see format_data_for_training), or None if the bot didn't play the game
+    """
+    game_training_data = parse_game(replay, bot_to_imitate)
+    if game_training_data is None:
+        return None
+    return format_data_for_training(game_training_data)
+
+
+# Modules whose source determines the features, see feature_code_version
+FEATURE_CODE_MODULES = (
+    "tsmlstarterbot.common", "tsmlstarterbot.features", "tsmlstarterbot.parsing", "tsmlstarterbot.replay")
+
+
+def feature_code_version():
+    """
+    :return: hash of the source of the code computing the features. Any change to it invalidates the shard cache.
+    """
+    digest = hashlib.sha1()
+    for module_name in FEATURE_CODE_MODULES:
+        with open(importlib.import_module(module_name).__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
 
-            # Compute features
-            for planet_id in range(PLANET_MAX_NUM):
+def _parse_replay(replay, bot_to_imitate, shards_location=None, code_version=None):
+    """
+    Worker entry point: load and parse a single game, or read it from the shard cache if it was parsed before.
+
+    :param shards_location: directory of the shard cache, None to always parse
+    :param code_version: see feature_code_version
+    :return: whether the game came from the shard cache, and its features (see _game_arrays)
+    """
+    if shards_location is None:
+        return False, _game_arrays(load_compact_replay(replay), bot_to_imitate)
 
-                if str(planet_id) not in current_planets:
+    content = json.dumps(replay, sort_keys=True) if isinstance(replay, dict) else _read_replay_text(replay)
+    key = shard_key(content, bot_to_imitate, code_version)
+    try:
+        return True, read_shard(shards_location, key)
+    except FileNotFoundError:
+        pass
+
+    game = _game_arrays(CompactReplay.from_json(replay) if isinstance(replay, dict) else decode_replay(content),
+                        bot_to_imitate)
+    write_shard(shards_location, key, game)
+    return False, game
+
+
+def parse(replays, bot_to_imitate=None,
+          dump_features_location="../train_data", dump_features_fn="train_data", workers=1, shards_location=None):
+    """
+    Parse the games to compute features. This method computes PER_PLANET_FEATURES features for each planet in each frame
+    in each game the bot we're imitating played.
+
+    Games are loaded, parsed and dropped one at a time, so passing replay files rather than json dictionaries keeps
+    at most one decoded game in memory per process. The features are written to the feature cache as the games are
+    parsed.
+
+    With a shard cache, the features of every game are also saved on their own, keyed by the content of the replay,
+    the bot and the version of the feature code. Games found there are not parsed again, so adding replays to an
+    archive only costs parsing the new ones, and changing the feature code invalidates the shards automatically.
+
+    :param replays: iterable of games, either json dictionaries describing them or replay files (see load_replay).
+    If bot_to_imitate is None, it is iterated twice and must be a collection rather than an iterator.
+    :param bot_to_imitate: name of the bot to imitate or None if we want to imitate the bot who won the most games
+    :param dump_features_location: directory of the feature cache, None to keep the features in memory only
+    :param dump_features_fn: name of the feature cache (see feature_cache.FeatureCacheWriter)
+    :param workers: number of processes parsing games in parallel. Results are identical to serial parsing.
+    :param shards_location: directory of the shard cache, None to parse every game
+    :return: data ready for training, memory-mapped from the feature cache if there is one
+    """
+    print("Parsing data...")
+
+    if bot_to_imitate is None and iter(replays) is replays:
+        raise ValueError("Choosing the bot to imitate needs a second pass over the games, "
+                         "pass a collection of replays instead of an iterator.")
+
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    imap = pool.imap if pool is not None else map
+
+    try:
+        if bot_to_imitate is None:
+            print("No bot name provided, choosing the bot with the highest number of games won...")
+            players_games_count = {}
+            for p in imap(find_winner_name, replays):
+                if p not in players_games_count:
+                    players_games_count[p] = 0
+                players_games_count[p] += 1
+
+            with open("../players_rating.json", "w") as fp:
+                json.dump(players_games_count , fp)
+
+            bot_to_imitate = max(players_games_count, key=players_games_count.get)
+        print("Bot to imitate: {}.".format(bot_to_imitate))
+
+        # Games are returned in order, whatever the number of workers
+        code_version = feature_code_version() if shards_location is not None else None
+        parsed = imap(functools.partial(_parse_replay, bot_to_imitate=bot_to_imitate,
+                                        shards_location=shards_location, code_version=code_version), replays)
+        total = len(replays) if hasattr(replays, '__len__') else None
+
+        parsed_games = 0
+        cached_games = 0
+        games = []
+        with (FeatureCacheWriter(dump_features_location, dump_features_fn) if dump_features_location is not None
+              else contextlib.nullcontext()) as writer:
+            for cached, game in tqdm(parsed, total=total):
+                cached_games += cached
+                if game is None:
                     continue
-                planet_data = current_planets[str(planet_id)]
-
-                gravity = 0
-                planet_base_data = json_data['planets'][planet_id]
-                closest_friendly_ship_distance = 10000
-                closest_enemy_ship_distance = 10000
-
-                ownership = 0
-                if str(planet_data['owner']) == bot_to_imitate_id:
-                    ownership = 1
-                elif planet_data['owner'] is not None:
-                    ownership = -1
-
-                average_distance = 0
-                my_ships_health = 0
-
-                for player_id, ships in current_frame['ships'].items():
-                    for ship_id, ship_data in ships.items():
-                        is_bot_to_imitate = 1 if player_id == bot_to_imitate_id else -1
-                        dist2 = distance2(planet_base_data['x'], planet_base_data['y'],
-                                          ship_data['x'], ship_data['y'])
-                        dist = math.sqrt(dist2)
-                        gravity = gravity + is_bot_to_imitate * ship_data['health'] / dist2
-                        if is_bot_to_imitate == 1:
-                            closest_friendly_ship_distance = min(closest_friendly_ship_distance, dist)
-                            average_distance = average_distance + dist * ship_data['health']
-                            my_ships_health = my_ships_health + ship_data['health']
-                        else:
-                            closest_enemy_ship_distance = min(closest_enemy_ship_distance, dist)
-
-                distance_from_center = distance(planet_base_data['x'], planet_base_data['y'], width / 2, height / 2)
-                average_distance = average_distance / my_ships_health
-
-                is_active = 1.0 if planet_base_data['docking_spots'] > len(
-                    planet_data['docked_ships']) or ownership != 1 else 0.0
-
-                signed_current_production = planet_data['current_production'] * ownership
-
-                # Features of the planet are inserted into the vector in the order described by FEATURE_NAMES
-                planet_features[str(planet_id)] = [
-                    planet_data['health'],
-                    planet_base_data['docking_spots'] - len(planet_data['docked_ships']),
-                    planet_data['remaining_production'],
-                    signed_current_production,
-                    gravity,
-                    closest_friendly_ship_distance,
-                    closest_enemy_ship_distance,
-                    ownership,
-                    distance_from_center,
-                    average_distance,
-                    is_active]
-
-            game_training_data.append((planet_features, allocations))
-        training_data.append(game_training_data)
-
-    if parsed_games == 0:
-        raise Exception("Didn't find any matching games. Try different bot.")
+                if writer is not None:
+                    writer.append_game(parsed_games, *game)
+                else:
+                    games.append(game)
+                parsed_games += 1
+
+            if parsed_games == 0:
+                raise Exception("Didn't find any matching games. Try different bot.")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
     if dump_features_location is not None:
-        serialize_data(training_data, dump_features_location, dump_features_fn)
+        data_input, data_output, _ = load_feature_cache(dump_features_location, dump_features_fn)
+    else:
+        data_input = np.concatenate([features for features, _ in games])
+        data_output = np.concatenate([outputs for _, outputs in games])
 
-    flat_training_data = [item for sublist in training_data for item in sublist]
+    print("Data parsed, parsed {} games, total frames: {}".format(parsed_games, len(data_input)))
+    if shards_location is not None:
+        print("{} games read from the shard cache.".format(cached_games))
 
-    print("Data parsed, parsed {} games, total frames: {}".format(parsed_games, len(flat_training_data)))
-
-    return format_data_for_training(flat_training_data)
+    return data_input, data_output
 
 
 def load_parsed(dump_features_location: str = "../train_data",
-                dump_features_fn: str = "train_dataset.npz"):
-    data = np.load(os.path.join(dump_features_location, dump_features_fn))
-    features, outputs = data['features'], data['outputs']
+                dump_features_fn: str = "train_data"):
+    """
+    Load the features saved by parse. Nothing is parsed or copied, the arrays are memory-mapped from the feature cache.
+
+    :param dump_features_location: directory of the feature cache
+    :param dump_features_fn: name of the feature cache, or of a .npz archive with 'features' and 'outputs' arrays
+    :return: data ready for training
+    """
+    if dump_features_fn.endswith(".npz"):
+        data = np.load(os.path.join(dump_features_location, dump_features_fn))
+        features, outputs = data['features'], data['outputs']
+    else:
+        features, outputs, _ = load_feature_cache(dump_features_location, dump_features_fn)
     print(f"Features shape: {features.shape}")
     print(f"Outputs shape: {outputs.shape}")
 
     return features, outputs
 
+
+def load_parsed_game_ids(dump_features_location: str = "../train_data",
+                         dump_features_fn: str = "train_data"):
+    """
+    :param dump_features_location: directory of the feature cache
+    :param dump_features_fn: name of the feature cache
+    :return: game of each frame of the cache, None for a .npz archive, which doesn't record them
+    """
+    if dump_features_fn.endswith(".npz"):
+        return None
+    return load_feature_cache(dump_features_location, dump_features_fn)[2][:, 0]
@@ -0,0 +1,379 @@
+import re
+import json
+import array
+import operator
+import itertools
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Replays are then decoded with the json module alone
+    orjson = None
+
+# Codes of CompactReplay.move_type
+MOVE_THRUST = 0
+MOVE_DOCK = 1
+MOVE_OTHER = 2
+
+# Top-level fields of a replay kept by decode_replay, besides the frames and the moves
+REPLAY_FIELDS = ("player_names", "stats", "width", "height", "planets")
+
+# Characters of a replay file read at a time, and of frames or moves decoded at a time with orjson
+CHUNK_SIZE = 1 << 18
+BATCH_SIZE = 1 << 18
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# The opening brace of a json object and its first key
+_OBJECT_START = re.compile(r'\{[ \t\n\r]*"(?:[^"\\]|\\.)*"')
+
+
+class CompactReplay(object):
+    """
+    The parts of a replay used for training, as flat arrays rather than nested dictionaries.
+
+    The ships of all the frames are concatenated: the ships of frame i are the rows ship_offsets[i]:ship_offsets[i + 1]
+    of the ship_* arrays, in the order of the replay. The planets of the frames (frame_planet_*) and the moves
+    (move_*) are laid out the same way, with planet_offsets and move_offsets. The planet_* arrays hold the
+    attributes which don't change during the game, indexed like the planets of the replay.
+
+    Planets without owner have frame_planet_owner -1, and moves other than docking have move_planet_id -1.
+    """
+
+    def __init__(self, player_names, stats, width, height, planets, frames, moves):
+        """
+        :param player_names: names of the players, indexed by player id
+        :param stats: stats of the players, see find_winner
+        :param width: map width
+        :param height: map height
+        :param planets: planets data of the game
+        :param frames: _ColumnBuilder of the frames
+        :param moves: _ColumnBuilder of the moves
+        """
+        self.player_names = player_names
+        self.stats = stats
+        self.width = width
+        self.height = height
+
+        self.planet_id = np.array([planet['id'] for planet in planets], dtype=np.int64)
+        self.planet_x = np.array([planet['x'] for planet in planets], dtype=float)
+        self.planet_y = np.array([planet['y'] for planet in planets], dtype=float)
+        self.planet_docking_spots = np.array([planet['docking_spots'] for planet in planets], dtype=np.int64)
+
+        self.num_frames = frames.count
+        self.ship_offsets = frames.offsets("ship_id")
+        self.ship_owner = frames.array("ship_owner")
+        self.ship_id = frames.array("ship_id")
+        self.ship_x, self.ship_y, self.ship_health = frames.array("ship_attributes", columns=3).T
+
+        self.planet_offsets = frames.offsets("planet_id")
+        self.frame_planet_id = frames.array("planet_id")
+        self.frame_planet_health, self.frame_planet_remaining, self.frame_planet_production = \
+            frames.array("planet_attributes", columns=3).T
+        self.frame_planet_owner = frames.array("planet_owner")
+        self.frame_planet_docked = frames.array("planet_docked")
+
+        self.move_offsets = moves.offsets("move_ship_id")
+        self.move_owner = moves.array("move_owner")
+        self.move_ship_id = moves.array("move_ship_id")
+        self.move_type = moves.array("move_type")
+        self.move_angle = moves.array("move_angle")
+        self.move_planet_id = moves.array("move_planet_id")
+
+    @classmethod
+    def from_json(cls, json_data):
+        """
+        :param json_data: json dictionary describing the game
+        :return: the compact replay of the game
+        """
+        frames, moves = _frame_builders()
+        for frame in json_data['frames']:
+            _add_frame(frames, frame)
+        for frame_moves in json_data['moves']:
+            _add_moves(moves, frame_moves)
+        return cls(*(json_data[field] for field in REPLAY_FIELDS), frames, moves)
+
+
+# array.array type codes of the columns built from the frames and from the moves
+_FRAME_COLUMNS = {"ship_owner": 'q', "ship_id": 'q', "ship_attributes": 'd',
+                  "planet_id": 'q', "planet_attributes": 'q', "planet_owner": 'q', "planet_docked": 'q'}
+_MOVE_COLUMNS = {"move_owner": 'q', "move_ship_id": 'q', "move_type": 'b', "move_angle": 'd', "move_planet_id": 'q'}
+
+_MOVE_TYPES = {'thrust': MOVE_THRUST, 'dock': MOVE_DOCK}
+
+_ship_attributes = operator.itemgetter('x', 'y', 'health')
+_planet_attributes = operator.itemgetter('health', 'remaining_production', 'current_production')
+
+
+class _ColumnBuilder(object):
+    """
+    Columns of values grouped by frame, see CompactReplay. The values are stored in typed array.array, which need
+    neither a Python object per value nor a conversion to become numpy arrays. They are first gathered in lists, which
+    are faster to extend a few values at a time, and moved to the arrays every FLUSH_FRAMES frames.
+    """
+    FLUSH_FRAMES = 16
+
+    def __init__(self, typecodes, grouped_by):
+        """
+        :param typecodes: dictionary column name -> array.array type code
+        :param grouped_by: columns whose offsets are recorded, one for each group of columns of the same length
+        """
+        self.count = 0
+        self._columns = {name: array.array(typecode) for name, typecode in typecodes.items()}
+        self._pending = {name: [] for name in typecodes}
+        self._offsets = {name: array.array('q', [0]) for name in grouped_by}
+
+    def extend(self, name, values):
+        self._pending[name] += values
+
+    def end_frame(self):
+        self.count += 1
+        for name, offsets in self._offsets.items():
+            offsets.append(len(self._columns[name]) + len(self._pending[name]))
+        if self.count % self.FLUSH_FRAMES == 0:
+            self._flush()
+
+    def _flush(self):
+        for name, values in self._pending.items():
+            column = self._columns[name]
+            # Converting the list in the constructor is about twice as fast as extending the column with it
+            column.extend(array.array(column.typecode, values))
+            values.clear()
+
+    def offsets(self, name):
+        """
+        :return: array of count + 1 offsets of the frames in the column
+        """
+        return np.frombuffer(self._offsets[name], dtype=np.int64)
+
+    def array(self, name, columns=None):
+        """
+        :param columns: number of values per row of a column of tuples, None for a column of values
+        :return: array of the column, of shape (rows, columns) for a column of tuples
+        """
+        self._flush()
+        column = self._columns[name]
+        values = np.frombuffer(column, dtype=column.typecode)
+        return values.reshape((-1, columns)) if columns is not None else values
+
+
+def _add_frame(builder, frame):
+    for owner, ships in frame['ships'].items():
+        builder.extend("ship_owner", itertools.repeat(int(owner), len(ships)))
+        builder.extend("ship_id", map(int, ships))
+        builder.extend("ship_attributes", itertools.chain.from_iterable(map(_ship_attributes, ships.values())))
+
+    planets = frame['planets']
+    builder.extend("planet_id", map(int, planets))
+    builder.extend("planet_attributes", itertools.chain.from_iterable(map(_planet_attributes, planets.values())))
+    builder.extend("planet_owner", [-1 if planet['owner'] is None else planet['owner'] for planet in planets.values()])
+    builder.extend("planet_docked", [len(planet['docked_ships']) for planet in planets.values()])
+    builder.end_frame()
+
+
+def _add_moves(builder, frame_moves):
+    for owner, player_moves in frame_moves.items():
+        # Only the first group of moves of a player is read, like find_target_planet does
+        for ship_moves in player_moves[:1]:
+            builder.extend("move_owner", itertools.repeat(int(owner), len(ship_moves)))
+            builder.extend("move_ship_id", map(int, ship_moves))
+            builder.extend("move_type", [_MOVE_TYPES.get(move['type'], MOVE_OTHER) for move in ship_moves.values()])
+            builder.extend("move_angle", [move.get('angle', 0) for move in ship_moves.values()])
+            builder.extend("move_planet_id", [move['planet_id'] if move['type'] == 'dock' else -1
+                                              for move in ship_moves.values()])
+    builder.end_frame()
+
+
+def _frame_builders():
+    """
+    :return: _ColumnBuilder of the frames, _ColumnBuilder of the moves
+    """
+    return _ColumnBuilder(_FRAME_COLUMNS, ("ship_id", "planet_id")), _ColumnBuilder(_MOVE_COLUMNS, ("move_ship_id",))
+
+
+class _ReplayReader(object):
+    """
+    The content of a replay, decoded one value at a time. Content read from a file is read in chunks, and only the part
+    not decoded yet is held in memory.
+    """
+
+    def __init__(self, source):
+        """
+        :param source: undecoded content of the replay, or text file object to read it from
+        """
+        if isinstance(source, str):
+            self._text, self._read = source, None
+        else:
+            self._text, self._read = "", source.read
+        self._idx = 0
+        # Position of self._text in the content
+        self._offset = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """
+        Read the next chunk, at least as long as the part held, so that long values only need a few reads.
+
+        :return: False at the end of the content
+        """
+        if self._read is None:
+            return False
+        chunk = self._read(max(CHUNK_SIZE, len(self._text) - self._idx))
+        if not chunk:
+            self._read = None
+            return False
+        self._offset += self._idx
+        self._text = self._text[self._idx:] + chunk
+        self._idx = 0
+        return True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self._text, self._idx)
+
+    def peek(self):
+        """
+        Skip the whitespace at the current position.
+
+        :return: the next character, "" at the end of the content
+        """
+        while True:
+            self._idx = _WHITESPACE.match(self._text, self._idx).end()
+            if self._idx < len(self._text) or not self._fill():
+                return self._text[self._idx:self._idx + 1]
+
+    def expect(self, characters):
+        """
+        Skip the next character, which must be one of characters.
+
+        :return: the character
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise self.error("Expecting one of {!r}".format(characters))
+        self._idx += 1
+        return character
+
+    def decode(self):
+        """
+        :return: the json value at the current position
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._text, self._idx)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number may go on in the next chunk
+            if end < len(self._text) or not self._fill():
+                self._idx = end
+                return value
+
+    def _decode_batch(self, opening):
+        """
+        Decode with orjson the elements of an array up to the last one within the next BATCH_SIZE characters which
+        starts with opening after a comma, and move on to it.
+
+        :param opening: the start of the elements up to their first key, see decode_array
+        :return: list of the elements, None if no element starts with opening or if it was inside an element
+        """
+        self.peek()
+        while len(self._text) - self._idx < BATCH_SIZE and self._fill():
+            pass
+        end = self._idx + BATCH_SIZE
+        while True:
+            cut = self._text.rfind(opening, self._idx + 1, end)
+            if cut < 0:
+                return None
+            # Elements start after a comma, objects nested in them mostly after a colon or a bracket
+            before = cut - 1
+            while self._text[before] in " \t\n\r":
+                before -= 1
+            if self._text[before] == ",":
+                break
+            end = cut + len(opening) - 1
+        try:
+            # The elements end with a comma, so a last element is added to make an array of them
+            elements = orjson.loads("[" + self._text[self._idx:cut] + "0]")
+        except orjson.JSONDecodeError:
+            # Cut inside an element, which is still open
+            return None
+        self._idx = cut
+        elements.pop()
+        return elements
+
+    def decode_array(self, add_element):
+        """
+        Decode the json array at the current position one element at a time, or with orjson a batch of elements at a
+        time, so that only a few elements are ever held in memory.
+
+        Batches are cut where an element starts like the first one, up to its first key, which is found by a search
+        rather than by decoding. The elements must then be objects, and a cut inside an element leaves it open, which
+        orjson rejects. The elements of the next BATCH_SIZE characters are then decoded one at a time.
+
+        :param add_element: function called with every element
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self._idx += 1
+            return
+        opening = None
+        # Position in the content from which batches are tried
+        batches_from = 0
+        while True:
+            if opening is not None and self._offset + self._idx >= batches_from:
+                elements = self._decode_batch(opening)
+                if elements is not None:
+                    for element in elements:
+                        add_element(element)
+                    continue
+                batches_from = self._offset + self._idx + BATCH_SIZE
+
+            self.peek()
+            start = self._offset + self._idx
+            element = self.decode()
+            if opening is None and orjson is not None and isinstance(element, dict):
+                match = _OBJECT_START.match(self._text, start - self._offset)
+                opening = match.group() if match is not None else None
+            add_element(element)
+            if self.expect(",]") == "]":
+                return
+
+
+def decode_replay(source):
+    """
+    Decode a replay into a CompactReplay. Frames and moves are decoded and converted a few at a time, so the nested
+    dictionaries of the whole game are never built, and top-level fields other than REPLAY_FIELDS are dropped as soon
+    as they are read. A replay read from a file is read in chunks, so its content is not held whole either.
+
+    Frames and moves are decoded with orjson if it is installed, which makes decoding faster than json.loads. With the
+    json module alone it takes about one and a half times as long, and the memory saving is all that is left.
+
+    :param source: undecoded content of the replay, or text file object to read it from
+    :return: the compact replay of the game
+    """
+    reader = _ReplayReader(source)
+    frames, moves = _frame_builders()
+    fields = {}
+
+    reader.expect("{")
+    while reader.peek() != "}":
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise reader.error("Expecting property name enclosed in double quotes")
+        reader.expect(":")
+
+        if key == "frames":
+            reader.decode_array(lambda frame: _add_frame(frames, frame))
+        elif key == "moves":
+            reader.decode_array(lambda frame_moves: _add_moves(moves, frame_moves))
+        else:
+            value = reader.decode()
+            if key in REPLAY_FIELDS:
+                fields[key] = value
+
+        if reader.expect(",}") == "}":
+            break
+
+    return CompactReplay(*(fields[field] for field in REPLAY_FIELDS), frames, moves)
@@ -0,0 +1,116 @@
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+
+class TurnScheduler:
+    """
+    Keeps every turn within the time allowed by the engine. A turn is split into phases that run in a fixed order
+    (PHASES). The scheduler measures how long each phase took over the recent turns, and tells the running phase how
+    much time it may spend while leaving enough for the phases still to come.
+
+    When time runs short, quality is degraded in a fixed order:
+        1. navigation uses fewer corrections per ship,
+        2. ships are sent with a plain thrust instead of navigate,
+        3. the assignment stops early, leaving the remaining ships without orders.
+
+    :ivar turn_budget: Seconds we allow ourselves per turn, from the moment the map was received
+    :ivar deadline: Time (in seconds since the Epoch) by which the current turn must be over
+    """
+    PHASES = ("parse", "features", "inference", "assignment", "navigation")
+
+    # Used until a phase has been measured
+    DEFAULT_DURATIONS = {"parse": 0.05, "features": 0.01, "inference": 0.05, "assignment": 0.05, "navigation": 0.2}
+
+    def __init__(self, turn_budget=1.8, history=10, max_corrections=180, min_corrections=10, navigation_reserve=0.2):
+        """
+        :param turn_budget: Seconds we allow ourselves per turn, from the moment the map was received
+        :param history: Number of recent turns used to predict the duration of each phase
+        :param max_corrections: Navigation corrections per ship when there is enough time
+        :param min_corrections: Fewest corrections worth running navigate for; below that ships just thrust
+        :param navigation_reserve: Seconds kept for the navigation phase, so that all ships get orders
+        """
+        self.turn_budget = turn_budget
+        self.max_corrections = max_corrections
+        self.min_corrections = min_corrections
+        self.navigation_reserve = navigation_reserve
+        self.deadline = None
+        self._durations = {phase: deque(maxlen=history) for phase in self.PHASES}
+        self._correction_costs = deque(maxlen=history * 100)
+        self._current_phase = None
+
+    def start_turn(self, turn_start=None):
+        """
+        Start the clock of a new turn.
+
+        :param turn_start: Time (in seconds since the Epoch) at which the map of the turn was received. Now if None.
+        """
+        self.deadline = (turn_start if turn_start is not None else time.time()) + self.turn_budget
+
+    @contextmanager
+    def phase(self, name, start=None):
+        """
+        Context manager measuring a phase of the turn.
+
+        :param name: One of PHASES
+        :param start: Time at which the phase started, if earlier than entering the context
+        """
+        self._current_phase = name
+        start = start if start is not None else time.time()
+        try:
+            yield
+        finally:
+            self._durations[name].append(time.time() - start)
+            self._current_phase = None
+
+    def expected_duration(self, name):
+        """
+        :param name: One of PHASES
+        :return: The longest duration of the phase over the recent turns
+        """
+        durations = self._durations[name]
+        return max(durations) if durations else self.DEFAULT_DURATIONS[name]
+
+    def time_left(self):
+        """
+        :return: Seconds the current phase may still spend, keeping enough time for the phases after it. Unlimited
+        outside of a turn.
+        """
+        if self.deadline is None:
+            return float('inf')
+        later_phases = self.PHASES[self.PHASES.index(self._current_phase) + 1:] if self._current_phase else ()
+        reserve = sum(self.navigation_reserve if phase == "navigation" else self.expected_duration(phase)
+                      for phase in later_phases)
+        return self.deadline - time.time() - reserve
+
+    def navigation_corrections(self, ships_left):
+        """
+        Decide how many corrections the next ship may use in navigate, sharing the remaining time evenly among the
+        ships that still need orders.
+
+        :param ships_left: Number of ships still to navigate, including the next one
+        :return: The max corrections to navigate with, or 0 if the ship should just thrust
+        """
+        if not self._correction_costs:
+            return self.max_corrections
+        per_ship = self.time_left() / max(ships_left, 1)
+        # The ship may try every correction it is allowed, so budget for the worst case
+        cost = max(self._correction_costs)
+        corrections = min(self.max_corrections, int(per_ship / cost)) if cost > 0 else self.max_corrections
+        return corrections if corrections >= self.min_corrections else 0
+
+    def record_navigation(self, duration, corrections):
+        """
+        Record the cost of one navigate call. The cost per correction is taken over the corrections the call tried
+        (Ship.corrections_tried), which are usually far fewer than it was allowed.
+
+        :param duration: Seconds the call took
+        :param corrections: The corrections it tried
+        """
+        self._correction_costs.append(duration / max(corrections, 1))
+
+    def log_turn(self, turn):
+        logging.debug('Turn #{} phases: {}'.format(
+            turn, ', '.join('{}={:.3f}'.format(phase, self._durations[phase][-1])
+                            for phase in self.PHASES if self._durations[phase])))
@@ -0,0 +1,673 @@
+"""
+A local, pure Python stand-in for the Halite II engine, to benchmark bots without the engine binary.
+
+    python -m tsmlstarterbot.simulator -d "240 160" -s 42 -i replays "python3 MyBot.py" "python3 MyBotShortTraining.py"
+
+Bots are spoken to with the protocol of hlt.networking.Game: their player id, the size of the map and the initial map,
+to which they answer with their name, then a map every turn, to which they answer with their commands. The simulation
+follows the rules of Halite II closely enough to grow realistic fleets: thrusts with continuous collisions between
+ships and with planets, docking and undocking, production of new ships, weapon fire and planet explosions. It is not
+the official engine, so results should be compared with each other rather than with the leaderboard.
+
+Everything is decided by the seed: the map, and the outcome of the game given the commands of the bots. The replay is
+written in the (uncompressed) format of the engine, so it can be read by tsmlstarterbot.parsing, and the arguments
+mirror those of the engine, so the simulator can be used as the engine of tsmlstarterbot.compare:
+
+    python -m tsmlstarterbot.compare --engine "python3 -m tsmlstarterbot.simulator" "python3 MyBot.py" ...
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import queue
+import random
+import argparse
+import threading
+import subprocess
+
+import numpy as np
+
+from hlt import constants
+from hlt.entity import Ship
+
+# Halite II maps have at most 28 planets, see PLANET_MAX_NUM
+MAX_PLANETS = 28
+# Ships of every player at the start of the game
+INITIAL_SHIPS = 3
+
+# Seconds a bot has to send its name, and to answer every turn
+INIT_TIMEOUT = 60.0
+TURN_TIMEOUT = 2.0
+
+UNDOCKED = Ship.DockingStatus.UNDOCKED.value
+DOCKING = Ship.DockingStatus.DOCKING.value
+DOCKED = Ship.DockingStatus.DOCKED.value
+UNDOCKING = Ship.DockingStatus.UNDOCKING.value
+
+_DOCKING_STATUS_NAMES = {UNDOCKED: "undocked", DOCKING: "docking", DOCKED: "docked", UNDOCKING: "undocking"}
+
+# Commands are not separated from each other (see Game.send_command_queue), only their letters tell where they start
+_COMMAND_TOKENS = re.compile(r'[a-z]|[-+]?\d+(?:\.\d*)?')
+_COMMAND_ARGUMENTS = {"t": 3, "d": 2, "u": 1}
+
+
+class _Ship(object):
+    __slots__ = ("id", "owner", "x", "y", "health", "vel_x", "vel_y", "status", "planet", "progress", "cooldown")
+
+    def __init__(self, ship_id, owner, x, y):
+        self.id = ship_id
+        self.owner = owner
+        self.x = x
+        self.y = y
+        self.health = constants.BASE_SHIP_HEALTH
+        self.vel_x = 0.0
+        self.vel_y = 0.0
+        self.status = UNDOCKED
+        self.planet = None
+        self.progress = 0
+        self.cooldown = 0
+
+
+class _Planet(object):
+    __slots__ = ("id", "x", "y", "radius", "health", "docking_spots", "current", "remaining", "owner", "docked")
+
+    def __init__(self, planet_id, x, y, radius, docking_spots):
+        self.id = planet_id
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.health = int(radius * constants.MAX_SHIP_HEALTH)
+        self.docking_spots = docking_spots
+        self.current = 0
+        self.remaining = int(radius * constants.RESOURCES_PER_RADIUS)
+        self.owner = None
+        self.docked = []
+
+
+def _first_contact(dx, dy, vx, vy, reach):
+    """
+    Time at which points starting at (dx, dy) and moving at (vx, vy) first come within reach of the origin.
+
+    :return: array of times in [0, 1], inf where there is no contact during the turn
+    """
+    a = vx * vx + vy * vy
+    b = dx * vx + dy * vy
+    c = dx * dx + dy * dy - reach * reach
+    discriminant = b * b - a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (-b - np.sqrt(discriminant)) / a
+    contact = (a > 0) & (discriminant >= 0) & (t >= 0) & (t <= 1)
+    return np.where(c <= 0, 0.0, np.where(contact, t, np.inf))
+
+
+class Simulation(object):
+    """
+    The state of a game, advanced one turn at a time. The driver (see play) sends map_string to the players, gives
+    their answers to add_commands and calls step, until is_over.
+
+    :ivar turn: number of turns played
+    :ivar ships: dictionary ship id -> ship of the ships alive
+    :ivar planets: dictionary planet id -> planet of the planets not destroyed
+    :ivar frames: frames of the replay, the state after every turn
+    :ivar moves: moves of the replay, the commands of every turn
+    """
+
+    def __init__(self, num_players, width, height, seed=0, max_turns=None):
+        """
+        :param num_players: number of players
+        :param width: map width
+        :param height: map height
+        :param seed: seed of the map
+        :param max_turns: number of turns after which the game ends, by default the one of the engine
+        """
+        self.num_players = num_players
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.max_turns = max_turns if max_turns is not None else 100 + int(math.sqrt(width * height))
+        self.turn = 0
+        self.ships = {}
+        self.planets = {}
+        self.last_frame_alive = [0] * num_players
+        self.ships_produced = [0] * num_players
+        self.damage_dealt = [0] * num_players
+        self._next_ship_id = 0
+        self._eliminated = set()
+        self._commands = [{} for _ in range(num_players)]
+
+        self._generate_map(random.Random(seed))
+        self.initial_planets = [{"id": planet.id, "x": planet.x, "y": planet.y, "r": planet.radius,
+                                 "health": planet.health, "docking_spots": planet.docking_spots,
+                                 "production": planet.remaining} for planet in self.planets.values()]
+        self.frames = [self._frame()]
+        self.moves = []
+
+    def _position(self, rho, phi):
+        # Positions are symmetric by rotation around the center of the map, stretched to its aspect ratio
+        return (self.width / 2 + rho * (self.width / 2) * math.cos(phi),
+                self.height / 2 + rho * (self.height / 2) * math.sin(phi))
+
+    def _generate_map(self, rng):
+        sector = 2 * math.pi / self.num_players
+        spawns = [self._position(0.6, math.pi + player_id * sector) for player_id in range(self.num_players)]
+        for player_id, (x, y) in enumerate(spawns):
+            for i in range(INITIAL_SHIPS):
+                self._add_ship(player_id, x, y + 2 * (i - (INITIAL_SHIPS - 1) / 2))
+
+        planets_per_player = min(constants.PLANETS_PER_PLAYER,
+                                 (MAX_PLANETS - constants.EXTRA_PLANETS) // self.num_players)
+        max_radius = 3 + min(self.width, self.height) / 25
+
+        def fits(x, y, radius, placed):
+            margin = radius + constants.DOCK_RADIUS
+            return (margin < x < self.width - margin and margin < y < self.height - margin and
+                    all(math.hypot(x - px, y - py) > radius + pr + constants.DOCK_RADIUS for px, py, pr in placed) and
+                    all(math.hypot(x - sx, y - sy) > radius + constants.WEAPON_RADIUS for sx, sy in spawns))
+
+        placed = []
+        # The extra planets are around the center, one group of num_players planets per player planet elsewhere
+        groups = [(constants.EXTRA_PLANETS, 0.0, 0.25)] + [(self.num_players, 0.2, 0.95)] * planets_per_player
+        for size, min_rho, max_rho in groups:
+            for _ in range(1000):
+                radius = rng.uniform(3, max_radius)
+                rho, phi = rng.uniform(min_rho, max_rho), rng.uniform(0, 2 * math.pi / size)
+                group = [self._position(rho, phi + i * 2 * math.pi / size) + (radius,) for i in range(size)]
+                if all(fits(x, y, r, placed + group[:i]) for i, (x, y, r) in enumerate(group)):
+                    placed += group
+                    break
+
+        for planet_id, (x, y, radius) in enumerate(placed):
+            docking_spots = min(6, max(2, int(round(radius / 1.5))))
+            self.planets[planet_id] = _Planet(planet_id, x, y, radius, docking_spots)
+
+    def _add_ship(self, owner, x, y):
+        ship = _Ship(self._next_ship_id, owner, x, y)
+        self.ships[ship.id] = ship
+        self._next_ship_id += 1
+        self.ships_produced[owner] += 1
+        return ship
+
+    def players_alive(self):
+        """
+        :return: ids of the players which still have ships and haven't been eliminated
+        """
+        owners = {ship.owner for ship in self.ships.values()}
+        return [player_id for player_id in range(self.num_players)
+                if player_id in owners and player_id not in self._eliminated]
+
+    def is_over(self):
+        alive = self.players_alive()
+        return self.turn >= self.max_turns or len(alive) < min(2, self.num_players)
+
+    def map_string(self):
+        """
+        :return: the state of the game, in the format parsed by hlt.game_map.Map
+        """
+        tokens = [str(self.num_players)]
+        ships_of = [[] for _ in range(self.num_players)]
+        for ship in self.ships.values():
+            ships_of[ship.owner].append(ship)
+        for player_id, ships in enumerate(ships_of):
+            tokens += [str(player_id), str(len(ships))]
+            for ship in ships:
+                tokens += [str(ship.id), repr(ship.x), repr(ship.y), str(ship.health), repr(ship.vel_x),
+                           repr(ship.vel_y), str(ship.status), str(ship.planet if ship.planet is not None else 0),
+                           str(ship.progress), str(ship.cooldown)]
+
+        tokens.append(str(len(self.planets)))
+        for planet in self.planets.values():
+            tokens += [str(planet.id), repr(planet.x), repr(planet.y), str(planet.health), repr(planet.radius),
+                       str(planet.docking_spots), str(planet.current), str(planet.remaining),
+                       "0" if planet.owner is None else "1", str(planet.owner if planet.owner is not None else 0),
+                       str(len(planet.docked))] + [str(ship_id) for ship_id in planet.docked]
+        return " ".join(tokens)
+
+    def add_commands(self, player_id, command_string):
+        """
+        Queue the commands of a player for the next step. Commands for ships which aren't the player's, and any
+        command after the first one for the same ship, are ignored.
+
+        :param player_id: id of the player
+        :param command_string: commands as sent by Game.send_command_queue
+        :raises ValueError: if the commands can't be parsed
+        """
+        tokens = _COMMAND_TOKENS.findall(command_string)
+        if "".join(tokens) != re.sub(r'\s', '', command_string):
+            raise ValueError("Unexpected characters in {!r}".format(command_string))
+
+        commands = self._commands[player_id]
+        i = 0
+        while i < len(tokens):
+            letter = tokens[i]
+            num_arguments = _COMMAND_ARGUMENTS.get(letter)
+            arguments = tokens[i + 1:i + 1 + (num_arguments or 0)]
+            if num_arguments is None or len(arguments) < num_arguments or not all(
+                    argument[-1].isdigit() for argument in arguments):
+                raise ValueError("Invalid command at {!r}".format(" ".join(tokens[i:i + 4])))
+            i += 1 + num_arguments
+
+            ship = self.ships.get(int(float(arguments[0])))
+            if ship is None or ship.owner != player_id or ship.id in commands:
+                continue
+            commands[ship.id] = (letter,) + tuple(float(argument) for argument in arguments[1:])
+
+    def eliminate(self, player_id):
+        """
+        Remove a player from the game, along with its ships, e.g. when its bot crashed or timed out.
+        """
+        self._eliminated.add(player_id)
+        self._commands[player_id] = {}
+        for ship in [ship for ship in self.ships.values() if ship.owner == player_id]:
+            self._destroy_ship(ship)
+
+    def _destroy_ship(self, ship):
+        del self.ships[ship.id]
+        self._leave_planet(ship)
+
+    def _leave_planet(self, ship):
+        if ship.planet is not None and ship.planet in self.planets:
+            planet = self.planets[ship.planet]
+            planet.docked.remove(ship.id)
+            if not planet.docked:
+                planet.owner = None
+        ship.planet = None
+
+    def step(self):
+        """
+        Play one turn with the queued commands: commands, movement and collisions, weapons, explosions, docking
+        and production.
+        """
+        for ship in self.ships.values():
+            ship.cooldown = max(0, ship.cooldown - 1)
+            ship.vel_x = ship.vel_y = 0.0
+
+        self.moves.append(self._apply_commands())
+        self._move()
+        self._fire()
+        self._explode_planets()
+        self._advance_docking()
+        self._produce()
+
+        self.turn += 1
+        self.frames.append(self._frame())
+        for player_id in self.players_alive():
+            self.last_frame_alive[player_id] = len(self.frames) - 1
+
+    def _apply_commands(self):
+        moves = {}
+        dock_requests = {}
+        for player_id, commands in enumerate(self._commands):
+            player_moves = {}
+            for ship_id, (letter, *arguments) in sorted(commands.items()):
+                ship = self.ships[ship_id]
+                if letter == "t":
+                    magnitude, angle = min(max(arguments[0], 0), constants.MAX_SPEED), arguments[1]
+                    player_moves[str(ship_id)] = {"type": "thrust", "shipId": ship_id,
+                                                  "magnitude": magnitude, "angle": angle}
+                    if ship.status == UNDOCKED:
+                        ship.vel_x = magnitude * math.cos(math.radians(angle))
+                        ship.vel_y = magnitude * math.sin(math.radians(angle))
+                elif letter == "d":
+                    planet_id = int(arguments[0])
+                    player_moves[str(ship_id)] = {"type": "dock", "shipId": ship_id, "planet_id": planet_id}
+                    planet = self.planets.get(planet_id)
+                    if (ship.status == UNDOCKED and planet is not None and planet.owner in (None, player_id) and
+                            math.hypot(ship.x - planet.x, ship.y - planet.y) <=
+                            planet.radius + constants.DOCK_RADIUS + constants.SHIP_RADIUS):
+                        dock_requests.setdefault(planet_id, []).append(ship)
+                else:
+                    player_moves[str(ship_id)] = {"type": "undock", "shipId": ship_id}
+                    if ship.status == DOCKED:
+                        ship.status, ship.progress = UNDOCKING, constants.DOCK_TURNS
+            moves[str(player_id)] = [player_moves]
+            self._commands[player_id] = {}
+
+        for planet_id, ships in sorted(dock_requests.items()):
+            planet = self.planets[planet_id]
+            # Players racing for the same free planet all fail to dock
+            if len({ship.owner for ship in ships}) > 1:
+                continue
+            for ship in ships[:planet.docking_spots - len(planet.docked)]:
+                ship.status, ship.progress, ship.planet = DOCKING, constants.DOCK_TURNS, planet_id
+                planet.docked.append(ship.id)
+                planet.owner = ship.owner
+        return moves
+
+    def _move(self):
+        ships = list(self.ships.values())
+        if not ships:
+            return
+        x = np.array([ship.x for ship in ships])
+        y = np.array([ship.y for ship in ships])
+        vel_x = np.array([ship.vel_x for ship in ships])
+        vel_y = np.array([ship.vel_y for ship in ships])
+        moving = np.flatnonzero((vel_x != 0) | (vel_y != 0))
+
+        events = []
+        if len(moving):
+            # Ships against ships, every pair once
+            t = _first_contact(x[None, :] - x[moving, None], y[None, :] - y[moving, None],
+                               vel_x[None, :] - vel_x[moving, None], vel_y[None, :] - vel_y[moving, None],
+                               2 * constants.SHIP_RADIUS)
+            others = np.arange(len(ships))[None, :]
+            others_moving = (vel_x[None, :] != 0) | (vel_y[None, :] != 0)
+            t[(others == moving[:, None]) | (others_moving & (others < moving[:, None]))] = np.inf
+            for i, j in zip(*np.nonzero(np.isfinite(t))):
+                events.append((t[i, j], 0, ships[moving[i]], ships[j]))
+
+            # Ships against planets
+            planets = list(self.planets.values())
+            if planets:
+                t = _first_contact(np.array([planet.x for planet in planets])[None, :] - x[moving, None],
+                                   np.array([planet.y for planet in planets])[None, :] - y[moving, None],
+                                   -vel_x[moving, None], -vel_y[moving, None],
+                                   np.array([planet.radius for planet in planets])[None, :] + constants.SHIP_RADIUS)
+                for i, j in zip(*np.nonzero(np.isfinite(t))):
+                    events.append((t[i, j], 1, ships[moving[i]], planets[j]))
+
+            # Ships leaving the map
+            end_x, end_y = x[moving] + vel_x[moving], y[moving] + vel_y[moving]
+            for i in np.flatnonzero((end_x < 0) | (end_x > self.width) | (end_y < 0) | (end_y > self.height)):
+                events.append((1.0, 2, ships[moving[i]], None))
+
+        events.sort(key=lambda event: (event[0], event[1], event[2].id, getattr(event[3], "id", -1)))
+        for _, kind, ship, other in events:
+            if ship.id not in self.ships:
+                continue
+            if kind == 0:
+                if other.id not in self.ships:
+                    continue
+                ship.health, other.health = ship.health - other.health, other.health - ship.health
+                for collided in (ship, other):
+                    if collided.health <= 0:
+                        self._destroy_ship(collided)
+            elif kind == 1:
+                if other.id not in self.planets:
+                    continue
+                other.health -= ship.health
+                self._destroy_ship(ship)
+            else:
+                self._destroy_ship(ship)
+
+        for ship in self.ships.values():
+            ship.x += ship.vel_x
+            ship.y += ship.vel_y
+
+    def _fire(self):
+        ships = list(self.ships.values())
+        attackers = [i for i, ship in enumerate(ships) if ship.status == UNDOCKED and ship.cooldown == 0]
+        if not attackers:
+            return
+        x = np.array([ship.x for ship in ships])
+        y = np.array([ship.y for ship in ships])
+        owner = np.array([ship.owner for ship in ships])
+        attackers = np.array(attackers)
+
+        in_range = ((x[None, :] - x[attackers, None]) ** 2 + (y[None, :] - y[attackers, None]) ** 2 <=
+                    (constants.WEAPON_RADIUS + 2 * constants.SHIP_RADIUS) ** 2) & \
+                   (owner[None, :] != owner[attackers, None])
+        num_targets = in_range.sum(axis=1)
+        # The damage of every attacker is split between its targets
+        share = np.where(num_targets > 0, constants.WEAPON_DAMAGE / np.maximum(num_targets, 1), 0.0)
+        damage = (in_range * share[:, None]).sum(axis=0)
+
+        for i in attackers[num_targets > 0].tolist():
+            ships[i].cooldown = constants.WEAPON_COOLDOWN
+            self.damage_dealt[ships[i].owner] += constants.WEAPON_DAMAGE
+        for i in np.flatnonzero(damage).tolist():
+            ship = ships[i]
+            ship.health = int(math.floor(ship.health - damage[i]))
+            if ship.health <= 0:
+                self._destroy_ship(ship)
+
+    def _explode_planets(self):
+        for planet in [planet for planet in self.planets.values() if planet.health <= 0]:
+            for ship_id in list(planet.docked):
+                self._destroy_ship(self.ships[ship_id])
+            del self.planets[planet.id]
+            # Ships close to the surface take up to the full damage, decreasing with the distance
+            for ship in list(self.ships.values()):
+                distance = math.hypot(ship.x - planet.x, ship.y - planet.y) - planet.radius
+                if distance < constants.EXPLOSION_RADIUS:
+                    ship.health -= int(constants.MAX_SHIP_HEALTH * (1 - max(distance, 0) / constants.EXPLOSION_RADIUS))
+                    if ship.health <= 0:
+                        self._destroy_ship(ship)
+
+    def _advance_docking(self):
+        for ship in list(self.ships.values()):
+            if ship.status in (DOCKING, UNDOCKING):
+                ship.progress -= 1
+                if ship.progress > 0:
+                    continue
+                if ship.status == DOCKING:
+                    ship.status = DOCKED
+                else:
+                    self._leave_planet(ship)
+                    ship.status = UNDOCKED
+
+    def _produce(self):
+        for planet in self.planets.values():
+            docked = sum(self.ships[ship_id].status == DOCKED for ship_id in planet.docked)
+            if not docked:
+                continue
+            production = min(planet.remaining,
+                             constants.BASE_PRODUCTIVITY + constants.ADDITIONAL_PRODUCTIVITY * (docked - 1))
+            planet.current += production
+            planet.remaining -= production
+            if planet.current >= constants.PRODUCTION_PER_SHIP:
+                position = self._spawn_position(planet)
+                # Without room around the planet, the ship is produced as soon as there is some
+                if position is not None:
+                    planet.current -= constants.PRODUCTION_PER_SHIP
+                    self._add_ship(planet.owner, *position)
+
+    def _spawn_position(self, planet):
+        # Ships appear next to the planet, towards the center of the map if possible
+        toward_center = math.atan2(self.height / 2 - planet.y, self.width / 2 - planet.x)
+        distance = planet.radius + constants.SPAWN_RADIUS
+        for offset in range(0, 360, 15):
+            angle = toward_center + math.radians(offset if offset <= 180 else offset - 360)
+            x, y = planet.x + distance * math.cos(angle), planet.y + distance * math.sin(angle)
+            if (constants.SHIP_RADIUS <= x <= self.width - constants.SHIP_RADIUS and
+                    constants.SHIP_RADIUS <= y <= self.height - constants.SHIP_RADIUS and
+                    all(math.hypot(x - ship.x, y - ship.y) > 2 * constants.SHIP_RADIUS for ship in self.ships.values())
+                    and all(math.hypot(x - other.x, y - other.y) > other.radius + constants.SHIP_RADIUS
+                            for other in self.planets.values())):
+                return x, y
+        return None
+
+    def _frame(self):
+        ships = {str(player_id): {} for player_id in range(self.num_players)}
+        for ship in self.ships.values():
+            ships[str(ship.owner)][str(ship.id)] = {
+                "id": ship.id, "owner": ship.owner, "x": ship.x, "y": ship.y, "health": ship.health,
+                "vel_x": ship.vel_x, "vel_y": ship.vel_y, "cooldown": ship.cooldown,
+                "docking": {"status": _DOCKING_STATUS_NAMES[ship.status], "planet_id": ship.planet,
+                            "turns_left": ship.progress}}
+        planets = {str(planet.id): {"id": planet.id, "health": planet.health, "owner": planet.owner,
+                                    "docked_ships": list(planet.docked), "current_production": planet.current,
+                                    "remaining_production": planet.remaining}
+                   for planet in self.planets.values()}
+        return {"ships": ships, "planets": planets}
+
+    def ranks(self):
+        """
+        Players are ranked by the last frame they were alive, then by the total health of their ships.
+
+        :return: list of the rank of every player, 1 for the winner
+        """
+        health = [0] * self.num_players
+        for ship in self.ships.values():
+            health[ship.owner] += ship.health
+        order = sorted(range(self.num_players), key=lambda player_id: (-self.last_frame_alive[player_id],
+                                                                      -health[player_id], player_id))
+        ranks = [0] * self.num_players
+        for rank, player_id in enumerate(order, 1):
+            ranks[player_id] = rank
+        return ranks
+
+    def replay(self, player_names):
+        """
+        :param player_names: names of the players, indexed by player id
+        :return: json dictionary of the replay, in the format of the engine
+        """
+        return {"version": 1, "seed": self.seed, "width": self.width, "height": self.height,
+                "num_players": self.num_players, "num_frames": len(self.frames), "player_names": player_names,
+                "planets": self.initial_planets, "frames": self.frames, "moves": self.moves,
+                "stats": {str(player_id): {"rank": rank, "last_frame_alive": self.last_frame_alive[player_id],
+                                           "total_ship_count": self.ships_produced[player_id],
+                                           "damage_dealt": self.damage_dealt[player_id]}
+                          for player_id, rank in enumerate(self.ranks())}}
+
+
+class _BotError(Exception):
+    pass
+
+
+class _BotProcess(object):
+    """
+    A bot run as a shell command, whose output lines are read by a thread so they can be waited for with a timeout.
+    """
+
+    def __init__(self, command):
+        self._process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         universal_newlines=True, start_new_session=True)
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self._process.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def send(self, message):
+        try:
+            self._process.stdin.write(message)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            raise _BotError("exited")
+
+    def receive(self, deadline):
+        """
+        :param deadline: time.monotonic() after which the bot has timed out, None to wait as long as it takes
+        :return: the next line sent by the bot, without its end of line
+        """
+        try:
+            line = self._lines.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            raise _BotError("timed out")
+        if line is None:
+            raise _BotError("exited")
+        return line.rstrip("\n")
+
+    def kill(self):
+        if self._process.poll() is None:
+            try:
+                os.killpg(self._process.pid, 9)
+            except OSError:
+                pass
+        self._process.wait()
+
+
+def play(commands, width, height, seed=0, replay_directory=".", timeouts=True, max_turns=None, quiet=False):
+    """
+    Play a game between bots.
+
+    :param commands: shell commands of the bots, player i is the i-th one
+    :param width: map width
+    :param height: map height
+    :param seed: seed of the map
+    :param replay_directory: directory the replay is written to, None not to write it
+    :param timeouts: whether bots which are too slow (see INIT_TIMEOUT and TURN_TIMEOUT) are eliminated
+    :param max_turns: number of turns after which the game ends, by default the one of the engine
+    :param quiet: whether to keep from printing the results
+    :return: the Simulation at the end of the game, the player names and the path to the replay
+    """
+    simulation = Simulation(len(commands), width, height, seed=seed, max_turns=max_turns)
+    names = ["player{}".format(player_id) for player_id in range(len(commands))]
+    bots = [_BotProcess(command) for command in commands]
+    errors = {}
+
+    def exchange(players, message, timeout):
+        # The map is sent to all the bots first, so that they think at the same time
+        for player_id in players:
+            try:
+                bots[player_id].send(message(player_id))
+            except _BotError as e:
+                errors[player_id] = str(e)
+        deadline = time.monotonic() + timeout if timeouts else None
+        answers = {}
+        for player_id in players:
+            if player_id in errors:
+                continue
+            try:
+                answers[player_id] = bots[player_id].receive(deadline)
+            except _BotError as e:
+                errors[player_id] = "{} on turn {}".format(e, simulation.turn)
+        for player_id in players:
+            if player_id in errors:
+                simulation.eliminate(player_id)
+        return answers
+
+    try:
+        initial_map = simulation.map_string()
+        for player_id, name in exchange(range(len(bots)), lambda player_id: "{}\n{} {}\n{}\n".format(
+                player_id, width, height, initial_map), INIT_TIMEOUT).items():
+            names[player_id] = name.strip() or names[player_id]
+
+        while not simulation.is_over():
+            map_string = simulation.map_string() + "\n"
+            for player_id, answer in exchange(simulation.players_alive(), lambda player_id: map_string,
+                                              TURN_TIMEOUT).items():
+                try:
+                    simulation.add_commands(player_id, answer)
+                except ValueError as e:
+                    errors[player_id] = "{} on turn {}".format(e, simulation.turn)
+                    simulation.eliminate(player_id)
+            simulation.step()
+    finally:
+        for bot in bots:
+            bot.kill()
+
+    replay_path = None
+    if replay_directory is not None:
+        os.makedirs(replay_directory, exist_ok=True)
+        replay_path = os.path.join(replay_directory, "replay-{}-{}-{}x{}.hlt".format(
+            time.strftime("%Y%m%d-%H%M%S"), seed, width, height))
+        with open(replay_path, "w") as f:
+            json.dump(simulation.replay(names), f)
+
+    if not quiet:
+        ranks = simulation.ranks()
+        for player_id in sorted(range(len(bots)), key=lambda player_id: ranks[player_id]):
+            print("Player #{}, {}, came in rank #{} and was last alive on frame #{}, producing {} ships and dealing "
+                  "{} damage!{}".format(player_id, names[player_id], ranks[player_id],
+                                        simulation.last_frame_alive[player_id],
+                                        simulation.ships_produced[player_id], simulation.damage_dealt[player_id],
+                                        " ({})".format(errors[player_id]) if player_id in errors else ""))
+    return simulation, names, replay_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Halite II simulator")
+    parser.add_argument("bots", nargs="+", help="Commands running the bots")
+    parser.add_argument("-d", "--dimensions", help="Map width and height, e.g. \"240 160\"", default="240 160")
+    parser.add_argument("-s", "--seed", type=int, help="Seed of the map", default=None)
+    parser.add_argument("-i", "--replay_directory", help="Directory the replay is written to", default=".")
+    parser.add_argument("-t", "--timeout", action="store_true", help="Ignore the timeouts of the bots")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't print the results")
+    parser.add_argument("--turns", type=int, help="Number of turns, by default the one of the engine")
+    parser.add_argument("--no-compression", action="store_true", help="Accepted for compatibility with the "
+                                                                       "engine, replays are never compressed")
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.dimensions.split())
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+    play(args.bots, width, height, seed=seed, replay_directory=args.replay_directory, timeouts=not args.timeout,
+         max_turns=args.turns, quiet=args.quiet)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,5 @@
 import sys
 import argparse
-import json
 import os.path
 import zipfile
 
@@ -12,14 +11,14 @@ warnings.simplefilter("ignore", category=RuntimeWarning)
 import numpy as np
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '99' #99
-from tsmlstarterbot.parsing import parse, load_parsed
+from tsmlstarterbot.parsing import parse, load_parsed, load_parsed_game_ids
 from tsmlstarterbot.cnn_net_model import CNN_Net
 from tsmlstarterbot.common import *
 
 
-def fetch_data_dir(directory, limit):
+def list_replays_dir(directory, limit):
     """
-    Loads up to limit games into Python dictionaries from uncompressed replay files.
+    Lists up to limit uncompressed replay files of a directory, without loading them.
     """
     replay_files = sorted([f for f in os.listdir(directory) if
                            os.path.isfile(os.path.join(directory, f)) ]) #and f.startswith("replay-")
@@ -28,42 +27,17 @@ def fetch_data_dir(directory, limit):
         raise Exception("Didn't find any game replays. Please call make games.")
 
     print("Found {} games.".format(len(replay_files)))
-    print("Trying to load up to {} games ...".format(limit))
+    return [os.path.join(directory, r) for r in replay_files[:limit]]
 
-    loaded_games = 0
 
-    all_data = []
-    for r in replay_files:
-        full_path = os.path.join(directory, r)
-        with open(full_path) as game:
-            game_data = game.read()
-            game_json_data = json.loads(game_data)
-            all_data.append(game_json_data)
-        loaded_games = loaded_games + 1
-
-        if loaded_games >= limit:
-            break
-
-    print("{} games loaded.".format(loaded_games))
-
-    return all_data
-
-def fetch_data_zip(zipfilename, limit):
+def list_replays_zip(zipfilename, limit):
     """
-    Loads up to limit games into Python dictionaries from a zipfile containing uncompressed replay files.
+    Lists up to limit replays of a zipfile containing uncompressed replay files, as (zipfilename, name) tuples
+    understood by parsing.load_replay.
     """
-    all_jsons = []
     with zipfile.ZipFile(zipfilename) as z:
         print("Found {} games.".format(len(z.filelist)))
-        print("Trying to load up to {} games ...".format(limit))
-        for i in z.filelist[:limit]:
-            with z.open(i) as f:
-                lines = f.readlines()
-                assert len(lines) == 1
-                d = json.loads(lines[0].decode())
-                all_jsons.append(d)
-    print("{} games loaded.".format(len(all_jsons)))
-    return all_jsons
+        return [(zipfilename, i.filename) for i in z.filelist[:limit]]
 
 
 def main():
@@ -75,22 +49,30 @@ def main():
     parser.add_argument("--games_limit", type=int, help="Train on up to games_limit games", default=1000)
     parser.add_argument("--seed", type=int, help="Random seed to make the training deterministic")
     parser.add_argument("--bot_to_imitate", help="Name of the bot whose strategy we want to learn")
-    parser.add_argument("--dump_features_location", help="Location of hdf file where the features should be stored")
-    parser.add_argument("--dump_features_fn", help="File name of file where the features should be stored")
+    parser.add_argument("--dump_features_location", help="Directory of the feature cache", default="../train_data")
+    parser.add_argument("--dump_features_fn", help="Name of the feature cache", default="train_data")
+    parser.add_argument("--workers", type=int, help="Number of processes parsing the games", default=1)
+    parser.add_argument("--shards_location", help="Directory caching the features of each replay, so that replays "
+                                                  "are only parsed once", default="../train_data/shards")
 
     args = parser.parse_args()
 
-    if args.data.endswith('.zip'):
-        raw_data = fetch_data_zip(args.data, args.games_limit)
-        data_input, data_output = parse(raw_data, args.bot_to_imitate,
-                                        args.dump_features_location, args.dump_features_fn)
-    elif args.features_ready:
+    # Replays are only listed here, parse loads them one at a time
+    if args.features_ready:
         data_input, data_output = load_parsed(args.dump_features_location, args.dump_features_fn)
+    elif args.data.endswith('.zip'):
+        replays = list_replays_zip(args.data, args.games_limit)
+        data_input, data_output = parse(replays, args.bot_to_imitate,
+                                        args.dump_features_location, args.dump_features_fn, workers=args.workers,
+                                        shards_location=args.shards_location)
     else:
-        raw_data = fetch_data_dir(args.data, args.games_limit)
-        data_input, data_output = parse(raw_data, args.bot_to_imitate,
-                                        args.dump_features_location, args.dump_features_fn)
+        replays = list_replays_dir(args.data, args.games_limit)
+        data_input, data_output = parse(replays, args.bot_to_imitate,
+                                        args.dump_features_location, args.dump_features_fn, workers=args.workers,
+                                        shards_location=args.shards_location)
 
+    # Validation games are chosen among the games of the feature cache
+    game_ids = load_parsed_game_ids(args.dump_features_location, args.dump_features_fn)
     input_data_size = data_input.shape[1:]
     # Make deterministic if needed
     if args.seed is not None:
@@ -111,7 +93,7 @@ def main():
     sys.stdout = stdout_fn
 
     net.train(data_input, data_output, validation_split = 0.2, n_epochs=28,
-              batch_size=100, verbose=1, model_version="v0")
+              batch_size=100, verbose=1, model_version="v0", game_ids=game_ids)
 
 
 
@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+
+def split_games(num_frames, validation_split, game_ids=None, seed=None):
+    """
+    Split the frames into a training and a validation set. All the frames of a game end up on the same side, so that
+    the validation loss is measured on games the network has never seen.
+
+    :param num_frames: number of frames in the dataset
+    :param validation_split: fraction of the games used for validation
+    :param game_ids: game of each frame (see the index of the feature cache). Without it, the last frames are used for
+    validation, like the validation_split of Keras.
+    :param seed: seed choosing the validation games
+    :return: rows of the training frames, rows of the validation frames
+    """
+    rows = np.arange(num_frames)
+    if game_ids is None:
+        split = num_frames - int(num_frames * validation_split)
+        return rows[:split], rows[split:]
+
+    games = np.unique(game_ids)
+    validation_games = np.random.default_rng(seed).permutation(games)[:int(round(len(games) * validation_split))]
+    is_validation = np.isin(game_ids, validation_games)
+    return rows[~is_validation], rows[is_validation]
+
+
+class FrameBatches(object):
+    """
+    Batches of frames read from (memory-mapped) features and outputs, so that the dataset never has to fit in memory.
+
+    Frames are read in chunks of consecutive rows, which keeps the reads sequential on disk. When shuffling, the
+    chunks are read in a random order and their frames are mixed through a buffer of shuffle_buffer frames, so the
+    memory used is bounded by the buffer rather than by the dataset. Every iteration is a new epoch, with a new order.
+    """
+
+    def __init__(self, features, outputs, rows, batch_size, shuffle_buffer=0, chunk_size=256, seed=None,
+                 dtype=np.float32):
+        """
+        :param features: array of shape (frames, PLANET_MAX_NUM, PER_PLANET_FEATURES)
+        :param outputs: array of shape (frames, PLANET_MAX_NUM)
+        :param rows: rows of the frames to iterate over, see split_games
+        :param batch_size: number of frames per batch, the last batch of an epoch may be smaller
+        :param shuffle_buffer: number of frames mixed together when shuffling, 0 to keep the frames in order
+        :param chunk_size: number of consecutive rows read at once
+        :param seed: seed of the shuffling
+        :param dtype: type of the batches
+        """
+        self.features = features
+        self.outputs = outputs
+        self.rows = np.asarray(rows)
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return math.ceil(len(self.rows) / self.batch_size)
+
+    def _chunks(self):
+        chunks = [self.rows[i:i + self.chunk_size] for i in range(0, len(self.rows), self.chunk_size)]
+        if self.shuffle_buffer:
+            chunks = [chunks[i] for i in self._rng.permutation(len(chunks))]
+        return chunks
+
+    def _read(self, rows):
+        # A slice reads the rows straight from the file, fancy indexing is only needed for non-consecutive rows
+        if len(rows) and rows[-1] - rows[0] == len(rows) - 1:
+            rows = slice(rows[0], rows[-1] + 1)
+        return self.features[rows].astype(self.dtype), self.outputs[rows].astype(self.dtype)
+
+    def __iter__(self):
+        pending_features, pending_outputs = [], []
+        pending = 0
+        for chunk in self._chunks():
+            features, outputs = self._read(chunk)
+            pending_features.append(features)
+            pending_outputs.append(outputs)
+            pending += len(chunk)
+            if pending >= max(self.shuffle_buffer, self.batch_size):
+                features, outputs = self._mix(pending_features, pending_outputs)
+                full = len(features) - len(features) % self.batch_size
+                for start in range(0, full, self.batch_size):
+                    yield features[start:start + self.batch_size], outputs[start:start + self.batch_size]
+                pending_features, pending_outputs = [features[full:]], [outputs[full:]]
+                pending = len(features) - full
+
+        if pending:
+            features, outputs = self._mix(pending_features, pending_outputs)
+            for start in range(0, len(features), self.batch_size):
+                yield features[start:start + self.batch_size], outputs[start:start + self.batch_size]
+
+    def _mix(self, features, outputs):
+        features, outputs = np.concatenate(features), np.concatenate(outputs)
+        if self.shuffle_buffer:
+            order = self._rng.permutation(len(features))
+            features, outputs = features[order], outputs[order]
+        return features, outputs